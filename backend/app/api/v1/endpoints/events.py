@@ -1,10 +1,17 @@
 """
 Events API endpoints (basic structure)
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from datetime import date
+from typing import Literal, Optional
 from app.core.database import get_db
-from app.models.event import Event
+from app.core.pagination import paginate
+from app.models.event import Event, EventStatus
+from app.schemas.event import EventMenuRequest, EventRecostRequest
+from app.services.event_service import EventService
+from app.services.historical_cost_service import HistoricalCostService
+from app.services.recost_service import RecostService
 
 router = APIRouter()
 
@@ -13,20 +20,113 @@ router = APIRouter()
 def list_events(
     skip: int = 0,
     limit: int = 10,
+    sort_by: Literal["event_date", "margin", "revenue", "cost"] = "event_date",
+    descending: bool = True,
+    min_margin: Optional[float] = Query(None, description="Minimum margin (0-1)"),
+    max_margin: Optional[float] = Query(None, description="Maximum margin (0-1)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (replaces skip)"),
+    include_total: Optional[bool] = Query(None, description="Count all matches (default: only without cursor)"),
     db: Session = Depends(get_db)
 ):
-    """List all events with pagination"""
-    total = db.query(Event).count()
-    events = db.query(Event).order_by(Event.event_date.desc()).offset(skip).limit(limit).all()
+    """
+    List all events with pagination (page offset or keyset cursor).
+    Sorting and margin filters run in SQL on the stored order totals.
+    """
+    margin = EventService.margin_expression()
+    query = db.query(Event)
+    if min_margin is not None:
+        query = query.filter(margin >= min_margin)
+    if max_margin is not None:
+        query = query.filter(margin <= max_margin)
+
+    sort_column = {
+        "event_date": Event.event_date,
+        "margin": margin,
+        "revenue": Event.orders_total_revenue,
+        "cost": Event.orders_total_cost,
+    }[sort_by]
+    page = paginate(
+        query, sort_column, Event.id, limit, sort=f"{sort_by}:{descending}",
+        descending=descending, cursor=cursor, skip=skip, include_total=include_total
+    )
     
     return {
-        "items": events,
-        "total": total,
+        "items": page["items"],
+        "total": page["total"],
         "page": (skip // limit) + 1,
-        "size": limit
+        "size": limit,
+        "next_cursor": page["next_cursor"],
+        "has_more": page["has_more"]
     }
 
 
+@router.get("/totals/consistency")
+def check_event_totals(db: Session = Depends(get_db)):
+    """
+    Compare the stored event order totals against their orders
+    """
+    return EventService.check_order_totals(db)
+
+
+@router.post("/totals/reconcile")
+def reconcile_event_totals(db: Session = Depends(get_db)):
+    """
+    Recompute the stored totals of every event that drifted from its orders
+    """
+    return EventService.check_order_totals(db, fix=True)
+
+
+@router.post("/recost")
+def recost_events(
+    request: EventRecostRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """
+    Refresh cost_at_sale of every order in range from current recipe costs
+    (each recipe costed once, bulk UPDATEs, one audit row per changed order).
+    With background=true returns a job to poll at /events/recost/jobs/{job_id}.
+    """
+    params = {
+        "start_date": request.start_date,
+        "end_date": request.end_date,
+        "statuses": [EventStatus(s) for s in request.statuses],
+        "dry_run": request.dry_run,
+    }
+    if not request.background:
+        return RecostService.recost_events(db, **params)
+
+    job = RecostService.create_job({**params, "statuses": request.statuses})
+    background_tasks.add_task(RecostService.run_job, db.get_bind(), job["job_id"], **params)
+    return job
+
+
+@router.get("/recost/jobs/{job_id}")
+def get_recost_job(job_id: str):
+    """
+    Status and progress of a background re-cost job
+    """
+    job = RecostService.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/cost-reconciliation")
+def reconcile_order_costs(
+    start_date: date,
+    end_date: date,
+    db: Session = Depends(get_db)
+):
+    """
+    Compare cost_at_sale of every order of the events in range with the
+    recipe cost as of the moment each order was created
+    """
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+    return HistoricalCostService.reconcile_orders(db, start_date, end_date)
+
+
 @router.get("/{event_id}")
 def get_event(event_id: int, db: Session = Depends(get_db)):
     """Get a specific event with financial calculations"""
@@ -50,13 +150,22 @@ def get_event(event_id: int, db: Session = Depends(get_db)):
     }
 
 
+@router.get("/{event_id}/cost-reconciliation")
+def reconcile_event_order_costs(event_id: int, db: Session = Depends(get_db)):
+    """
+    Point-in-time cost audit of one event's orders (see /events/cost-reconciliation)
+    """
+    if not db.query(Event.id).filter(Event.id == event_id).first():
+        raise HTTPException(status_code=404, detail="Event not found")
+    return HistoricalCostService.reconcile_orders(db, event_id=event_id)
+
+
 @router.post("/", response_model=dict)
 def create_event(
     event: dict,
     db: Session = Depends(get_db)
 ):
     """Create a new event"""
-    from app.services.event_service import EventService
     return EventService.create_event(db, event)
 
 
@@ -128,7 +237,6 @@ def add_event_item(
     db: Session = Depends(get_db)
 ):
     """Add a recipe/item to an event (Using Service for Snapshots)"""
-    from app.services.event_service import EventService
     
     try:
         # Manually parsing item dict for now, DTO would be better
@@ -142,3 +250,16 @@ def add_event_item(
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+
+
+@router.post("/{event_id}/menu", response_model=dict)
+def add_event_menu(
+    event_id: int,
+    menu: EventMenuRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Add a whole menu to an event in one transaction.
+    Returns the created orders and the new event totals.
+    """
+    return EventService.add_menu_to_event(db, event_id, menu.items)
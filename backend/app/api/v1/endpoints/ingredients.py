@@ -3,11 +3,13 @@ Ingredients API endpoints - Simple version
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import date, timedelta
+from typing import List, Literal, Optional
 import math
 
 from app.core.database import get_db
-from app.models.ingredient import Ingredient, IngredientPriceHistory
+from app.core.pagination import paginate
+from app.models.ingredient import Ingredient, IngredientPriceDaily, IngredientPriceHistory
 from app.schemas.ingredient import (
     IngredientCreate,
     IngredientUpdate,
@@ -15,9 +17,15 @@ from app.schemas.ingredient import (
     IngredientList,
     IngredientBulkUpdate
 )
+from app.services.cost_cache_service import RecipeCostCacheService
+from app.services.ingredient_service import IngredientService
+from app.services.price_history_service import PriceHistoryService
 
 router = APIRouter()
 
+# Ingredient fields that feed Ingredient.real_cost_per_usage_unit
+COST_INPUT_FIELDS = {"current_cost", "conversion_ratio", "yield_factor"}
+
 
 @router.get("/", response_model=IngredientList)
 def list_ingredients(
@@ -25,9 +33,11 @@ def list_ingredients(
     limit: int = Query(20, ge=1, le=100),
     category: str = Query(None),
     search: str = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (replaces skip)"),
+    include_total: Optional[bool] = Query(None, description="Count all matches (default: only without cursor)"),
     db: Session = Depends(get_db)
 ):
-    """List all ingredients with pagination and filtering"""
+    """List all ingredients with pagination (page offset or keyset cursor) and filtering"""
     query = db.query(Ingredient)
     
     # Apply filters
@@ -40,18 +50,18 @@ def list_ingredients(
             Ingredient.sku.ilike(f"%{search}%")
         )
     
-    # Get total count
-    total = query.count()
-    
-    # Apply pagination with deterministic ordering
-    ingredients = query.order_by(Ingredient.name).offset(skip).limit(limit).all()
+    # Deterministic (name, id) ordering; count only when asked for
+    page = paginate(query, Ingredient.name, Ingredient.id, limit, sort="name", cursor=cursor, skip=skip, include_total=include_total)
+    total = page["total"]
     
     return {
-        "items": ingredients,
+        "items": page["items"],
         "total": total,
         "page": skip // limit + 1 if limit > 0 else 1,
         "page_size": limit,
-        "pages": math.ceil(total / limit) if total > 0 and limit > 0 else 0
+        "pages": (math.ceil(total / limit) if total > 0 and limit > 0 else 0) if total is not None else None,
+        "next_cursor": page["next_cursor"],
+        "has_more": page["has_more"]
     }
 
 
@@ -76,6 +86,32 @@ def create_ingredient(
     return db_ingredient
 
 
+@router.get("/price-history")
+def get_price_history(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    granularity: Literal["day", "week", "month"] = Query("day", description="Bucket size"),
+    agg: Literal["last", "avg", "min", "max"] = Query("last", description="Value per bucket"),
+    ingredient_id: Optional[int] = Query(None),
+    category: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Price series per ingredient (one ingredient, a category or the whole
+    catalog), downsampled server-side. Defaults to the last 12 months.
+    """
+    if not end_date:
+        end_date = date.today()
+    if not start_date:
+        start_date = end_date - timedelta(days=365)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+
+    return PriceHistoryService.get_series(
+        db, start_date, end_date, granularity, agg, ingredient_id=ingredient_id, category=category
+    )
+
+
 @router.get("/{ingredient_id}", response_model=IngredientResponse)
 def get_ingredient(
     ingredient_id: int,
@@ -121,6 +157,11 @@ def update_ingredient(
             changed_by="API User" # Placeholder for auth
         )
         db.add(history)
+        PriceHistoryService.refresh_daily(db, [db_ingredient.id])
+    
+    # Refresh cached costs of recipes using this ingredient (and their parents)
+    if COST_INPUT_FIELDS.intersection(update_data):
+        RecipeCostCacheService.invalidate_ingredients(db, [db_ingredient.id])
     
     db.commit()
     db.refresh(db_ingredient)
@@ -167,6 +208,10 @@ def delete_ingredient(
     db.query(IngredientPriceHistory).filter(
         IngredientPriceHistory.ingredient_id == ingredient_id
     ).delete()
+    if PriceHistoryService.rollup_ready(db):
+        db.query(IngredientPriceDaily).filter(
+            IngredientPriceDaily.ingredient_id == ingredient_id
+        ).delete()
     
     # Now delete the ingredient
     db.delete(db_ingredient)
@@ -183,61 +228,9 @@ def bulk_price_update(
     """
     Bulk update prices by category (anti-inflation feature)
     Formula: New Cost = Current Cost * (1 + percentage/100)
+    Runs as set-based SQL (history INSERT ... SELECT + one UPDATE) in one transaction.
     """
-    query = db.query(Ingredient)
-    
-    if update_data.category:
-        query = query.filter(Ingredient.category == update_data.category)
-    
-    ingredients = query.all()
-    
-    # Allow empty results - return 0 updated
-    if not ingredients:
-        return {
-            "message": "No ingredients found in category",
-            "category": update_data.category or "all",
-            "percentage_increase": update_data.percentage_increase,
-            "multiplier": 1 + (update_data.percentage_increase / 100),
-            "ingredients_updated": 0,
-            "total_cost_before": 0.0,
-            "total_cost_after": 0.0
-        }
-    
-    updated_count = 0
-    multiplier = 1 + (update_data.percentage_increase / 100)
-    total_cost_before = 0.0
-    total_cost_after = 0.0
-    
-    for ingredient in ingredients:
-        old_cost = ingredient.current_cost
-        new_cost = old_cost * multiplier
-        
-        total_cost_before += old_cost
-        total_cost_after += new_cost
-        
-        if new_cost != old_cost:
-            ingredient.current_cost = new_cost
-            
-            # Log history
-            history = IngredientPriceHistory(
-                ingredient_id=ingredient.id,
-                old_cost=old_cost,
-                new_cost=new_cost,
-                changed_by=f"Bulk Update {update_data.percentage_increase}%"
-            )
-            db.add(history)
-            
-            updated_count += 1
-    
-    db.commit()
-    
-    return {
-        "message": f"Successfully updated {updated_count} ingredient(s)",
-        "category": update_data.category or "all",
-        "percentage_increase": update_data.percentage_increase,
-        "multiplier": multiplier,
-        "ingredients_updated": updated_count,
-        "total_cost_before": total_cost_before,
-        "total_cost_after": total_cost_after
-    }
+    return IngredientService.bulk_update_prices(
+        db, update_data.percentage_increase, category=update_data.category
+    )
 
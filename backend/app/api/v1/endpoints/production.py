@@ -5,6 +5,9 @@ from typing import Optional
 
 from app.core.database import get_db
 from app.services.production_service import ProductionService
+from app.services.purchasing_service import PurchasingService
+from app.services.mrp_service import MRPService
+from app.services.prep_schedule_service import PrepScheduleService
 
 router = APIRouter()
 
@@ -55,3 +58,55 @@ def get_shopping_list(
         "total_items": len(shopping_items),
         "items": shopping_items
     }
+
+@router.get("/purchase-orders")
+def get_purchase_orders(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Shopping list solved into per-supplier purchase orders:
+    cheapest offer per ingredient rounded to packages, minimum orders,
+    order-by dates from lead times, and savings vs default suppliers.
+    """
+    if not start_date:
+        start_date = date.today()
+    if not end_date:
+        end_date = start_date + timedelta(days=7)
+
+    return PurchasingService.get_purchase_orders(db, start_date, end_date)
+
+@router.get("/mrp")
+def get_material_requirements(
+    start_date: Optional[date] = None,
+    horizon_days: int = Query(90, ge=1, le=366),
+    include_series: bool = True,
+    db: Session = Depends(get_db)
+):
+    """
+    Time-phased requirements: per ingredient and day, demand, projected
+    on-hand and net requirements, with planned orders dated by supplier
+    lead time. Defaults to a 90-day horizon starting today.
+    """
+    if not start_date:
+        start_date = date.today()
+
+    return MRPService.get_requirements(db, start_date, horizon_days, include_series)
+
+@router.get("/prep-schedule")
+def get_prep_schedule(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Sub-recipe prep batches shared across events within their shelf life,
+    with a per-day kitchen timeline. Defaults to next 7 days.
+    """
+    if not start_date:
+        start_date = date.today()
+    if not end_date:
+        end_date = start_date + timedelta(days=7)
+
+    return PrepScheduleService.get_prep_schedule(db, start_date, end_date)
@@ -43,13 +43,15 @@ def list_proposals(
     skip: int = 0,
     limit: int = 10,
     event_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
     db: Session = Depends(get_db)
 ):
     """
-    List all proposals with pagination
+    List all proposals with pagination (page offset or keyset cursor)
     Optionally filter by event_id
     """
-    result = ProposalService.list_proposals(db, skip, limit, event_id)
+    result = ProposalService.list_proposals(db, skip, limit, event_id, cursor, include_total)
     
     # Enrich list items with data from snapshots
     enriched_items = []
@@ -74,7 +76,9 @@ def list_proposals(
         "items": enriched_items,
         "total": result["total"],
         "page": result["page"],
-        "size": result["size"]
+        "size": result["size"],
+        "next_cursor": result["next_cursor"],
+        "has_more": result["has_more"]
     }
 
 
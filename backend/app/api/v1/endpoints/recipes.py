@@ -4,10 +4,12 @@ Full CRUD with recursive composition logic
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session, joinedload
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 import math
 
 from app.core.database import get_db
+from app.core.pagination import paginate
 from app.models.recipe import Recipe, RecipeItem
 from app.schemas.recipe import (
     RecipeCreate, 
@@ -17,6 +19,9 @@ from app.schemas.recipe import (
     RecipeItemUpdate
 )
 from app.services.recipe_service import RecipeService
+from app.services.cost_cache_service import RecipeCostCacheService
+from app.services.historical_cost_service import HistoricalCostService
+from app.services.recipe_graph_service import RecipeGraphService
 
 router = APIRouter()
 
@@ -26,10 +31,12 @@ def list_recipes(
     limit: int = Query(20, ge=1, le=100),
     type: str = Query(None),
     search: str = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (replaces skip)"),
+    include_total: Optional[bool] = Query(None, description="Count all matches (default: only without cursor)"),
     db: Session = Depends(get_db)
 ):
     """
-    List all recipes with pagination
+    List all recipes with pagination (page offset or keyset cursor), by name
     """
     query = db.query(Recipe)
     
@@ -39,20 +46,25 @@ def list_recipes(
     if search:
         query = query.filter(Recipe.name.ilike(f"%{search}%"))
         
-    total = query.count()
-    recipes = query.offset(skip).limit(limit).all()
+    page = paginate(query, Recipe.name, Recipe.id, limit, sort="name", cursor=cursor, skip=skip, include_total=include_total)
+    recipes = page["items"]
+    total = page["total"]
+    
+    # One indexed lookup on the cost cache for the whole page
+    costs = RecipeCostCacheService.get_costs(db, [r.id for r in recipes])
     
     # Manual serialization to avoid circular issues and optimize
     items = []
     for r in recipes:
+        cost = costs.get(r.id, {})
         items.append({
             "id": r.id,
             "name": r.name,
             "recipe_type": r.recipe_type,
             "yield_quantity": r.yield_quantity,
-            "total_cost": r.total_cost,
-            "cost_per_portion": r.cost_per_portion,
-            "suggested_price": r.suggested_price,
+            "total_cost": cost.get("total_cost", 0.0),
+            "cost_per_portion": cost.get("cost_per_portion", 0.0),
+            "suggested_price": cost.get("suggested_price", 0.0),
             "target_margin": r.target_margin,
             "tags": [{"id": t.id, "name": t.name, "category": t.category, "description": t.description} for t in r.tags]
         })
@@ -61,10 +73,20 @@ def list_recipes(
         "items": items,
         "total": total,
         "page": skip // limit + 1 if limit > 0 else 1,
-        "pages": math.ceil(total / limit) if total > 0 and limit > 0 else 0
+        "pages": (math.ceil(total / limit) if total > 0 and limit > 0 else 0) if total is not None else None,
+        "next_cursor": page["next_cursor"],
+        "has_more": page["has_more"]
     }
 
 
+@router.get("/cost-cache/consistency")
+def check_cost_cache_consistency(db: Session = Depends(get_db)):
+    """
+    Compare the materialized recipe cost cache against a full recompute
+    """
+    return RecipeCostCacheService.check_consistency(db)
+
+
 @router.get("/{recipe_id}/scale")
 def scale_recipe(
     recipe_id: int, 
@@ -77,6 +99,41 @@ def scale_recipe(
     """
     return RecipeService.scale_recipe(db, recipe_id, target_quantity)
 
+@router.get("/{recipe_id}/cost-as-of")
+def get_recipe_cost_as_of(
+    recipe_id: int,
+    at: datetime = Query(..., description="Instant to cost at (ISO 8601)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Recipe cost with ingredient prices as they were at the given instant
+    (reconstructed from the price history)
+    """
+    return HistoricalCostService.get_recipe_cost_as_of(db, recipe_id, at)
+
+@router.get("/{recipe_id}/sub-recipes")
+def list_sub_recipes(recipe_id: int, db: Session = Depends(get_db)):
+    """
+    All sub-recipes used by a recipe, at any depth (from recipe_closure)
+    """
+    depths = RecipeGraphService.get_descendants(db, recipe_id)
+    recipes = db.query(Recipe.id, Recipe.name, Recipe.recipe_type).filter(Recipe.id.in_(list(depths))).all()
+    return [
+        {"id": r.id, "name": r.name, "recipe_type": r.recipe_type, "depth": depths[r.id]}
+        for r in sorted(recipes, key=lambda r: (depths[r.id], r.name))
+    ]
+
+
+@router.get("/{recipe_id}/used-in")
+def list_recipes_using(recipe_id: int, db: Session = Depends(get_db)):
+    """
+    All recipes/dishes that use this recipe, at any depth (from recipe_closure)
+    """
+    ancestor_ids = RecipeGraphService.get_ancestors(db, [recipe_id])
+    recipes = db.query(Recipe.id, Recipe.name, Recipe.recipe_type).filter(Recipe.id.in_(list(ancestor_ids))).all()
+    return [{"id": r.id, "name": r.name, "recipe_type": r.recipe_type} for r in sorted(recipes, key=lambda r: r.name)]
+
+
 @router.post("/", response_model=RecipeResponse, status_code=201)
 def create_recipe(
     recipe: RecipeCreate,
@@ -100,6 +157,7 @@ def create_recipe(
     db.add(db_recipe)
     db.commit()
     db.refresh(db_recipe)
+    RecipeGraphService.add_recipe(db, db_recipe.id)
     
     # 2. Create Items if provided
     if recipe.items:
@@ -114,8 +172,14 @@ def create_recipe(
                 is_scalable=item.is_scalable
             )
             db.add(db_item)
+            if item.child_recipe_id:
+                RecipeGraphService.add_edge(db, db_recipe.id, item.child_recipe_id)
         db.commit()
         db.refresh(db_recipe)
+    
+    RecipeCostCacheService.invalidate_recipes(db, [db_recipe.id])
+    db.commit()
+    db.refresh(db_recipe)
         
     return db_recipe
 
@@ -124,26 +188,34 @@ def get_recipe(recipe_id: int, db: Session = Depends(get_db)):
     """
     Get full recipe details with items and calculated costs
     """
-    # Use joinedload to fetch items and their relations efficiently
-    recipe = db.query(Recipe).options(
-        joinedload(Recipe.items).joinedload(RecipeItem.ingredient),
-        joinedload(Recipe.items).joinedload(RecipeItem.child_recipe),
-        joinedload(Recipe.items).joinedload(RecipeItem.unit)
-    ).filter(Recipe.id == recipe_id).first()
+    # Whole sub-recipe tree (items, ingredients, units) in one recursive query
+    recipe = RecipeService.load_recipe_tree(db, recipe_id)
     
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
     
+    # Costs of this recipe and its direct sub-recipes come from the cache
+    costs = RecipeCostCacheService.get_costs(
+        db, [recipe.id] + [item.child_recipe_id for item in recipe.items if item.child_recipe_id]
+    )
+    cost = costs.get(recipe.id, {})
+    
     # Transform items for response
     response_items = []
     for item in recipe.items:
+        if item.ingredient:
+            item_cost = item.ingredient.real_cost_per_usage_unit * item.quantity
+        elif item.child_recipe_id in costs:
+            item_cost = costs[item.child_recipe_id]["cost_per_portion"] * item.quantity
+        else:
+            item_cost = 0.0
         response_item = {
             "id": item.id,
             "quantity": item.quantity,
             "unit_id": item.unit_id,
             "notes": item.notes,
             "is_scalable": item.is_scalable,
-            "item_cost": item.item_cost,
+            "item_cost": item_cost,
             "ingredient": item.ingredient,
             "child_recipe_id": item.child_recipe_id,
             "child_recipe_name": item.child_recipe.name if item.child_recipe else None
@@ -164,9 +236,9 @@ def get_recipe(recipe_id: int, db: Session = Depends(get_db)):
         "shelf_life_hours": recipe.shelf_life_hours,
         "created_at": recipe.created_at,
         "updated_at": recipe.updated_at,
-        "total_cost": recipe.total_cost,
-        "cost_per_portion": recipe.cost_per_portion,
-        "suggested_price": recipe.suggested_price,
+        "total_cost": cost.get("total_cost", 0.0),
+        "cost_per_portion": cost.get("cost_per_portion", 0.0),
+        "suggested_price": cost.get("suggested_price", 0.0),
         "items": response_items,
         "tags": [{"id": t.id, "name": t.name, "category": t.category, "description": t.description} for t in recipe.tags]
     }
@@ -191,6 +263,8 @@ def update_recipe(
     for key, value in update_data.items():
         setattr(recipe, key, value)
     
+    # Yield and margin feed cost_per_portion / suggested_price
+    RecipeCostCacheService.invalidate_recipes(db, [recipe.id])
     db.commit()
     db.refresh(recipe)
     return recipe
@@ -209,11 +283,16 @@ def delete_recipe(
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
     
+    # Recipes using this one as a sub-recipe need their cached cost refreshed
+    parent_ids = RecipeCostCacheService.get_dependents(db, [recipe_id])
+    
     # Delete all items first (cascade should handle this, but being explicit)
     db.query(RecipeItem).filter(RecipeItem.parent_recipe_id == recipe_id).delete()
     
     # Delete recipe
     db.delete(recipe)
+    RecipeGraphService.remove_recipe(db, recipe_id)
+    RecipeCostCacheService.remove_recipe(db, recipe_id, parent_ids)
     db.commit()
     
     return None
@@ -236,6 +315,13 @@ def add_recipe_item(
     # Validate it's not self-referential
     if item.child_recipe_id == recipe_id:
         raise HTTPException(status_code=400, detail="Cannot add recipe to itself")
+    
+    # Validate it doesn't close a cycle (A -> B -> A) via the closure table
+    if item.child_recipe_id and RecipeGraphService.would_create_cycle(db, recipe_id, item.child_recipe_id):
+        raise HTTPException(
+            status_code=400,
+            detail="Cannot add this sub-recipe: it already uses this recipe (circular reference)"
+        )
         
     # Validate either ingredient OR child_recipe (XOR logic)
     if not (item.ingredient_id or item.child_recipe_id):
@@ -254,10 +340,13 @@ def add_recipe_item(
     )
     
     db.add(db_item)
+    if item.child_recipe_id:
+        RecipeGraphService.add_edge(db, recipe_id, item.child_recipe_id)
+    RecipeCostCacheService.invalidate_recipes(db, [recipe_id])
     db.commit()
-    db.refresh(recipe)
     
-    return {"message": "Item added successfully", "new_total_cost": recipe.total_cost}
+    new_cost = RecipeCostCacheService.get_costs(db, [recipe_id])[recipe_id]
+    return {"message": "Item added successfully", "new_total_cost": new_cost["total_cost"]}
 
 @router.delete("/{recipe_id}/items/{item_id}", status_code=204)
 def remove_recipe_item(
@@ -277,6 +366,9 @@ def remove_recipe_item(
         raise HTTPException(status_code=404, detail="Item not found")
         
     db.delete(item)
+    if item.child_recipe_id:
+        RecipeGraphService.remove_edge(db, recipe_id)
+    RecipeCostCacheService.invalidate_recipes(db, [recipe_id])
     db.commit()
     
     return None
@@ -311,12 +403,15 @@ def update_recipe_item(
     for key, value in update_data.items():
         setattr(item, key, value)
     
+    # RecipeItemUpdate can't re-point an item to another sub-recipe,
+    # so recipe_closure is unaffected; only costs need refreshing
+    RecipeCostCacheService.invalidate_recipes(db, [recipe_id])
     db.commit()
-    db.refresh(recipe)  # Refresh to recalculate costs
     
+    new_cost = RecipeCostCacheService.get_costs(db, [recipe_id])[recipe_id]
     return {
         "message": "Item updated successfully",
-        "new_total_cost": recipe.total_cost
+        "new_total_cost": new_cost["total_cost"]
     }
 
 
@@ -1,7 +1,12 @@
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
+from typing import Literal, Optional
 from app.core.database import get_db
+from app.models.event import EventStatus
+from app.schemas.simulation import ScenarioBatchRequest, MarginAtRiskRequest
 from app.services.simulation_service import SimulationService
+from app.services.monte_carlo_service import MonteCarloService
 
 router = APIRouter()
 
@@ -16,3 +21,54 @@ def simulate_inflation(
     Does NOT modify database.
     """
     return SimulationService.simulate_inflation(db, category, percentage)
+
+@router.post("/scenarios")
+def simulate_scenarios(
+    batch: ScenarioBatchRequest,
+    format: Literal["json", "csv"] = Query("json", description="'csv' downloads the impact matrix"),
+    db: Session = Depends(get_db)
+):
+    """
+    Run several price-shock scenarios (by category and/or ingredient) at once.
+    Returns per-scenario summaries and a recipe x scenario impact matrix.
+    Does NOT modify database.
+    """
+    result = SimulationService.simulate_scenarios(db, [s.model_dump() for s in batch.scenarios])
+    if format == "csv":
+        return Response(
+            content=SimulationService.scenarios_to_csv(result),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="price_scenarios.csv"'}
+        )
+    return result
+
+@router.get("/monte-carlo")
+def simulate_cost_risk(
+    horizon_days: int = Query(90, ge=1, le=730, description="Days ahead to project prices"),
+    draws: int = Query(10000, ge=100, le=100000, description="Number of sampled price scenarios"),
+    mode: Literal["ingredient", "category"] = Query("ingredient", description="Volatility per ingredient or pooled per category"),
+    workers: int = Query(1, ge=1, le=16, description="Processes to spread the draws across"),
+    seed: Optional[int] = Query(None, description="Random seed for reproducible runs"),
+    db: Session = Depends(get_db)
+):
+    """
+    Monte Carlo cost risk from the ingredient price history:
+    P50/P90/P99 cost per portion for every recipe and cost per confirmed
+    event over the horizon. Does NOT modify database.
+    """
+    return MonteCarloService.run_simulation(db, horizon_days, draws, mode, workers, seed)
+
+@router.post("/margin-at-risk")
+def simulate_margin_at_risk(
+    scope: MarginAtRiskRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Re-cost all orders of events in a date range (current or shocked prices)
+    against their frozen prices, ranked by margin erosion.
+    Does NOT modify database.
+    """
+    return SimulationService.simulate_margin_at_risk(
+        db, scope.start_date, scope.end_date, [EventStatus(s) for s in scope.statuses],
+        scope.category_shocks, scope.ingredient_shocks
+    )
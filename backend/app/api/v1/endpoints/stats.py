@@ -1,12 +1,12 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, extract
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from datetime import date, timedelta
+from typing import List, Literal, Optional
 
 from app.core.database import get_db
-from app.models.event import Event, EventStatus
-from app.models.recipe import Recipe
-from app.models.ingredient import Ingredient
+from app.models.event import EventStatus
+from app.services.analytics_service import AnalyticsService
+from app.services.dashboard_service import DashboardRollupService
 
 
 router = APIRouter()
@@ -15,55 +15,49 @@ router = APIRouter()
 def get_dashboard_stats(db: Session = Depends(get_db)):
     """
     Get aggregated stats for the dashboard
+    Served from the current month's dashboard_rollup row (one primary-key
+    read); rollup_updated_at tells how fresh the figures are.
     """
-    current_date = datetime.now()
-    
-    # 1. Events Stats
-    events_count = db.query(Event).filter(
-        extract('month', Event.event_date) == current_date.month,
-        extract('year', Event.event_date) == current_date.year
-    ).count()
-    
-    # 2. Revenue (Optimized with eager loading)
-    confirmed_events_month = db.query(Event).options(joinedload(Event.orders)).filter(
-        Event.status == EventStatus.CONFIRMED,
-        extract('month', Event.event_date) == current_date.month,
-        extract('year', Event.event_date) == current_date.year
-    ).all()
-    
-    estimated_revenue = sum(ev.total_revenue for ev in confirmed_events_month)
-    
-    # 3. Recipes Stats
-    active_recipes = db.query(Recipe).count()
-    
-    # PERFORMANCE OPTIMIZATION: 
-    # Calculating average cost requires recursive queries for ALL recipes.
-    # Disabling for now to prevent dashboard lag.
-    # all_recipes = db.query(Recipe).all()
-    # avg_recipe_cost = ...
-    avg_recipe_cost = 0 
-    profitable_recipes = 0
-
-    # 4. Ingredients Stats
-    total_ingredients = db.query(Ingredient).count()
-    
-    # Inventory Value (Sum of stock * cost)
-    # Ingredient.stock_quantity * Ingredient.current_cost
-    inventory_value = db.query(
-        func.sum(Ingredient.stock_quantity * Ingredient.current_cost)
-    ).scalar() or 0.0
-    
-    low_stock_count = db.query(Ingredient).filter(
-        Ingredient.stock_quantity <= Ingredient.min_stock_threshold
-    ).count()
+    rollup = DashboardRollupService.get_month(db)
 
     return {
-        "events_month": events_count,
-        "revenue_month": estimated_revenue,
-        "active_recipes": active_recipes,
-        "avg_recipe_cost": avg_recipe_cost,
-        "profitable_recipes": profitable_recipes,
-        "total_ingredients": total_ingredients,
-        "inventory_value": inventory_value,
-        "low_stock_count": low_stock_count
+        "events_month": rollup.events_count,
+        "revenue_month": rollup.revenue,
+        "cost_month": rollup.cost,
+        "margin_month": rollup.margin,
+        "active_recipes": rollup.active_recipes,
+        "avg_recipe_cost": rollup.avg_recipe_cost,
+        "profitable_recipes": rollup.profitable_recipes,
+        "total_ingredients": rollup.total_ingredients,
+        "inventory_value": rollup.inventory_value,
+        "low_stock_count": rollup.low_stock_count,
+        "period": rollup.period,
+        "rollup_updated_at": min(rollup.events_updated_at, rollup.catalog_updated_at),
     }
+
+
+@router.get("/timeseries")
+def get_timeseries(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    granularity: Literal["day", "week", "month"] = Query("month", description="Bucket size"),
+    status: Optional[List[EventStatus]] = Query(None, description="Event statuses to include (default: all)"),
+    event_type: Optional[str] = Query(None),
+    service_type: Optional[str] = Query(None),
+    fill_gaps: bool = Query(True, description="Return empty periods as zeros"),
+    db: Session = Depends(get_db)
+):
+    """
+    Revenue, cost, margin, event count and guest count per day, week or month.
+    Defaults to the last 12 months.
+    """
+    if not end_date:
+        end_date = date.today()
+    if not start_date:
+        start_date = end_date - timedelta(days=365)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+
+    return AnalyticsService.get_timeseries(
+        db, start_date, end_date, granularity, status, event_type, service_type, fill_gaps
+    )
@@ -1,25 +1,34 @@
 """
 Suppliers API endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.core.database import get_db
+from app.core.pagination import paginate
 from app.models.supplier import Supplier
 from app.schemas.supplier import SupplierCreate, SupplierUpdate, SupplierResponse
+from app.services.supplier_import_service import BATCH_SIZE, SupplierImportService
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[SupplierResponse])
 def list_suppliers(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     search: str = Query(None),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page (replaces skip)"),
+    include_total: bool = Query(False, description="Return the match count in X-Total-Count"),
     db: Session = Depends(get_db)
 ):
-    """List all suppliers"""
+    """
+    List all suppliers by name (page offset or keyset cursor).
+    The body stays a plain list: the next page's cursor is sent in the
+    X-Next-Cursor header and the optional count in X-Total-Count.
+    """
     query = db.query(Supplier)
     
     if search:
@@ -28,8 +37,12 @@ def list_suppliers(
             Supplier.contact_name.ilike(f"%{search}%")
         )
         
-    suppliers = query.offset(skip).limit(limit).all()
-    return suppliers
+    page = paginate(query, Supplier.name, Supplier.id, limit, sort="name", cursor=cursor, skip=skip, include_total=include_total)
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    if page["total"] is not None:
+        response.headers["X-Total-Count"] = str(page["total"])
+    return page["items"]
 
 
 @router.post("/", response_model=SupplierResponse, status_code=201)
@@ -57,6 +70,26 @@ def get_supplier(
     return supplier
 
 
+@router.post("/{supplier_id}/price-list")
+def import_price_list(
+    supplier_id: int,
+    file: UploadFile = File(..., description="CSV or XLSX with sku/supplier_sku and price columns"),
+    sheet: Optional[str] = Query(None, description="XLSX sheet name (default: first sheet)"),
+    update_costs: bool = Query(True, description="Also set current_cost of matched ingredients whose default supplier this is"),
+    dry_run: bool = Query(False, description="Validate and report without writing"),
+    batch_size: int = Query(BATCH_SIZE, ge=1, le=10000),
+    db: Session = Depends(get_db)
+):
+    """
+    Import a supplier price list, streamed row by row and upserted in batches.
+    Returns counts plus a per-row error report.
+    """
+    rows = SupplierImportService.iter_rows(file.file, file.filename, sheet=sheet)
+    return SupplierImportService.import_price_list(
+        db, supplier_id, rows, update_costs=update_costs, dry_run=dry_run, batch_size=batch_size
+    )
+
+
 @router.put("/{supplier_id}", response_model=SupplierResponse)
 def update_supplier(
     supplier_id: int,
@@ -0,0 +1,105 @@
+"""
+Keyset (cursor) pagination
+Pages are fetched with WHERE (sort_key, id) > (last_sort_key, last_id)
+instead of OFFSET, so deep pages cost the same as the first one.
+
+The cursor is an opaque url-safe token holding the last row's sort key and
+id (plus the sort name, so a cursor cannot be replayed under another sort).
+Offset pagination (skip) stays available for the page-number UI, and the
+total count is only run when requested.
+"""
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+import base64
+import binascii
+import json
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if hasattr(value, "value"):  # Enum
+        return value.value
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+    return value
+
+
+def encode_cursor(sort: str, sort_value: Any, row_id: int) -> str:
+    """Opaque cursor for the row (sort_value, row_id) under the named sort"""
+    payload = json.dumps({"s": sort, "k": _encode_value(sort_value), "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Dict[str, Any]:
+    """Cursor -> {"k": sort value, "id": row id}; 400 if malformed or for another sort"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["s"] != sort:
+            raise ValueError("cursor belongs to another sort order")
+        return {"k": _decode_value(payload["k"]), "id": int(payload["id"])}
+    except (ValueError, KeyError, TypeError, binascii.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+
+def paginate(
+    query: Query,
+    sort_key,
+    id_column,
+    limit: int,
+    sort: str = "default",
+    descending: bool = False,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    include_total: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    One page of an entity query ordered by the stable pair (sort_key, id).
+
+    With a cursor the page starts right after it (skip is ignored);
+    otherwise skip is used as a plain offset. sort_key must not be NULL
+    (wrap nullable columns in coalesce()).
+
+    include_total defaults to True in offset mode (page-number UIs) and
+    False in cursor mode.
+
+    Returns {"items", "next_cursor", "has_more", "total" (None when not counted)}.
+    """
+    if include_total is None:
+        include_total = cursor is None
+    total = query.order_by(None).count() if include_total else None
+
+    if cursor:
+        after = decode_cursor(cursor, sort)
+        if descending:
+            query = query.filter(or_(sort_key < after["k"], and_(sort_key == after["k"], id_column < after["id"])))
+        else:
+            query = query.filter(or_(sort_key > after["k"], and_(sort_key == after["k"], id_column > after["id"])))
+    elif skip:
+        query = query.offset(skip)
+
+    order = (sort_key.desc(), id_column.desc()) if descending else (sort_key.asc(), id_column.asc())
+    rows = query.add_columns(sort_key, id_column).order_by(None).order_by(*order).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    last = rows[-1] if rows else None
+    return {
+        "items": [row[0] for row in rows],
+        "next_cursor": encode_cursor(sort, last[-2], last[-1]) if has_more else None,
+        "has_more": has_more,
+        "total": total,
+    }
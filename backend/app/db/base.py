@@ -4,34 +4,40 @@ Import all models here for Alembic to detect them
 """
 from app.core.database import Base
 from app.models.associations import recipe_tags  # Import association tables first
-from app.models.ingredient import Ingredient, IngredientPriceHistory
-from app.models.recipe import Recipe, RecipeItem
+from app.models.ingredient import Ingredient, IngredientPriceHistory, IngredientPriceDaily
+from app.models.recipe import Recipe, RecipeItem, RecipeCostCache, RecipeClosure
 from app.models.unit import Unit, UnitCategory
 from app.models.supplier import Supplier, SupplierProduct
-from app.models.event import Event, EventOrder
+from app.models.event import Event, EventOrder, EventOrderCostAudit
 from app.models.proposal import Proposal
 from app.models.asset import Asset
 from app.models.event_asset import EventAsset
 from app.models.user import User
 from app.models.i18n import Translation
 from app.models.tag import Tag
+from app.models.stats import DashboardRollup
 
 __all__ = [
     "Base",
     "Ingredient",
     "IngredientPriceHistory",
+    "IngredientPriceDaily",
     "Recipe",
     "RecipeItem",
+    "RecipeCostCache",
+    "RecipeClosure",
     "Unit",
     "UnitCategory",
     "Supplier",
     "SupplierProduct",
     "Event",
     "EventOrder",
+    "EventOrderCostAudit",
     "Proposal",
     "Asset",
     "EventAsset",
     "User",
     "Translation",
-    "Tag"
+    "Tag",
+    "DashboardRollup"
 ]
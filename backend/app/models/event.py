@@ -2,7 +2,7 @@
 Event and Event Order models
 Core sales object for catering events
 """
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Text, Enum, JSON
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Text, Enum, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -76,6 +76,11 @@ class Event(Base):
     deposit_amount = Column(Float, default=0.0)
     deposit_paid = Column(Integer, default=0)  # Boolean as Integer
     
+    # Sum of quantity x cost_at_sale / unit_price_frozen over the orders.
+    # Maintained on every EventOrder write (EventService hooks on SessionLocal).
+    orders_total_cost = Column(Float, default=0.0, nullable=False)
+    orders_total_revenue = Column(Float, default=0.0, nullable=False)
+    
     # Special requirements
     special_requirements = Column(Text)
     dietary_restrictions = Column(Text)
@@ -92,22 +97,28 @@ class Event(Base):
     orders = relationship("EventOrder", back_populates="event", cascade="all, delete-orphan")
     proposals = relationship("Proposal", back_populates="event", cascade="all, delete-orphan")
     
+    # Date-range analytics filtered by status (stats timeseries, dashboard)
+    __table_args__ = (
+        Index("ix_events_status_date", "status", "event_date"),
+    )
+    
     @property
     def total_cost(self) -> float:
-        """Calculate total cost from all orders"""
-        return sum(order.total_cost for order in self.orders)
+        """Total cost of all orders (stored, see orders_total_cost)"""
+        return self.orders_total_cost or 0.0
     
     @property
     def total_revenue(self) -> float:
-        """Calculate total revenue from all orders"""
-        return sum(order.total_price for order in self.orders)
+        """Total revenue of all orders (stored, see orders_total_revenue)"""
+        return self.orders_total_revenue or 0.0
     
     @property
     def margin(self) -> float:
         """Calculate profit margin"""
-        if self.total_revenue == 0:
+        revenue = self.total_revenue
+        if revenue == 0:
             return 0.0
-        return (self.total_revenue - self.total_cost) / self.total_revenue
+        return (revenue - self.total_cost) / revenue
 
 
 class EventOrder(Base):
@@ -131,10 +142,18 @@ class EventOrder(Base):
     # Notes
     notes = Column(String(500))
     
+    # When cost_at_sale was frozen (point-in-time cost audits)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
     # Relationships
     event = relationship("Event", back_populates="orders")
     recipe = relationship("Recipe")
     
+    # Covers per-event order totals without touching the table
+    __table_args__ = (
+        Index("ix_event_orders_event_totals", "event_id", "quantity", "unit_price_frozen", "cost_at_sale"),
+    )
+    
     @property
     def total_price(self) -> float:
         """Total price for this line item"""
@@ -151,3 +170,22 @@ class EventOrder(Base):
         if self.total_price == 0:
             return 0.0
         return (self.total_price - self.total_cost) / self.total_price
+
+
+class EventOrderCostAudit(Base):
+    """
+    Log of cost_at_sale changes made by re-costing
+    One row per changed order, tagged with the job that changed it
+    """
+    __tablename__ = "event_order_cost_audit"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, ForeignKey("event_orders.id", ondelete="CASCADE"), nullable=False, index=True)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False, index=True)
+    recipe_id = Column(Integer, ForeignKey("recipes.id"), nullable=False)
+    
+    old_cost = Column(Float, nullable=False)
+    new_cost = Column(Float, nullable=False)
+    
+    job_id = Column(String(36), index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
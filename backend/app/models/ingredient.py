@@ -1,7 +1,7 @@
 """
 Ingredient model with Yield Factor for cost calculation
 """
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -102,7 +102,36 @@ class IngredientPriceHistory(Base):
     # Optional: who made the change (if we had auth)
     changed_by = Column(String(100), nullable=True)
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     
     # Relationship
     ingredient = relationship("Ingredient")
+    
+    # Per-ingredient series over a time range
+    __table_args__ = (
+        Index("ix_ingredient_price_history_ingredient_created", "ingredient_id", "created_at"),
+    )
+
+
+class IngredientPriceDaily(Base):
+    """
+    Daily rollup of ingredient_price_history (one row per ingredient and day
+    with at least one change), read by the price history series instead of
+    the raw log. Maintained by PriceHistoryService.refresh_daily().
+    """
+    __tablename__ = "ingredient_price_daily"
+    
+    ingredient_id = Column(Integer, ForeignKey("ingredients.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    
+    min_cost = Column(Float, nullable=False)
+    max_cost = Column(Float, nullable=False)
+    sum_cost = Column(Float, nullable=False)
+    changes = Column(Integer, nullable=False)
+    # Price after the day's last change (history row last_history_id)
+    close_cost = Column(Float)
+    last_history_id = Column(Integer, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_ingredient_price_daily_day", "day"),
+    )
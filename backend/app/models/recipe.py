@@ -2,7 +2,7 @@
 Recipe models with recursive composition support
 Supports both final dishes and sub-recipes (mise en place)
 """
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text, Enum, Boolean
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text, Enum, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -152,3 +152,39 @@ class RecipeItem(Base):
             # Cost from sub-recipe
             return self.child_recipe.cost_per_portion * self.quantity
         return 0.0
+
+
+class RecipeCostCache(Base):
+    """
+    Materialized recipe costs
+    One row per recipe, refreshed whenever an ingredient price or a recipe
+    item changes (for the recipe and every recipe that uses it)
+    """
+    __tablename__ = "recipe_cost_cache"
+    
+    recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE"), primary_key=True)
+    
+    total_cost = Column(Float, nullable=False, default=0.0)
+    cost_per_portion = Column(Float, nullable=False, default=0.0)
+    suggested_price = Column(Float, nullable=False, default=0.0)
+    
+    # When the row was last recomputed and how many times it has been
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+    input_version = Column(Integer, default=1, nullable=False)
+
+
+class RecipeClosure(Base):
+    """
+    Transitive closure of the sub-recipe DAG
+    One row per (ancestor, descendant) pair, including (recipe, recipe, 0).
+    depth is the length of the shortest path from ancestor to descendant.
+    """
+    __tablename__ = "recipe_closure"
+    
+    ancestor_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE"), primary_key=True)
+    depth = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index("ix_recipe_closure_descendant_ancestor", "descendant_id", "ancestor_id"),
+    )
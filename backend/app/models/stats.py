@@ -0,0 +1,36 @@
+"""
+Dashboard rollup model
+Materialized per-month figures behind GET /stats/dashboard
+"""
+from sqlalchemy import Column, Integer, Float, Date, DateTime
+from app.core.database import Base
+
+
+class DashboardRollup(Base):
+    """
+    One row per calendar month (period = first day of the month).
+
+    Event figures cover the events dated in that month (revenue/cost from
+    confirmed events, as on the dashboard). Catalog figures are a snapshot
+    taken whenever ingredients or recipe costs change during that month.
+    """
+    __tablename__ = "dashboard_rollup"
+
+    period = Column(Date, primary_key=True)
+
+    # Events dated in the month
+    events_count = Column(Integer, nullable=False, default=0)
+    confirmed_events_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+    cost = Column(Float, nullable=False, default=0.0)
+    margin = Column(Float, nullable=False, default=0.0)
+    events_updated_at = Column(DateTime(timezone=True))
+
+    # Catalog snapshot
+    active_recipes = Column(Integer)
+    avg_recipe_cost = Column(Float)
+    profitable_recipes = Column(Integer)
+    total_ingredients = Column(Integer)
+    inventory_value = Column(Float)
+    low_stock_count = Column(Integer)
+    catalog_updated_at = Column(DateTime(timezone=True))
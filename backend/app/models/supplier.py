@@ -2,7 +2,7 @@
 Supplier and Supplier Product models
 Supports multi-currency and price comparison
 """
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -87,3 +87,10 @@ class SupplierProduct(Base):
     supplier = relationship("Supplier", back_populates="products")
     ingredient = relationship("Ingredient", back_populates="supplier_products")
     package_unit = relationship("Unit")
+    
+    # Price lookups for a set of ingredients (purchase optimizer);
+    # one product per supplier SKU (price list import upserts on it)
+    __table_args__ = (
+        Index("ix_supplier_products_ingredient_available", "ingredient_id", "is_available"),
+        Index("uq_supplier_products_supplier_sku", "supplier_id", "supplier_sku", unique=True),
+    )
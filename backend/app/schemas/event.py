@@ -0,0 +1,36 @@
+"""
+Pydantic schemas for event menus and re-costing
+"""
+from pydantic import BaseModel, Field, model_validator
+from datetime import date
+from typing import List, Literal, Optional
+
+
+class EventMenuItem(BaseModel):
+    """One dish of a menu"""
+    recipe_id: int
+    quantity: float = Field(..., gt=0, description="Portions")
+    unit_price: Optional[float] = Field(None, ge=0, description="Price per portion; defaults to the recipe's suggested price")
+    notes: Optional[str] = Field(None, max_length=500)
+
+
+class EventMenuRequest(BaseModel):
+    """A whole menu added to an event in one transaction"""
+    items: List[EventMenuItem] = Field(..., min_length=1, max_length=500)
+
+
+class EventRecostRequest(BaseModel):
+    """Events whose order costs are refreshed from current recipe costs"""
+    start_date: date
+    end_date: date
+    statuses: List[Literal["prospect", "quoted", "confirmed", "in_progress", "completed", "cancelled"]] = Field(
+        default_factory=lambda: ["prospect", "quoted", "confirmed"], min_length=1
+    )
+    dry_run: bool = Field(False, description="Report the changes without writing them")
+    background: bool = Field(False, description="Run as a background job and poll its status")
+
+    @model_validator(mode='after')
+    def validate_range(self) -> 'EventRecostRequest':
+        if self.start_date > self.end_date:
+            raise ValueError('start_date must be before end_date')
+        return self
@@ -143,10 +143,12 @@ class IngredientResponse(IngredientBase):
 class IngredientList(BaseModel):
     """Schema for paginated ingredient list"""
     items: list[IngredientResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+    has_more: bool = False
 
 
 class IngredientBulkUpdate(BaseModel):
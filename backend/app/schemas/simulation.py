@@ -0,0 +1,44 @@
+"""
+Pydantic schemas for price-shock simulations
+"""
+from pydantic import BaseModel, Field, field_validator, model_validator
+from datetime import date
+from typing import Dict, List, Literal
+
+
+class PriceScenario(BaseModel):
+    """One what-if scenario: percentage shocks by category and/or ingredient"""
+    name: str = Field(..., min_length=1, max_length=100, description="Scenario label (used as CSV column)")
+    category_shocks: Dict[str, float] = Field(default_factory=dict, description="Category -> % change (e.g. {'Meats': 15.0})")
+    ingredient_shocks: Dict[int, float] = Field(default_factory=dict, description="Ingredient id -> % change, overrides its category")
+
+
+class ScenarioBatchRequest(BaseModel):
+    """Several scenarios evaluated against the same cost structure"""
+    scenarios: List[PriceScenario] = Field(..., min_length=1, max_length=100)
+
+    @field_validator('scenarios')
+    @classmethod
+    def validate_unique_names(cls, v: List[PriceScenario]) -> List[PriceScenario]:
+        """Scenario names label the matrix columns, so they must be unique"""
+        names = [s.name for s in v]
+        if len(set(names)) != len(names):
+            raise ValueError('Scenario names must be unique')
+        return v
+
+
+class MarginAtRiskRequest(BaseModel):
+    """Events to re-cost and an optional price shock"""
+    start_date: date
+    end_date: date
+    statuses: List[Literal["prospect", "quoted", "confirmed", "in_progress", "completed", "cancelled"]] = Field(
+        default_factory=lambda: ["confirmed", "quoted"], min_length=1
+    )
+    category_shocks: Dict[str, float] = Field(default_factory=dict, description="Category -> % change")
+    ingredient_shocks: Dict[int, float] = Field(default_factory=dict, description="Ingredient id -> % change")
+
+    @model_validator(mode='after')
+    def validate_range(self) -> 'MarginAtRiskRequest':
+        if self.start_date > self.end_date:
+            raise ValueError('start_date must be before end_date')
+        return self
@@ -0,0 +1,132 @@
+"""
+Analytics Service
+Revenue, cost and margin trends bucketed by day, week or month.
+
+Everything is computed in SQL: the stored per-event order totals
+(orders_total_revenue / orders_total_cost) are grouped by the period
+bucket, so only one row per bucket comes back (no ORM objects). Bucketing uses the dialect's
+date functions (SQLite date() modifiers, PostgreSQL date_trunc());
+other databases group by day in SQL and roll days up in Python.
+
+Served by ix_events_status_date (migrate_stats_indexes.py). Margins are
+0-1 fractions, as everywhere else in the API.
+"""
+from sqlalchemy import Date, cast, func
+from sqlalchemy.orm import Session
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from app.models.event import Event, EventStatus
+
+def bucket_start(day: date, granularity: str) -> date:
+    """First day of the bucket containing day (weeks start on Monday)"""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start: date, granularity: str) -> date:
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return date(start.year + (start.month == 12), start.month % 12 + 1, 1)
+    return start + timedelta(days=1)
+
+
+class AnalyticsService:
+    @staticmethod
+    def bucket_expression(dialect: str, granularity: str, column=None):
+        """SQL expression for the bucket start of a date column (default Event.event_date), or None to bucket in Python"""
+        column = Event.event_date if column is None else column
+        if granularity == "day":
+            return column
+        if dialect == "sqlite":
+            if granularity == "week":
+                return func.date(column, "-6 days", "weekday 1")
+            return func.date(column, "start of month")
+        if dialect == "postgresql":
+            return cast(func.date_trunc(granularity, column), Date)
+        return None
+
+    @staticmethod
+    def get_timeseries(
+        db: Session,
+        start_date: date,
+        end_date: date,
+        granularity: str = "month",
+        statuses: Optional[List[EventStatus]] = None,
+        event_type: Optional[str] = None,
+        service_type: Optional[str] = None,
+        fill_gaps: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Revenue, cost, margin, event count and guest count per bucket for
+        events dated in [start_date, end_date], in a single statement.
+        Empty buckets are returned as zeros when fill_gaps.
+        """
+        filters = [Event.event_date >= start_date, Event.event_date <= end_date]
+        if statuses:
+            filters.append(Event.status.in_(statuses))
+        if event_type:
+            filters.append(Event.event_type == event_type)
+        if service_type:
+            filters.append(Event.service_type == service_type)
+
+        sql_bucket = AnalyticsService.bucket_expression(db.get_bind().dialect.name, granularity)
+        bucket = (sql_bucket if sql_bucket is not None else Event.event_date).label("bucket")
+        rows = db.query(
+            bucket,
+            func.count(Event.id).label("events"),
+            func.coalesce(func.sum(Event.guest_count), 0).label("guests"),
+            func.coalesce(func.sum(Event.orders_total_revenue), 0.0).label("revenue"),
+            func.coalesce(func.sum(Event.orders_total_cost), 0.0).label("cost"),
+        ).filter(*filters).group_by(bucket).order_by(bucket).all()
+
+        buckets: Dict[date, Dict[str, float]] = {}
+        for row in rows:
+            day = date.fromisoformat(row.bucket) if isinstance(row.bucket, str) else row.bucket
+            b = buckets.setdefault(bucket_start(day, granularity), {
+                "event_count": 0, "guest_count": 0, "revenue": 0.0, "cost": 0.0,
+            })
+            b["event_count"] += row.events
+            b["guest_count"] += row.guests
+            b["revenue"] += row.revenue
+            b["cost"] += row.cost
+
+        if fill_gaps:
+            period = bucket_start(start_date, granularity)
+            while period <= end_date:
+                buckets.setdefault(period, {"event_count": 0, "guest_count": 0, "revenue": 0.0, "cost": 0.0})
+                period = next_bucket(period, granularity)
+
+        series = []
+        for period in sorted(buckets):
+            b = buckets[period]
+            profit = b["revenue"] - b["cost"]
+            series.append({
+                "period": period,
+                "event_count": b["event_count"],
+                "guest_count": int(b["guest_count"]),
+                "revenue": round(b["revenue"], 2),
+                "cost": round(b["cost"], 2),
+                "profit": round(profit, 2),
+                "margin": round(profit / b["revenue"], 4) if b["revenue"] else 0.0,
+            })
+
+        revenue = sum(b["revenue"] for b in buckets.values())
+        cost = sum(b["cost"] for b in buckets.values())
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "granularity": granularity,
+            "series": series,
+            "totals": {
+                "event_count": sum(b["event_count"] for b in buckets.values()),
+                "guest_count": int(sum(b["guest_count"] for b in buckets.values())),
+                "revenue": round(revenue, 2),
+                "cost": round(cost, 2),
+                "margin": round((revenue - cost) / revenue, 4) if revenue else 0.0,
+            },
+        }
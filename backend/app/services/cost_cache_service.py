@@ -0,0 +1,250 @@
+"""
+Recipe Cost Cache Service
+Keeps the materialized recipe_cost_cache table in sync with its inputs.
+
+Reads are a single indexed lookup on recipe_cost_cache. When an input changes
+(ingredient price, recipe item, recipe yield/margin) only the affected recipe
+and its transitive parents (from recipe_closure) are recomputed, using the
+batch CostingService.
+
+The what-if simulations reuse one flattened copy of the whole catalog per
+process (get_catalog) for as long as recipe_cost_cache is unchanged.
+"""
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Set
+
+from app.core.logging_config import get_logger
+from app.models.recipe import Recipe, RecipeItem, RecipeCostCache
+from app.services.costing_service import CostingService
+from app.services.recipe_graph_service import RecipeGraphService
+
+logger = get_logger(__name__)
+
+COST_FIELDS = ("total_cost", "cost_per_portion", "suggested_price")
+
+# Flattened catalog for the simulations: {"key": fingerprint, "catalog": {...}}
+_catalog: Dict[str, Any] = {}
+
+
+class RecipeCostCacheService:
+    @staticmethod
+    def _as_dict(row: RecipeCostCache) -> Dict[str, float]:
+        """Cache row -> same dict shape as CostingService results"""
+        return {field: getattr(row, field) for field in COST_FIELDS}
+
+    @staticmethod
+    def get_costs(db: Session, recipe_ids: Iterable[int], commit: bool = True) -> Dict[int, Dict[str, float]]:
+        """
+        Read cached costs for the given recipes.
+        Missing rows are computed, stored and committed (lazy warm-up);
+        with commit=False they are only flushed into the caller's transaction.
+        """
+        recipe_ids = set(recipe_ids)
+        if not recipe_ids:
+            return {}
+
+        rows = db.query(RecipeCostCache).filter(RecipeCostCache.recipe_id.in_(recipe_ids)).all()
+        costs = {row.recipe_id: RecipeCostCacheService._as_dict(row) for row in rows}
+
+        missing = recipe_ids - costs.keys()
+        if missing:
+            costs.update(RecipeCostCacheService.refresh(db, missing))
+            if commit:
+                db.commit()
+
+        return costs
+
+    @staticmethod
+    def warm(db: Session, commit: bool = True) -> int:
+        """
+        Cost every recipe that has no cache row yet (as get_costs would).
+        Returns the number of recipes warmed.
+        """
+        missing = [
+            row.id for row in db.query(Recipe.id).outerjoin(
+                RecipeCostCache, RecipeCostCache.recipe_id == Recipe.id
+            ).filter(RecipeCostCache.recipe_id.is_(None))
+        ]
+        if missing:
+            RecipeCostCacheService.get_costs(db, missing, commit=commit)
+        return len(missing)
+
+    @staticmethod
+    def get_catalog(db: Session) -> Dict[str, Any]:
+        """
+        Whole-catalog costing data, costs and coefficient matrix columns:
+        {"data": load_costing_data, "costs": compute_costs_from_data,
+         "columns": ingredient_columns}. Shared between requests, do not mutate.
+
+        Rebuilt only when recipe_cost_cache changes: every refresh bumps
+        input_version and computed_at and deletes add or drop rows, so
+        (rows, sum(input_version), max(computed_at)) moves with any
+        invalidation, in any worker. The cache is warmed first so that
+        recipes without a row are part of the fingerprint.
+        """
+        RecipeCostCacheService.warm(db)
+        key = tuple(db.query(
+            func.count(RecipeCostCache.recipe_id),
+            func.coalesce(func.sum(RecipeCostCache.input_version), 0),
+            func.max(RecipeCostCache.computed_at),
+        ).one())
+
+        if _catalog.get("key") != key:
+            data = CostingService.load_costing_data(db)
+            _catalog["catalog"] = {
+                "data": data,
+                "costs": CostingService.compute_costs_from_data(data),
+                "columns": CostingService.ingredient_columns(CostingService.build_coefficient_matrix(data)),
+            }
+            _catalog["key"] = key
+            logger.info(f"Flattened catalog rebuilt ({len(data['recipes'])} recipes)")
+        return _catalog["catalog"]
+
+    @staticmethod
+    def refresh(db: Session, recipe_ids: Iterable[int]) -> Dict[int, Dict[str, float]]:
+        """
+        Recompute and upsert cache rows for exactly these recipes.
+        Does not commit; the caller owns the transaction.
+        """
+        recipe_ids = set(recipe_ids)
+        if not recipe_ids:
+            return {}
+
+        db.flush()
+        computed = CostingService.compute_costs(db, recipe_ids)
+        existing = {
+            row.recipe_id: row
+            for row in db.query(RecipeCostCache).filter(RecipeCostCache.recipe_id.in_(recipe_ids)).all()
+        }
+        now = datetime.utcnow()
+
+        result = {}
+        for recipe_id in recipe_ids:
+            cost = computed.get(recipe_id)
+            if cost is None:
+                # Deleted recipe (or part of a cycle): drop its row
+                if recipe_id in existing:
+                    db.delete(existing[recipe_id])
+                continue
+
+            row = existing.get(recipe_id)
+            if row is None:
+                row = RecipeCostCache(recipe_id=recipe_id, input_version=1)
+                db.add(row)
+            else:
+                row.input_version = (row.input_version or 0) + 1
+            row.total_cost = cost["total_cost"]
+            row.cost_per_portion = cost["cost_per_portion"]
+            row.suggested_price = cost["suggested_price"]
+            row.computed_at = now
+            result[recipe_id] = cost
+
+        db.flush()
+        return result
+
+    @staticmethod
+    def get_dependents(db: Session, recipe_ids: Iterable[int]) -> Set[int]:
+        """
+        All recipes that (transitively) use any of the given recipes,
+        excluding the given recipes themselves (one recipe_closure lookup).
+        """
+        return RecipeGraphService.get_ancestors(db, recipe_ids)
+
+    @staticmethod
+    def invalidate_recipes(db: Session, recipe_ids: Iterable[int]) -> Set[int]:
+        """
+        A recipe's own inputs changed: recompute it and every recipe above it.
+        Returns the set of refreshed recipe ids.
+        """
+        recipe_ids = set(recipe_ids)
+        if not recipe_ids:
+            return set()
+
+        db.flush()
+        affected = recipe_ids | RecipeCostCacheService.get_dependents(db, recipe_ids)
+        RecipeCostCacheService.refresh(db, affected)
+        return affected
+
+    @staticmethod
+    def invalidate_ingredients(db: Session, ingredient_ids: Iterable[int]) -> Set[int]:
+        """
+        Ingredient prices changed: recompute the recipes using them directly
+        and all their transitive parents.
+        """
+        ingredient_ids = list(set(ingredient_ids))
+        if not ingredient_ids:
+            return set()
+
+        db.flush()
+        direct_users = {
+            row.parent_recipe_id
+            for row in db.query(RecipeItem.parent_recipe_id).filter(
+                RecipeItem.ingredient_id.in_(ingredient_ids)
+            ).distinct()
+        }
+        return RecipeCostCacheService.invalidate_recipes(db, direct_users)
+
+    @staticmethod
+    def remove_recipe(db: Session, recipe_id: int, parent_ids: Iterable[int] = ()) -> None:
+        """
+        Drop a deleted recipe's row and refresh the recipes that used it.
+        parent_ids must be captured before the recipe's items are deleted.
+        """
+        db.query(RecipeCostCache).filter(RecipeCostCache.recipe_id == recipe_id).delete()
+        RecipeCostCacheService.invalidate_recipes(db, set(parent_ids) - {recipe_id})
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """
+        Recompute the whole cache from scratch. Returns number of rows written.
+        """
+        db.query(RecipeCostCache).delete()
+        db.flush()
+        computed = CostingService.compute_costs(db)
+        now = datetime.utcnow()
+        for recipe_id, cost in computed.items():
+            db.add(RecipeCostCache(recipe_id=recipe_id, computed_at=now, input_version=1, **cost))
+        db.commit()
+        return len(computed)
+
+    @staticmethod
+    def check_consistency(db: Session, tolerance: float = 1e-6) -> Dict[str, Any]:
+        """
+        Compare every cache row against a full recompute.
+        Reports stale rows (values differ), missing rows and orphan rows.
+        """
+        computed = CostingService.compute_costs(db)
+        cached = {row.recipe_id: row for row in db.query(RecipeCostCache).all()}
+
+        stale: List[Dict[str, Any]] = []
+        for recipe_id, cost in computed.items():
+            row = cached.get(recipe_id)
+            if row is None:
+                continue
+            for field in COST_FIELDS:
+                cached_value = getattr(row, field) or 0.0
+                if abs(cached_value - cost[field]) > tolerance * max(1.0, abs(cost[field])):
+                    stale.append({
+                        "recipe_id": recipe_id,
+                        "field": field,
+                        "cached": cached_value,
+                        "expected": cost[field],
+                        "computed_at": row.computed_at,
+                    })
+
+        missing = sorted(computed.keys() - cached.keys())
+        orphans = sorted(cached.keys() - computed.keys())
+
+        if stale or orphans:
+            logger.warning(f"Recipe cost cache inconsistent: {len(stale)} stale values, {len(orphans)} orphan rows")
+
+        return {
+            "consistent": not stale and not orphans,
+            "recipes_checked": len(computed),
+            "cached_rows": len(cached),
+            "stale": stale,
+            "missing": missing,
+            "orphans": orphans,
+        }
@@ -0,0 +1,283 @@
+"""
+Costing Service
+Batch recipe costing engine.
+
+Loads recipes, recipe items and ingredients with a handful of bulk queries,
+builds the sub-recipe DAG in memory and computes total_cost / cost_per_portion /
+suggested_price for every recipe in a single topological pass (children first).
+
+The numbers match the Recipe / RecipeItem / Ingredient model properties, but
+without lazy-loading relationships one SELECT at a time.
+"""
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.logging_config import get_logger
+from app.models.recipe import Recipe, RecipeItem
+from app.models.ingredient import Ingredient
+
+logger = get_logger(__name__)
+
+
+class CostingService:
+    @staticmethod
+    def load_costing_data(db: Session, recipe_ids: Optional[Iterable[int]] = None) -> Dict[str, Any]:
+        """
+        Bulk-load everything needed to cost recipes.
+
+        If recipe_ids is None the whole catalog is loaded (3 queries).
+        Otherwise the requested recipes and all their transitive sub-recipes
+        are loaded, one items query per level of depth.
+
+        Returns:
+            {
+                "recipes": {recipe_id: row(id, name, yield_quantity, target_margin, recipe_type)},
+                "items": {parent_recipe_id: [row(id, ingredient_id, child_recipe_id, quantity, unit_id)]},
+                "ingredients": {ingredient_id: row(id, current_cost, conversion_ratio, yield_factor)}
+            }
+        """
+        item_columns = (
+            RecipeItem.id,
+            RecipeItem.parent_recipe_id,
+            RecipeItem.ingredient_id,
+            RecipeItem.child_recipe_id,
+            RecipeItem.quantity,
+            RecipeItem.unit_id,
+        )
+        recipe_query = db.query(
+            Recipe.id,
+            Recipe.name,
+            Recipe.yield_quantity,
+            Recipe.target_margin,
+            Recipe.recipe_type,
+        )
+
+        items_by_parent: Dict[int, List] = {}
+
+        if recipe_ids is None:
+            recipe_rows = recipe_query.all()
+            item_rows = db.query(*item_columns).order_by(RecipeItem.id).all()
+            for row in item_rows:
+                items_by_parent.setdefault(row.parent_recipe_id, []).append(row)
+        else:
+            # Walk the DAG level by level: one IN query per depth
+            seen = set(recipe_ids)
+            frontier = list(seen)
+            while frontier:
+                item_rows = db.query(*item_columns).filter(
+                    RecipeItem.parent_recipe_id.in_(frontier)
+                ).order_by(RecipeItem.id).all()
+                next_frontier = set()
+                for row in item_rows:
+                    items_by_parent.setdefault(row.parent_recipe_id, []).append(row)
+                    if row.child_recipe_id and row.child_recipe_id not in seen:
+                        seen.add(row.child_recipe_id)
+                        next_frontier.add(row.child_recipe_id)
+                frontier = list(next_frontier)
+            recipe_rows = recipe_query.filter(Recipe.id.in_(seen)).all() if seen else []
+
+        ingredient_ids = {
+            row.ingredient_id
+            for rows in items_by_parent.values()
+            for row in rows
+            if row.ingredient_id
+        }
+        ingredient_query = db.query(
+            Ingredient.id,
+            Ingredient.current_cost,
+            Ingredient.conversion_ratio,
+            Ingredient.yield_factor,
+        )
+        if recipe_ids is not None:
+            ingredient_query = ingredient_query.filter(Ingredient.id.in_(ingredient_ids))
+        ingredient_rows = ingredient_query.all() if (recipe_ids is None or ingredient_ids) else []
+
+        return {
+            "recipes": {row.id: row for row in recipe_rows},
+            "items": items_by_parent,
+            "ingredients": {row.id: row for row in ingredient_rows},
+        }
+
+    @staticmethod
+    def real_cost_per_usage_unit(
+        current_cost: Optional[float],
+        conversion_ratio: Optional[float],
+        yield_factor: Optional[float]
+    ) -> float:
+        """
+        Same formula as Ingredient.real_cost_per_usage_unit, on plain values.
+        Real_Cost = (Current_Cost / Conversion_Ratio) / Yield_Factor
+        """
+        yield_factor = yield_factor if yield_factor is not None else 1.0
+        conversion_ratio = conversion_ratio if conversion_ratio is not None else 1.0
+        current_cost = current_cost if current_cost is not None else 0.0
+
+        if yield_factor == 0 or conversion_ratio == 0:
+            return 0.0
+        return (current_cost / conversion_ratio) / yield_factor
+
+    @staticmethod
+    def topological_order(recipe_ids: Iterable[int], items_by_parent: Dict[int, List]) -> List[int]:
+        """
+        Order recipes so that every sub-recipe comes before the recipes using it.
+        Recipes that take part in a cycle are left out (and logged).
+        """
+        recipe_ids = set(recipe_ids)
+        pending_children: Dict[int, set] = {}
+        parents_of: Dict[int, set] = {}
+
+        for recipe_id in recipe_ids:
+            children = {
+                row.child_recipe_id
+                for row in items_by_parent.get(recipe_id, [])
+                if row.child_recipe_id in recipe_ids
+            }
+            pending_children[recipe_id] = children
+            for child_id in children:
+                parents_of.setdefault(child_id, set()).add(recipe_id)
+
+        ready = [recipe_id for recipe_id, children in pending_children.items() if not children]
+        order: List[int] = []
+        while ready:
+            recipe_id = ready.pop()
+            order.append(recipe_id)
+            for parent_id in parents_of.get(recipe_id, ()):
+                children = pending_children[parent_id]
+                children.discard(recipe_id)
+                if not children:
+                    ready.append(parent_id)
+
+        if len(order) != len(recipe_ids):
+            cyclic = sorted(recipe_ids - set(order))
+            logger.warning(f"Recipe cycle detected, skipping costing for recipes {cyclic}")
+
+        return order
+
+    @staticmethod
+    def compute_costs_from_data(
+        data: Dict[str, Any],
+        ingredient_costs: Optional[Dict[int, float]] = None
+    ) -> Dict[int, Dict[str, float]]:
+        """
+        Cost every recipe in `data` (see load_costing_data) in one pass.
+
+        ingredient_costs optionally overrides Ingredient.current_cost per
+        ingredient id (used by simulations); nothing is written to the DB.
+        """
+        ingredient_costs = ingredient_costs or {}
+        recipes = data["recipes"]
+        items_by_parent = data["items"]
+
+        unit_costs: Dict[int, float] = {}
+        for ing_id, ing in data["ingredients"].items():
+            unit_costs[ing_id] = CostingService.real_cost_per_usage_unit(
+                ingredient_costs.get(ing_id, ing.current_cost),
+                ing.conversion_ratio,
+                ing.yield_factor,
+            )
+
+        costs: Dict[int, Dict[str, float]] = {}
+        for recipe_id in CostingService.topological_order(recipes.keys(), items_by_parent):
+            recipe = recipes[recipe_id]
+
+            total = 0.0
+            for item in items_by_parent.get(recipe_id, []):
+                if item.ingredient_id in unit_costs:
+                    total += unit_costs[item.ingredient_id] * item.quantity
+                elif item.child_recipe_id in costs:
+                    total += costs[item.child_recipe_id]["cost_per_portion"] * item.quantity
+
+            if recipe.yield_quantity == 0:
+                cost_per_portion = 0.0
+            else:
+                cost_per_portion = total / recipe.yield_quantity
+
+            target_margin = recipe.target_margin if recipe.target_margin is not None else 0.0
+            if target_margin >= 1.0:
+                suggested_price = 0.0
+            else:
+                suggested_price = cost_per_portion / (1 - target_margin)
+
+            costs[recipe_id] = {
+                "total_cost": total,
+                "cost_per_portion": cost_per_portion,
+                "suggested_price": suggested_price,
+            }
+
+        return costs
+
+    @staticmethod
+    def compute_costs(
+        db: Session,
+        recipe_ids: Optional[Iterable[int]] = None,
+        ingredient_costs: Optional[Dict[int, float]] = None
+    ) -> Dict[int, Dict[str, float]]:
+        """
+        Compute costs for the given recipes (or the whole catalog if None).
+
+        Returns {recipe_id: {"total_cost", "cost_per_portion", "suggested_price"}}.
+        When recipe_ids is given, the result also contains their sub-recipes.
+        """
+        if recipe_ids is not None:
+            recipe_ids = list(recipe_ids)
+            if not recipe_ids:
+                return {}
+        data = CostingService.load_costing_data(db, recipe_ids)
+        return CostingService.compute_costs_from_data(data, ingredient_costs)
+
+    @staticmethod
+    def build_coefficient_matrix(data: Dict[str, Any]) -> Dict[int, Dict[int, float]]:
+        """
+        Recipe x ingredient coefficient matrix, flattened through sub-recipes.
+
+        matrix[recipe_id][ingredient_id] = usage units of the ingredient in one
+        full yield of the recipe, so that
+            total_cost[r] = sum_i matrix[r][i] * real_cost_per_usage_unit[i]
+        Built children first in the same topological pass as compute_costs_from_data.
+        """
+        recipes = data["recipes"]
+        items_by_parent = data["items"]
+        ingredients = data["ingredients"]
+
+        matrix: Dict[int, Dict[int, float]] = {}
+        for recipe_id in CostingService.topological_order(recipes.keys(), items_by_parent):
+            row: Dict[int, float] = {}
+            for item in items_by_parent.get(recipe_id, []):
+                if item.ingredient_id in ingredients:
+                    row[item.ingredient_id] = row.get(item.ingredient_id, 0.0) + item.quantity
+                elif item.child_recipe_id in matrix:
+                    child_yield = recipes[item.child_recipe_id].yield_quantity
+                    if not child_yield:
+                        continue  # cost_per_portion is 0 for a zero yield
+                    scale = item.quantity / child_yield
+                    for ing_id, coef in matrix[item.child_recipe_id].items():
+                        row[ing_id] = row.get(ing_id, 0.0) + coef * scale
+            matrix[recipe_id] = row
+        return matrix
+
+    @staticmethod
+    def ingredient_columns(matrix: Dict[int, Dict[int, float]]) -> Dict[int, List]:
+        """Column view of the matrix: {ingredient_id: [(recipe_id, coef)]}"""
+        columns: Dict[int, List] = {}
+        for recipe_id, row in matrix.items():
+            for ing_id, coef in row.items():
+                columns.setdefault(ing_id, []).append((recipe_id, coef))
+        return columns
+
+    @staticmethod
+    def propagate_cost_deltas(
+        columns: Dict[int, List],
+        unit_cost_deltas: Dict[int, float]
+    ) -> Dict[int, float]:
+        """
+        Sparse matrix x shock vector: change of total_cost per recipe for the
+        given changes of real cost per usage unit. Only touches the columns
+        of the shocked ingredients.
+        """
+        deltas: Dict[int, float] = {}
+        for ing_id, unit_delta in unit_cost_deltas.items():
+            if not unit_delta:
+                continue
+            for recipe_id, coef in columns.get(ing_id, ()):
+                deltas[recipe_id] = deltas.get(recipe_id, 0.0) + coef * unit_delta
+        return deltas
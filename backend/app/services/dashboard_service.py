@@ -0,0 +1,301 @@
+"""
+Dashboard Rollup Service
+Keeps the materialized dashboard_rollup table in sync with its inputs.
+
+The dashboard reads one row by primary key (the current month). Writes
+only mark rows stale, through two session hooks:
+
+- after_flush records which months (events and their orders) and whether
+  the catalog (ingredients, recipes, recipe cost cache) were touched
+- before_commit clears events_updated_at of those months and/or
+  catalog_updated_at of the current month (primary-key UPDATEs, no
+  aggregates)
+
+get_month() recomputes the stale parts of the row it reads and commits.
+Bulk query().update()/delete() statements bypass the session; callers using
+them should call mark_catalog_dirty() / mark_months_dirty(), and
+migrate_dashboard_rollup.py rebuilds everything from scratch.
+"""
+from sqlalchemy import case, event as sa_event, func, inspect, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timezone
+from itertools import chain
+from typing import Any, Dict, Iterable, Optional, Set
+
+from app.core.logging_config import get_logger
+from app.models.event import Event, EventOrder, EventStatus
+from app.models.ingredient import Ingredient
+from app.models.recipe import Recipe, RecipeCostCache
+from app.models.stats import DashboardRollup
+from app.services.cost_cache_service import RecipeCostCacheService
+
+logger = get_logger(__name__)
+
+PENDING_KEY = "dashboard_rollup_pending"
+CATALOG_CLASSES = (Ingredient, Recipe, RecipeCostCache)
+
+# Binds known to have the dashboard_rollup table (checked once per database)
+_ready_urls: Set[str] = set()
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(period: date) -> date:
+    return date(period.year + (period.month == 12), period.month % 12 + 1, 1)
+
+
+class DashboardRollupService:
+    @staticmethod
+    def _pending(session: Session) -> Dict[str, Any]:
+        return session.info.setdefault(PENDING_KEY, {"months": set(), "event_ids": set(), "catalog": False})
+
+    @staticmethod
+    def mark_months_dirty(session: Session, days: Iterable[date]) -> None:
+        """Refresh the months of these dates at the next commit"""
+        DashboardRollupService._pending(session)["months"].update(month_start(d) for d in days if d)
+
+    @staticmethod
+    def mark_catalog_dirty(session: Session) -> None:
+        """Refresh the catalog snapshot at the next commit"""
+        DashboardRollupService._pending(session)["catalog"] = True
+
+    @staticmethod
+    def event_totals(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> Dict[date, Dict[str, Any]]:
+        """
+        Per-month event figures for events dated in [start, end) (all when
+        omitted), from one query over the stored event order totals.
+        """
+        query = db.query(
+            Event.event_date,
+            Event.status,
+            Event.orders_total_revenue.label("revenue"),
+            Event.orders_total_cost.label("cost"),
+        )
+        if start is not None:
+            query = query.filter(Event.event_date >= start)
+        if end is not None:
+            query = query.filter(Event.event_date < end)
+
+        months: Dict[date, Dict[str, Any]] = {}
+        for row in query:
+            m = months.setdefault(month_start(row.event_date), {
+                "events_count": 0, "confirmed_events_count": 0, "revenue": 0.0, "cost": 0.0,
+            })
+            m["events_count"] += 1
+            if row.status == EventStatus.CONFIRMED:
+                m["confirmed_events_count"] += 1
+                m["revenue"] += row.revenue or 0.0
+                m["cost"] += row.cost or 0.0
+        for m in months.values():
+            m["margin"] = (m["revenue"] - m["cost"]) / m["revenue"] if m["revenue"] else 0.0
+        return months
+
+    @staticmethod
+    def catalog_totals(db: Session) -> Dict[str, Any]:
+        """
+        Catalog snapshot. Recipe cost figures come from recipe_cost_cache;
+        recipes without a cache row are costed into it first, so every
+        recipe is counted. Does not commit.
+        """
+        RecipeCostCacheService.warm(db, commit=False)
+
+        profitable = case(
+            (
+                (RecipeCostCache.cost_per_portion > 0)
+                & (RecipeCostCache.suggested_price > RecipeCostCache.cost_per_portion),
+                1,
+            ),
+            else_=0,
+        )
+        recipes = db.query(
+            func.count(Recipe.id).label("active_recipes"),
+            func.avg(RecipeCostCache.cost_per_portion).label("avg_recipe_cost"),
+            func.coalesce(func.sum(profitable), 0).label("profitable_recipes"),
+        ).outerjoin(RecipeCostCache, RecipeCostCache.recipe_id == Recipe.id).one()
+
+        ingredients = db.query(
+            func.count(Ingredient.id).label("total_ingredients"),
+            func.coalesce(func.sum(Ingredient.stock_quantity * Ingredient.current_cost), 0.0).label("inventory_value"),
+            func.coalesce(func.sum(case(
+                (Ingredient.stock_quantity <= Ingredient.min_stock_threshold, 1), else_=0
+            )), 0).label("low_stock_count"),
+        ).one()
+
+        return {
+            "active_recipes": recipes.active_recipes,
+            "avg_recipe_cost": recipes.avg_recipe_cost or 0.0,
+            "profitable_recipes": int(recipes.profitable_recipes),
+            "total_ingredients": ingredients.total_ingredients,
+            "inventory_value": ingredients.inventory_value,
+            "low_stock_count": int(ingredients.low_stock_count),
+        }
+
+    @staticmethod
+    def _row(db: Session, period: date) -> DashboardRollup:
+        row = db.get(DashboardRollup, period)
+        if row is None:
+            row = DashboardRollup(period=period)
+            db.add(row)
+            db.flush()
+        return row
+
+    @staticmethod
+    def refresh(
+        db: Session,
+        months: Iterable[date] = (),
+        catalog: bool = False,
+        today: Optional[date] = None
+    ) -> None:
+        """
+        Recompute the given months (first-of-month dates) and, with catalog,
+        the snapshot on today's month. Does not commit.
+        """
+        db.flush()
+        now = datetime.now(timezone.utc)
+        for period in sorted(set(months)):
+            totals = DashboardRollupService.event_totals(db, period, next_month(period)).get(period, {
+                "events_count": 0, "confirmed_events_count": 0, "revenue": 0.0, "cost": 0.0, "margin": 0.0,
+            })
+            row = DashboardRollupService._row(db, period)
+            for key, value in totals.items():
+                setattr(row, key, value)
+            row.events_updated_at = now
+
+        if catalog:
+            row = DashboardRollupService._row(db, month_start(today or date.today()))
+            for key, value in DashboardRollupService.catalog_totals(db).items():
+                setattr(row, key, value)
+            row.catalog_updated_at = now
+            # The snapshot already covers everything flushed so far,
+            # including cost cache rows it warmed up
+            db.flush()
+            DashboardRollupService._pending(db)["catalog"] = False
+
+    @staticmethod
+    def mark_stale(
+        db: Session,
+        months: Iterable[date] = (),
+        catalog: bool = False,
+        today: Optional[date] = None
+    ) -> None:
+        """Flag the given months and/or today's catalog snapshot for recompute on read"""
+        table = DashboardRollup.__table__
+        months = sorted(set(months))
+        if months:
+            db.execute(update(table).where(table.c.period.in_(months)).values(events_updated_at=None))
+        if catalog:
+            db.execute(
+                update(table).where(table.c.period == month_start(today or date.today()))
+                .values(catalog_updated_at=None)
+            )
+
+    @staticmethod
+    def get_month(db: Session, today: Optional[date] = None) -> DashboardRollup:
+        """
+        The current month's row (one primary-key read). A missing row and
+        stale event figures or catalog snapshot are recomputed and committed.
+        """
+        period = month_start(today or date.today())
+        row = db.get(DashboardRollup, period)
+        events_stale = row is None or row.events_updated_at is None
+        catalog_stale = row is None or row.catalog_updated_at is None
+        if events_stale or catalog_stale:
+            try:
+                DashboardRollupService.refresh(
+                    db, [period] if events_stale else [], catalog=catalog_stale, today=period
+                )
+                db.commit()
+            except IntegrityError:
+                # A concurrent read created the month's row first
+                db.rollback()
+            row = db.get(DashboardRollup, period)
+        return row
+
+    @staticmethod
+    def rebuild(db: Session, today: Optional[date] = None) -> int:
+        """
+        Recompute every month that has events, plus the current catalog
+        snapshot, from scratch. Returns number of rows written.
+        """
+        db.query(DashboardRollup).delete()
+        db.info.pop(PENDING_KEY, None)
+        db.flush()
+
+        now = datetime.now(timezone.utc)
+        months = DashboardRollupService.event_totals(db)
+        for period, totals in months.items():
+            db.add(DashboardRollup(period=period, events_updated_at=now, **totals))
+        db.flush()
+        DashboardRollupService.refresh(db, [month_start(today or date.today())], catalog=True, today=today)
+        count = db.query(DashboardRollup).count()
+        db.commit()
+        return count
+
+    # ------------------------------------------------------------------
+    # Session hooks
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def collect_changes(session: Session) -> None:
+        """after_flush: remember the months and catalog touched by this flush"""
+        months: Set[date] = set()
+        event_ids: Set[int] = set()
+        catalog = False
+
+        for obj in chain(session.new, session.dirty, session.deleted):
+            if isinstance(obj, Event):
+                months.add(obj.event_date)
+                months.update(inspect(obj).attrs.event_date.history.deleted or ())
+            elif isinstance(obj, EventOrder):
+                event_ids.add(obj.event_id)
+                event_ids.update(inspect(obj).attrs.event_id.history.deleted or ())
+            elif isinstance(obj, CATALOG_CLASSES):
+                catalog = True
+
+        if months or event_ids or catalog:
+            pending = DashboardRollupService._pending(session)
+            pending["months"].update(month_start(d) for d in months if d)
+            pending["event_ids"].update(i for i in event_ids if i is not None)
+            pending["catalog"] = pending["catalog"] or catalog
+
+    @staticmethod
+    def apply_changes(session: Session) -> None:
+        """before_commit: mark what the transaction touched as stale"""
+        session.flush()
+        pending = session.info.pop(PENDING_KEY, None)
+        if not pending or not (pending["months"] or pending["event_ids"] or pending["catalog"]):
+            return
+
+        connection = session.connection()
+        url = str(connection.engine.url)
+        if url not in _ready_urls:
+            if not inspect(connection).has_table(DashboardRollup.__tablename__):
+                logger.debug("dashboard_rollup table missing, skipping stale marks")
+                return
+            _ready_urls.add(url)
+
+        months = set(pending["months"])
+        if pending["event_ids"]:
+            months.update(
+                month_start(row.event_date)
+                for row in session.query(Event.event_date).filter(Event.id.in_(pending["event_ids"]))
+            )
+        DashboardRollupService.mark_stale(session, months, catalog=pending["catalog"])
+
+
+@sa_event.listens_for(Session, "after_flush")
+def _collect_dashboard_changes(session, flush_context):
+    DashboardRollupService.collect_changes(session)
+
+
+@sa_event.listens_for(Session, "before_commit")
+def _apply_dashboard_changes(session):
+    DashboardRollupService.apply_changes(session)
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _discard_dashboard_changes(session):
+    session.info.pop(PENDING_KEY, None)
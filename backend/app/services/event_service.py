@@ -1,10 +1,23 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import case, event as sa_event, func, insert, inspect, select, update
+from sqlalchemy.orm import Session, joinedload, sessionmaker
+from sqlalchemy.orm.util import identity_key
+from app.core.database import SessionLocal
+from app.core.logging_config import get_logger
 from app.models.event import Event, EventOrder, EventStatus
 from app.models.recipe import Recipe
+from app.services.cost_cache_service import RecipeCostCacheService
+from app.services.dashboard_service import DashboardRollupService
 from fastapi import HTTPException
-from typing import List, Optional
+from typing import Any, Dict, Iterable, List, Optional
+from itertools import chain
 from datetime import datetime
 
+logger = get_logger(__name__)
+
+TOTALS_PENDING_KEY = "event_totals_pending"
+TOTALS_REFRESHED_KEY = "event_totals_refreshed"
+TOTAL_FIELDS = ("orders_total_cost", "orders_total_revenue")
+
 class EventService:
     @staticmethod
     def get_event(db: Session, event_id: int) -> Optional[Event]:
@@ -63,13 +76,14 @@ class EventService:
         if not recipe:
             raise HTTPException(status_code=404, detail="Recipe not found")
             
-        # Determine price and cost at this moment
-        cost_at_sale = recipe.total_cost
+        # Determine price and cost at this moment (cached recipe cost)
+        costs = RecipeCostCacheService.get_costs(db, [recipe_id])[recipe_id]
+        cost_at_sale = costs["total_cost"]
         
         # Freezing logic: 
         # If manual override not provided, use recipe suggested price
         # IMPORTANT: This creates the "Snapshot"
-        unit_price_frozen = unit_price_override if unit_price_override is not None else recipe.suggested_price
+        unit_price_frozen = unit_price_override if unit_price_override is not None else costs["suggested_price"]
         
         order = EventOrder(
             event_id=event_id,
@@ -84,6 +98,54 @@ class EventService:
         db.refresh(order)
         return order
 
+    @staticmethod
+    def add_menu_to_event(db: Session, event_id: int, items: List[Any]) -> dict:
+        """
+        Add a whole menu (items with recipe_id, quantity, unit_price, notes)
+        in one transaction: one event lookup, one IN query validating the
+        recipes, one batched cost lookup, one multi-row INSERT and commit.
+        Prices and costs are frozen exactly as in add_order_to_event.
+        """
+        event = db.query(Event).filter(Event.id == event_id).first()
+        if not event:
+            raise HTTPException(status_code=404, detail="Event not found")
+
+        recipe_ids = {item.recipe_id for item in items}
+        found = {row.id for row in db.query(Recipe.id).filter(Recipe.id.in_(recipe_ids))}
+        missing = sorted(recipe_ids - found)
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Recipes not found: {missing}")
+
+        costs = RecipeCostCacheService.get_costs(db, recipe_ids, commit=False)
+
+        rows = [
+            {
+                "event_id": event_id,
+                "recipe_id": item.recipe_id,
+                "quantity": item.quantity,
+                "unit_price_frozen": item.unit_price if item.unit_price is not None else costs[item.recipe_id]["suggested_price"],
+                "cost_at_sale": costs[item.recipe_id]["total_cost"],
+                "notes": item.notes,
+            }
+            for item in items
+        ]
+        # One executemany; it bypasses the session hooks, so refresh the
+        # stored totals and the dashboard month explicitly
+        db.execute(insert(EventOrder.__table__), rows)
+        EventService.refresh_order_totals(db, [event_id])
+        DashboardRollupService.mark_months_dirty(db, [event.event_date])
+        db.commit()
+
+        db.refresh(event)
+        return {
+            "event_id": event.id,
+            "orders_added": len(rows),
+            "orders": [{k: v for k, v in row.items() if k != "event_id"} for row in rows],
+            "total_cost": event.total_cost,
+            "total_revenue": event.total_revenue,
+            "margin": event.margin,
+        }
+
     @staticmethod
     def update_event_status(db: Session, event_id: int, new_status: EventStatus) -> Event:
         event = db.query(Event).filter(Event.id == event_id).first()
@@ -109,16 +171,165 @@ class EventService:
         Manually trigger a refresh of costs (e.g., if client asks for updated quote)
         WARNING: This overrides historical data. Use with caution.
         """
-        event = db.query(Event).options(joinedload(Event.orders).joinedload(EventOrder.recipe)).filter(Event.id == event_id).first()
+        event = db.query(Event).options(joinedload(Event.orders)).filter(Event.id == event_id).first()
         if not event:
             raise HTTPException(status_code=404, detail="Event not found")
+        
+        # Current recipe costs for every order in one cache lookup
+        costs = RecipeCostCacheService.get_costs(db, {order.recipe_id for order in event.orders})
             
         for order in event.orders:
-            # Re-fetch current recipe cost
-            current_cost = order.recipe.total_cost
-            order.cost_at_sale = current_cost
+            order.cost_at_sale = costs[order.recipe_id]["total_cost"]
             # We do NOT change unit_price_frozen automatically, as that's the agreed price
             
         db.commit()
         db.refresh(event)
         return event
+
+    @staticmethod
+    def margin_expression():
+        """Event margin (0-1) as a SQL expression over the stored order totals"""
+        return case(
+            (Event.orders_total_revenue > 0,
+             (Event.orders_total_revenue - Event.orders_total_cost) / Event.orders_total_revenue),
+            else_=0.0
+        )
+
+    @staticmethod
+    def refresh_order_totals(db: Session, event_ids: Iterable[int]) -> None:
+        """
+        Recompute the stored order totals of these events from event_orders,
+        in one UPDATE with correlated sums. Does not commit.
+        """
+        event_ids = sorted({i for i in event_ids if i is not None})
+        if not event_ids:
+            return
+
+        events, orders = Event.__table__, EventOrder.__table__
+
+        def total(price):
+            return select(func.coalesce(func.sum(orders.c.quantity * price), 0.0)).where(
+                orders.c.event_id == events.c.id
+            ).scalar_subquery()
+
+        db.connection().execute(update(events).where(events.c.id.in_(event_ids)).values(
+            orders_total_cost=total(orders.c.cost_at_sale),
+            orders_total_revenue=total(orders.c.unit_price_frozen),
+        ))
+
+    @staticmethod
+    def check_order_totals(db: Session, fix: bool = False, tolerance: float = 1e-6) -> Dict[str, Any]:
+        """
+        Compare every event's stored totals with a fresh aggregate of its
+        orders (2 queries). With fix, drifted events are recomputed and committed.
+        """
+        actual = {
+            row.event_id: row
+            for row in db.query(
+                EventOrder.event_id,
+                func.sum(EventOrder.quantity * EventOrder.cost_at_sale).label("cost"),
+                func.sum(EventOrder.quantity * EventOrder.unit_price_frozen).label("revenue"),
+            ).group_by(EventOrder.event_id)
+        }
+
+        drift: List[Dict[str, Any]] = []
+        events_checked = 0
+        for event in db.query(Event.id, Event.orders_total_cost, Event.orders_total_revenue):
+            events_checked += 1
+            row = actual.get(event.id)
+            expected_cost = row.cost if row else 0.0
+            expected_revenue = row.revenue if row else 0.0
+            for field, stored, expected in (
+                ("orders_total_cost", event.orders_total_cost or 0.0, expected_cost),
+                ("orders_total_revenue", event.orders_total_revenue or 0.0, expected_revenue),
+            ):
+                if abs(stored - expected) > tolerance * max(1.0, abs(expected)):
+                    drift.append({"event_id": event.id, "field": field, "stored": stored, "expected": expected})
+
+        if drift:
+            logger.warning(f"Event order totals drifted on {len({d['event_id'] for d in drift})} events")
+            if fix:
+                EventService.refresh_order_totals(db, {d["event_id"] for d in drift})
+                db.commit()
+
+        return {
+            "consistent": not drift,
+            "events_checked": events_checked,
+            "drift": drift,
+            "fixed": fix and bool(drift),
+        }
+
+    # ------------------------------------------------------------------
+    # Session hooks: keep Event.orders_total_* in step with EventOrder writes
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def register_session_hooks(session_factory: sessionmaker) -> None:
+        """Keep stored order totals in step on sessions from this factory"""
+        sa_event.listen(session_factory, "before_flush", _collect_event_order_changes)
+        sa_event.listen(session_factory, "after_flush", _apply_event_order_changes)
+        sa_event.listen(session_factory, "after_flush_postexec", _expire_event_order_totals)
+
+    @staticmethod
+    def collect_order_changes(session: Session) -> None:
+        """
+        before_flush: events that lose orders (deleted orders, orders moved
+        to another event). Read now, while the old rows are still loadable.
+        """
+        event_ids = set()
+        unknown_previous = []
+        for obj in chain(session.dirty, session.deleted):
+            if isinstance(obj, EventOrder):
+                history = inspect(obj).attrs.event_id.history
+                event_ids.add(obj.event_id)
+                event_ids.update(history.deleted or ())
+                if history.added and not history.deleted and obj.id is not None:
+                    # Reassigned without the old value loaded: read it from the row
+                    unknown_previous.append(obj.id)
+        if unknown_previous:
+            orders = EventOrder.__table__
+            event_ids.update(session.connection().execute(
+                select(orders.c.event_id).where(orders.c.id.in_(unknown_previous))
+            ).scalars())
+        if event_ids:
+            session.info.setdefault(TOTALS_PENDING_KEY, set()).update(event_ids)
+
+    @staticmethod
+    def apply_order_changes(session: Session) -> None:
+        """after_flush: recompute totals of every event whose orders changed"""
+        event_ids = session.info.pop(TOTALS_PENDING_KEY, set())
+        for obj in chain(session.new, session.dirty):
+            if isinstance(obj, EventOrder):
+                event_ids.add(obj.event_id)
+            elif isinstance(obj, Event) and obj in session.dirty and inspect(obj).attrs.orders.history.deleted:
+                # Orders removed from the collection (delete-orphan)
+                event_ids.add(obj.id)
+        event_ids.discard(None)
+        if event_ids:
+            EventService.refresh_order_totals(session, event_ids)
+            session.info[TOTALS_REFRESHED_KEY] = event_ids
+
+    @staticmethod
+    def expire_order_totals(session: Session) -> None:
+        """after_flush_postexec: loaded events must re-read their stored totals"""
+        for event_id in session.info.pop(TOTALS_REFRESHED_KEY, ()):
+            event = session.identity_map.get(identity_key(Event, event_id))
+            if event is not None:
+                session.expire(event, list(TOTAL_FIELDS))
+
+
+def _collect_event_order_changes(session, flush_context, instances):
+    EventService.collect_order_changes(session)
+
+
+def _apply_event_order_changes(session, flush_context):
+    EventService.apply_order_changes(session)
+
+
+def _expire_event_order_totals(session, flush_context):
+    EventService.expire_order_totals(session)
+
+
+# Only sessions from the app's factory (and the ones passed to
+# register_session_hooks) carry the hooks, not every Session in the process
+EventService.register_session_hooks(SessionLocal)
@@ -0,0 +1,222 @@
+"""
+Historical Cost Service
+Point-in-time ("as of") recipe costing from ingredient_price_history.
+
+The price of an ingredient at instant T is the new_cost of its last change
+at or before T; before its first change it is that change's old_cost, and
+without any history it is the current cost. Both lookups are grouped
+min/max(created_at) per ingredient on
+ix_ingredient_price_history_ingredient_created.
+
+For a time range the price timelines of all ingredients are loaded with a
+single UNION ALL query (last change at or before the start, every change in
+the range, first change after the end) and resolved in memory, so costing
+many recipes at many instants is a fixed number of queries:
+
+1. recipe structure (CostingService.load_costing_data)
+2. price timelines
+3. one costing pass per distinct price state actually needed
+
+Only prices are historized: quantities, yields, conversion ratios and
+yield factors are taken as they are today.
+"""
+from sqlalchemy import and_, func, select, union_all
+from sqlalchemy.orm import Session
+from bisect import bisect_right
+from datetime import date, datetime, timezone
+from fastapi import HTTPException
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.logging_config import get_logger
+from app.models.event import Event, EventOrder
+from app.models.ingredient import IngredientPriceHistory
+from app.models.recipe import Recipe
+from app.services.costing_service import CostingService
+
+logger = get_logger(__name__)
+
+TOLERANCE = 1e-6
+
+# ingredient_id -> (change times, old costs, new costs), sorted by time
+Timeline = Tuple[List[datetime], List[float], List[float]]
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Naive UTC, so timestamps from the DB and from callers compare"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class HistoricalCostService:
+    @staticmethod
+    def load_price_timelines(
+        db: Session,
+        ingredient_ids: Iterable[int],
+        start: datetime,
+        end: Optional[datetime] = None
+    ) -> Dict[int, Timeline]:
+        """
+        Price changes needed to resolve any instant in [start, end] (one
+        query). Ingredients without history are left out.
+        """
+        ingredient_ids = list(set(ingredient_ids))
+        if not ingredient_ids:
+            return {}
+        start = as_utc(start)
+        end = as_utc(end) if end is not None else start
+
+        history = IngredientPriceHistory.__table__
+        scope = history.c.ingredient_id.in_(ingredient_ids)
+        columns = (history.c.id, history.c.ingredient_id, history.c.created_at, history.c.old_cost, history.c.new_cost)
+
+        def edge(when, condition):
+            """The changes at the per-ingredient min/max(created_at) matching condition"""
+            bound = select(
+                history.c.ingredient_id, when(history.c.created_at).label("at")
+            ).where(scope, condition).group_by(history.c.ingredient_id).subquery()
+            return select(*columns).join(bound, and_(
+                history.c.ingredient_id == bound.c.ingredient_id, history.c.created_at == bound.c.at
+            ))
+
+        rows = db.execute(union_all(
+            edge(func.max, history.c.created_at <= start),
+            select(*columns).where(scope, history.c.created_at > start, history.c.created_at <= end),
+            edge(func.min, history.c.created_at > end),
+        )).all()
+
+        timelines: Dict[int, Timeline] = {}
+        for row in sorted(rows, key=lambda r: (r.ingredient_id, as_utc(r.created_at), r.id)):
+            times, old, new = timelines.setdefault(row.ingredient_id, ([], [], []))
+            times.append(as_utc(row.created_at))
+            old.append(row.old_cost)
+            new.append(row.new_cost)
+        return timelines
+
+    @staticmethod
+    def price_at(timeline: Timeline, when: datetime) -> float:
+        """Price in force at `when` according to the timeline"""
+        times, old, new = timeline
+        position = bisect_right(times, when)
+        return new[position - 1] if position else old[0]
+
+    @staticmethod
+    def ingredient_costs_as_of(
+        db: Session,
+        ingredient_ids: Iterable[int],
+        as_of: datetime
+    ) -> Dict[int, float]:
+        """
+        {ingredient_id: cost per purchase unit at as_of} for the ingredients
+        with price history (others have never changed: use current_cost)
+        """
+        as_of = as_utc(as_of)
+        return {
+            ingredient_id: HistoricalCostService.price_at(timeline, as_of)
+            for ingredient_id, timeline in HistoricalCostService.load_price_timelines(db, ingredient_ids, as_of).items()
+        }
+
+    @staticmethod
+    def compute_costs_as_of(
+        db: Session,
+        recipe_ids: Iterable[int],
+        as_of: datetime
+    ) -> Dict[int, Dict[str, float]]:
+        """
+        Same result shape as CostingService.compute_costs, with ingredient
+        prices as they were at as_of (sub-recipes included, costed the same way)
+        """
+        recipe_ids = list(recipe_ids)
+        if not recipe_ids:
+            return {}
+        data = CostingService.load_costing_data(db, recipe_ids)
+        prices = HistoricalCostService.ingredient_costs_as_of(db, data["ingredients"].keys(), as_of)
+        return CostingService.compute_costs_from_data(data, prices)
+
+    @staticmethod
+    def get_recipe_cost_as_of(db: Session, recipe_id: int, as_of: datetime) -> Dict[str, Any]:
+        if not db.query(Recipe.id).filter(Recipe.id == recipe_id).first():
+            raise HTTPException(status_code=404, detail="Recipe not found")
+        costs = HistoricalCostService.compute_costs_as_of(db, [recipe_id], as_of)
+        if recipe_id not in costs:
+            raise HTTPException(status_code=400, detail="Recipe is part of a cycle and cannot be costed")
+        return {"recipe_id": recipe_id, "as_of": as_of, **costs[recipe_id]}
+
+    @staticmethod
+    def reconcile_orders(
+        db: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        event_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Compare the frozen cost_at_sale of every order (of the events dated in
+        range, or of one event) with the recipe cost as of the moment the
+        order was created. Orders created before event_orders.created_at
+        existed fall back to the event's creation time. Read-only.
+        """
+        costed_at = func.coalesce(EventOrder.created_at, Event.created_at).label("costed_at")
+        query = db.query(
+            EventOrder.id, EventOrder.event_id, EventOrder.recipe_id, EventOrder.quantity,
+            EventOrder.cost_at_sale, costed_at
+        ).join(Event, Event.id == EventOrder.event_id)
+        if event_id is not None:
+            query = query.filter(EventOrder.event_id == event_id)
+        if start_date is not None:
+            query = query.filter(Event.event_date >= start_date)
+        if end_date is not None:
+            query = query.filter(Event.event_date <= end_date)
+        orders = query.order_by(EventOrder.event_id, EventOrder.id).all()
+
+        # Structure once for every recipe involved, timelines once for the span
+        data = CostingService.load_costing_data(db, {row.recipe_id for row in orders})
+        instants = [as_utc(row.costed_at) for row in orders if row.costed_at is not None]
+        timelines = HistoricalCostService.load_price_timelines(
+            db, data["ingredients"].keys(), min(instants), max(instants)
+        ) if instants else {}
+
+        # Orders between the same two price changes share one costing pass
+        change_times = sorted({t for times, _, _ in timelines.values() for t in times})
+        passes: Dict[Optional[int], Dict[int, Dict[str, float]]] = {}
+
+        def costs_at(when: Optional[datetime]) -> Dict[int, Dict[str, float]]:
+            key = None if when is None else bisect_right(change_times, when)
+            if key not in passes:
+                prices = {} if when is None else {
+                    ingredient_id: HistoricalCostService.price_at(timeline, when)
+                    for ingredient_id, timeline in timelines.items()
+                }
+                passes[key] = CostingService.compute_costs_from_data(data, prices)
+            return passes[key]
+
+        lines = []
+        cost_at_sale_total = 0.0
+        cost_as_of_total = 0.0
+        for row in orders:
+            cost = costs_at(as_utc(row.costed_at)).get(row.recipe_id)
+            cost_as_of = cost["total_cost"] if cost else None
+            difference = None if cost_as_of is None else row.cost_at_sale - cost_as_of
+            cost_at_sale_total += row.cost_at_sale * row.quantity
+            cost_as_of_total += (cost_as_of if cost_as_of is not None else row.cost_at_sale) * row.quantity
+            lines.append({
+                "order_id": row.id,
+                "event_id": row.event_id,
+                "recipe_id": row.recipe_id,
+                "quantity": row.quantity,
+                "costed_at": row.costed_at,
+                "cost_at_sale": row.cost_at_sale,
+                "cost_as_of": cost_as_of,
+                "difference": difference,
+                "matches": difference is not None and abs(difference) <= TOLERANCE,
+            })
+
+        logger.info(f"Reconciled {len(orders)} orders against point-in-time costs ({len(passes)} costing passes)")
+        return {
+            "period": {"start": start_date, "end": end_date},
+            "event_id": event_id,
+            "orders_checked": len(lines),
+            "orders_mismatched": sum(1 for line in lines if not line["matches"]),
+            "total_cost_at_sale": round(cost_at_sale_total, 2),
+            "total_cost_as_of": round(cost_as_of_total, 2),
+            "orders": lines,
+        }
@@ -0,0 +1,95 @@
+"""
+Ingredient Service
+Set-based price maintenance for the ingredient catalog.
+
+A bulk price change is three statements in one transaction, however many
+ingredients it touches:
+
+1. one aggregate SELECT for the response summary
+2. INSERT ... SELECT of the price history rows (old cost read server-side)
+3. UPDATE ... RETURNING id of the changed ingredients
+
+followed by a targeted recipe_cost_cache refresh of the recipes using
+those ingredients (and their parents) and a refresh of their days in the
+daily price rollup.
+"""
+from sqlalchemy import case, func, insert, literal, select, update
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional
+
+from app.core.logging_config import get_logger
+from app.models.ingredient import Ingredient, IngredientPriceHistory
+from app.services.cost_cache_service import RecipeCostCacheService
+from app.services.dashboard_service import DashboardRollupService
+from app.services.price_history_service import PriceHistoryService
+
+logger = get_logger(__name__)
+
+
+class IngredientService:
+    @staticmethod
+    def bulk_update_prices(
+        db: Session,
+        percentage_increase: float,
+        category: Optional[str] = None,
+        changed_by: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Multiply current_cost of every ingredient (of the category, if given)
+        by (1 + percentage/100), logging one price history row per changed
+        ingredient. Commits.
+        """
+        multiplier = 1 + (percentage_increase / 100)
+        changed_by = changed_by or f"Bulk Update {percentage_increase}%"
+        new_cost = Ingredient.current_cost * multiplier
+
+        scope = [Ingredient.category == category] if category else []
+        changed = scope + [new_cost != Ingredient.current_cost]
+
+        # 1. Summary over the matched ingredients (computed before the update)
+        summary = db.execute(
+            select(
+                func.count(Ingredient.id).label("matched"),
+                func.coalesce(func.sum(case((new_cost != Ingredient.current_cost, 1), else_=0)), 0).label("changed"),
+                func.coalesce(func.sum(Ingredient.current_cost), 0.0).label("before"),
+                func.coalesce(func.sum(new_cost), 0.0).label("after"),
+            ).where(*scope)
+        ).one()
+
+        response = {
+            "category": category or "all",
+            "percentage_increase": percentage_increase,
+            "multiplier": multiplier,
+            "ingredients_updated": int(summary.changed),
+            "total_cost_before": summary.before,
+            "total_cost_after": summary.after,
+        }
+        if not summary.matched:
+            return {"message": "No ingredients found in category", **response}
+
+        updated_ids: List[int] = []
+        if summary.changed:
+            # 2. History rows straight from the current values
+            db.execute(
+                insert(IngredientPriceHistory).from_select(
+                    ["ingredient_id", "old_cost", "new_cost", "changed_by"],
+                    select(Ingredient.id, Ingredient.current_cost, new_cost, literal(changed_by)).where(*changed),
+                )
+            )
+
+            # 3. The update itself; ids come back for the cache refresh
+            statement = update(Ingredient).where(*changed).values(current_cost=new_cost)
+            options = {"synchronize_session": "fetch"}
+            if db.get_bind().dialect.update_returning:
+                updated_ids = list(db.execute(statement.returning(Ingredient.id), execution_options=options).scalars())
+            else:
+                updated_ids = list(db.execute(select(Ingredient.id).where(*changed)).scalars())
+                db.execute(statement, execution_options=options)
+
+            RecipeCostCacheService.invalidate_ingredients(db, updated_ids)
+            PriceHistoryService.refresh_daily(db, updated_ids)
+            DashboardRollupService.mark_catalog_dirty(db)
+
+        db.commit()
+        logger.info(f"Bulk price update {percentage_increase}% ({category or 'all'}): {len(updated_ids)} ingredients")
+        return {"message": f"Successfully updated {len(updated_ids)} ingredient(s)", **response}
@@ -0,0 +1,326 @@
+"""
+Monte Carlo Service
+Cost-risk simulation from IngredientPriceHistory.
+
+1. Per ingredient, the logged price changes give a daily drift (mean log
+   change per day) and a daily realized volatility. Ingredients with too
+   few changes borrow the pooled estimate of their category.
+2. N future price paths are drawn in batches as lognormal factors over the
+   horizon: exp(drift * H + volatility * sqrt(H) * Z).
+3. Recipe and event costs are one matrix product per batch against the
+   recipe x ingredient coefficient matrix (CostingService), with the
+   events' ordered quantities folded in as extra rows.
+4. Each batch is reduced into a fixed-size log-spaced histogram per recipe
+   and event (plus exact min/max), and percentiles are read from the
+   histograms. Bin ranges come from a small pilot sample.
+
+Memory is one batch of costs plus BINS counters per recipe/event, whatever
+the number of draws; with workers > 1 the draws are spread across a
+process pool and the worker histograms are summed.
+"""
+from sqlalchemy.orm import Session
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import math
+
+import numpy as np
+
+from app.models.event import Event, EventOrder, EventStatus
+from app.models.ingredient import Ingredient, IngredientPriceHistory
+from app.services.costing_service import CostingService
+
+PERCENTILES = (50, 90, 99)
+BATCH_SIZE = 1000
+BINS = 1024
+PILOT_DRAWS = 1000
+TINY = np.finfo(np.float64).tiny
+
+
+def _sample_batches(
+    drift: np.ndarray,
+    volatility: np.ndarray,
+    weights: np.ndarray,
+    horizon_days: int,
+    draws: int,
+    rng: np.random.Generator
+) -> Iterator[np.ndarray]:
+    """Costs (rows of `weights`) of `draws` price scenarios, BATCH_SIZE draws at a time"""
+    mean = drift * horizon_days
+    scale = volatility * math.sqrt(horizon_days)
+    for start in range(0, draws, BATCH_SIZE):
+        size = min(BATCH_SIZE, draws - start)
+        factors = np.exp(mean + scale * rng.standard_normal((size, drift.shape[0])))
+        yield factors @ weights.T
+
+
+def _sample_histograms(
+    drift: np.ndarray,
+    volatility: np.ndarray,
+    weights: np.ndarray,
+    horizon_days: int,
+    draws: int,
+    seed: Any,
+    log_low: np.ndarray,
+    bin_width: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Draw `draws` price scenarios and return, per row of `weights`, the
+    histogram of log cost (BINS bins from log_low, clipped at both ends)
+    and the exact min and max cost.
+    Module-level so it can run in a worker process.
+    """
+    rng = np.random.default_rng(seed)
+    outputs = weights.shape[0]
+    counts = np.zeros(outputs * BINS, dtype=np.int64)
+    low = np.full(outputs, np.inf)
+    high = np.full(outputs, -np.inf)
+    offsets = np.arange(outputs) * BINS
+
+    for costs in _sample_batches(drift, volatility, weights, horizon_days, draws, rng):
+        np.minimum(low, costs.min(axis=0), out=low)
+        np.maximum(high, costs.max(axis=0), out=high)
+        bins = np.floor((np.log(np.maximum(costs, TINY)) - log_low) / bin_width)
+        bins = np.clip(bins, 0, BINS - 1).astype(np.int64) + offsets
+        counts += np.bincount(bins.ravel(), minlength=outputs * BINS)
+    return counts.reshape(outputs, BINS), low, high
+
+
+def _histogram_percentiles(
+    counts: np.ndarray,
+    low: np.ndarray,
+    high: np.ndarray,
+    log_low: np.ndarray,
+    bin_width: np.ndarray
+) -> np.ndarray:
+    """PERCENTILES x outputs, interpolated inside the bin and kept within [min, max]"""
+    rows = np.arange(counts.shape[0])
+    cumulative = counts.cumsum(axis=1)
+    total = cumulative[:, -1] if counts.shape[0] else np.zeros(0)
+    result = np.empty((len(PERCENTILES), counts.shape[0]))
+    for k, p in enumerate(PERCENTILES):
+        rank = total * p / 100.0
+        b = np.minimum((cumulative <= rank[:, None]).sum(axis=1), BINS - 1)
+        inside = counts[rows, b]
+        within = (rank - (cumulative[rows, b] - inside)) / np.maximum(inside, 1)
+        result[k] = np.clip(np.exp(log_low + bin_width * (b + within)), low, high)
+    return result
+
+
+class MonteCarloService:
+    @staticmethod
+    def estimate_parameters(
+        history: Iterable[Any],
+        categories: Dict[int, Optional[str]],
+        now: datetime,
+        mode: str = "ingredient",
+        min_observations: int = 3
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Daily drift and volatility per ingredient from price-change rows
+        (ingredient_id, old_cost, new_cost, created_at), ordered by time.
+
+        Over an observation window of T days (first change -> now) with log
+        changes r_i: drift = sum(r_i) / T, volatility = sqrt(sum(r_i^2) / T).
+        mode="category" always uses the pooled category estimate; in
+        "ingredient" mode it is the fallback below min_observations.
+        """
+        stats: Dict[int, Dict[str, float]] = {}
+        for row in history:
+            if not row.old_cost or not row.new_cost or row.old_cost <= 0 or row.new_cost <= 0:
+                continue
+            s = stats.setdefault(row.ingredient_id, {"n": 0, "sum": 0.0, "sum_sq": 0.0, "first": row.created_at})
+            r = math.log(row.new_cost / row.old_cost)
+            s["n"] += 1
+            s["sum"] += r
+            s["sum_sq"] += r * r
+            s["first"] = min(s["first"], row.created_at)
+
+        def window_days(first: datetime) -> float:
+            if first.tzinfo is None and now.tzinfo is not None:
+                first = first.replace(tzinfo=now.tzinfo)
+            return max(1.0, (now - first).total_seconds() / 86400.0)
+
+        pooled: Dict[str, Dict[str, float]] = {}
+        for ing_id, s in stats.items():
+            s["days"] = window_days(s["first"])
+            category = categories.get(ing_id)
+            if category is not None:
+                p = pooled.setdefault(category, {"n": 0, "sum": 0.0, "sum_sq": 0.0, "days": 0.0})
+                for key in ("n", "sum", "sum_sq", "days"):
+                    p[key] += s[key]
+
+        def as_params(s: Dict[str, float], source: str) -> Dict[str, Any]:
+            return {
+                "drift_per_day": s["sum"] / s["days"],
+                "volatility_per_day": math.sqrt(s["sum_sq"] / s["days"]),
+                "observations": int(s["n"]),
+                "source": source,
+            }
+
+        params: Dict[int, Dict[str, Any]] = {}
+        for ing_id, category in categories.items():
+            own = stats.get(ing_id)
+            if mode == "ingredient" and own and own["n"] >= min_observations:
+                params[ing_id] = as_params(own, "ingredient")
+            elif category in pooled:
+                params[ing_id] = as_params(pooled[category], "category")
+            elif own:
+                params[ing_id] = as_params(own, "ingredient")
+            else:
+                params[ing_id] = {"drift_per_day": 0.0, "volatility_per_day": 0.0, "observations": 0, "source": "none"}
+        return params
+
+    @staticmethod
+    def run_simulation(
+        db: Session,
+        horizon_days: int = 90,
+        draws: int = 10000,
+        mode: str = "ingredient",
+        workers: int = 1,
+        seed: Optional[int] = None,
+        today: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """
+        P50/P90/P99 recipe cost per portion and confirmed-event cost after
+        horizon_days, from `draws` sampled price paths.
+        Event costs use the same basis as EventOrder.cost_at_sale
+        (quantity x recipe total cost).
+        """
+        today = today or date.today()
+
+        # 1. Catalog as a coefficient matrix (3 queries)
+        data = CostingService.load_costing_data(db)
+        current = CostingService.compute_costs_from_data(data)
+        matrix = CostingService.build_coefficient_matrix(data)
+        recipe_ids = sorted(matrix)
+        ingredient_ids = sorted({i for row in matrix.values() for i in row})
+        col = {ing_id: j for j, ing_id in enumerate(ingredient_ids)}
+
+        unit_costs = np.array([
+            CostingService.real_cost_per_usage_unit(
+                data["ingredients"][i].current_cost,
+                data["ingredients"][i].conversion_ratio,
+                data["ingredients"][i].yield_factor,
+            )
+            for i in ingredient_ids
+        ])
+        weights = np.zeros((len(recipe_ids), len(ingredient_ids)))
+        for r, recipe_id in enumerate(recipe_ids):
+            for ing_id, coef in matrix[recipe_id].items():
+                weights[r, col[ing_id]] = coef
+        weights *= unit_costs  # row . price factors = recipe total cost
+
+        # 2. Confirmed events in the horizon (1 query)
+        event_rows = db.query(
+            Event.id, Event.name, Event.event_date,
+            EventOrder.recipe_id, EventOrder.quantity, EventOrder.unit_price_frozen
+        ).join(EventOrder, EventOrder.event_id == Event.id).filter(
+            Event.event_date >= today,
+            Event.event_date <= today + timedelta(days=horizon_days),
+            Event.status.in_([EventStatus.CONFIRMED, EventStatus.IN_PROGRESS])
+        ).order_by(Event.event_date, Event.id).all()
+
+        events: Dict[int, Dict[str, Any]] = {}
+        row_of = {recipe_id: r for r, recipe_id in enumerate(recipe_ids)}
+        for row in event_rows:
+            events.setdefault(row.id, {"event_id": row.id, "name": row.name, "date": row.event_date, "revenue": 0.0, "orders": []})
+            events[row.id]["revenue"] += row.quantity * row.unit_price_frozen
+            events[row.id]["orders"].append((row.recipe_id, row.quantity))
+        event_ids = list(events)
+        event_weights = np.zeros((len(event_ids), len(recipe_ids)))
+        for e, event_id in enumerate(event_ids):
+            for recipe_id, quantity in events[event_id]["orders"]:
+                if recipe_id in row_of:
+                    event_weights[e, row_of[recipe_id]] += quantity
+
+        # 3. Volatility per ingredient (2 queries)
+        categories = {
+            row.id: row.category
+            for row in db.query(Ingredient.id, Ingredient.category).filter(Ingredient.id.in_(ingredient_ids))
+        } if ingredient_ids else {}
+        history = db.query(
+            IngredientPriceHistory.ingredient_id,
+            IngredientPriceHistory.old_cost,
+            IngredientPriceHistory.new_cost,
+            IngredientPriceHistory.created_at
+        ).filter(
+            IngredientPriceHistory.ingredient_id.in_(ingredient_ids)
+        ).order_by(IngredientPriceHistory.created_at).all() if ingredient_ids else []
+        params = MonteCarloService.estimate_parameters(
+            history, categories, datetime.now(timezone.utc), mode
+        )
+        drift = np.array([params[i]["drift_per_day"] for i in ingredient_ids])
+        volatility = np.array([params[i]["volatility_per_day"] for i in ingredient_ids])
+
+        # 4. Sample in batches into per-output histograms, optionally across processes
+        outputs = np.vstack([weights, event_weights @ weights])
+        pilot_seed, *seeds = np.random.SeedSequence(seed).spawn(1 + max(1, workers))
+
+        # Bin range per output: the pilot's log range, widened on both sides
+        log_low = np.zeros(outputs.shape[0])
+        bin_width = np.ones(outputs.shape[0])
+        if outputs.shape[0]:
+            pilot = np.vstack(list(_sample_batches(
+                drift, volatility, outputs, horizon_days, PILOT_DRAWS, np.random.default_rng(pilot_seed)
+            )))
+            pilot_low = np.log(np.maximum(pilot.min(axis=0), TINY))
+            pilot_high = np.log(np.maximum(pilot.max(axis=0), TINY))
+            margin = np.maximum(pilot_high - pilot_low, math.log(2))
+            log_low = pilot_low - margin
+            bin_width = (pilot_high - pilot_low + 2 * margin) / BINS
+
+        if workers > 1 and draws >= workers:
+            shares = [draws // workers + (1 if w < draws % workers else 0) for w in range(workers)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(
+                    _sample_histograms,
+                    [drift] * workers, [volatility] * workers, [outputs] * workers,
+                    [horizon_days] * workers, shares, seeds, [log_low] * workers, [bin_width] * workers
+                ))
+            counts = sum(p[0] for p in parts)
+            low = np.min([p[1] for p in parts], axis=0)
+            high = np.max([p[2] for p in parts], axis=0)
+        else:
+            counts, low, high = _sample_histograms(
+                drift, volatility, outputs, horizon_days, draws, seeds[0], log_low, bin_width
+            )
+
+        pct = _histogram_percentiles(counts, low, high, log_low, bin_width)
+        recipe_pct, event_pct = pct[:, :len(recipe_ids)], pct[:, len(recipe_ids):]
+
+        recipes: List[Dict[str, Any]] = []
+        for r, recipe_id in enumerate(recipe_ids):
+            yield_quantity = data["recipes"][recipe_id].yield_quantity
+            per_portion = (1.0 / yield_quantity) if yield_quantity else 0.0
+            recipes.append({
+                "recipe_id": recipe_id,
+                "recipe_name": data["recipes"][recipe_id].name,
+                "current_cost_per_portion": round(current[recipe_id]["cost_per_portion"], 2),
+                **{f"p{p}": round(float(recipe_pct[k, r]) * per_portion, 2) for k, p in enumerate(PERCENTILES)},
+            })
+        recipes.sort(key=lambda x: x["p90"] - x["current_cost_per_portion"], reverse=True)
+
+        event_results: List[Dict[str, Any]] = []
+        for e, event_id in enumerate(event_ids):
+            event = events[event_id]
+            event_results.append({
+                "event_id": event_id,
+                "name": event["name"],
+                "date": event["date"],
+                "revenue": round(event["revenue"], 2),
+                "current_cost": round(float(event_weights[e] @ weights.sum(axis=1)), 2),
+                **{f"p{p}": round(float(event_pct[k, e]), 2) for k, p in enumerate(PERCENTILES)},
+            })
+
+        return {
+            "horizon_days": horizon_days,
+            "draws": draws,
+            "mode": mode,
+            "parameters": [
+                {"ingredient_id": i, "category": categories.get(i), **params[i]}
+                for i in ingredient_ids if params[i]["source"] != "none"
+            ],
+            "recipes": recipes,
+            "events": event_results,
+        }
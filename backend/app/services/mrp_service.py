@@ -0,0 +1,194 @@
+"""
+MRP Service
+Time-phased material requirements over a rolling horizon.
+
+Demand from the production plan is bucketed by Event.event_date into one
+array('d') per ingredient (one slot per day). Projected on-hand is current
+stock minus cumulative demand; a day that would go negative gets a
+lot-for-lot planned receipt, ordered lead_time_days earlier.
+
+Everything after the plan bulk-load is a single pass over each array, so
+a horizon of several months stays well under a second.
+"""
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from array import array
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.models.ingredient import Ingredient
+from app.models.supplier import Supplier, SupplierProduct
+from app.services.production_service import ProductionService
+
+
+class MRPService:
+    @staticmethod
+    def bucket_demand(inputs: Dict[str, Any], start_date: date, days: int) -> Dict[int, array]:
+        """
+        Ingredient demand per day (purchase units) -> {ingredient_id: array('d', days)}.
+        Orders are first summed per (day, recipe), then multiplied by the recipe vectors.
+        """
+        recipe_days: Dict[tuple, float] = {}
+        for event in inputs["events"]:
+            day = (event.event_date - start_date).days
+            if not 0 <= day < days:
+                continue
+            for order in event.orders:
+                if order.recipe_id in inputs["vectors"]:
+                    key = (day, order.recipe_id)
+                    recipe_days[key] = recipe_days.get(key, 0.0) + order.quantity
+
+        vectors = {
+            recipe_id: [(ing_id, coef) for ing_id, coef in inputs["vectors"][recipe_id]["ingredients"].items()]
+            for recipe_id in {recipe_id for _, recipe_id in recipe_days}
+        }
+        demand: Dict[int, array] = {}
+        for vector in vectors.values():
+            for ing_id, _ in vector:
+                if ing_id not in demand:
+                    demand[ing_id] = array("d", bytes(8 * days))
+
+        for (day, recipe_id), quantity in recipe_days.items():
+            for ing_id, coef in vectors[recipe_id]:
+                demand[ing_id][day] += quantity * coef
+        return demand
+
+    @staticmethod
+    def project(demand: array, stock: float) -> Dict[str, Any]:
+        """
+        One pass over a demand series.
+
+        Returns {
+            "projected_on_hand": stock minus cumulative demand (may go negative),
+            "net_requirements": lot-for-lot receipts needed per day,
+            "first_shortage_day": index of first negative projection or None
+        }
+        """
+        days = len(demand)
+        projected = array("d", bytes(8 * days))
+        net = array("d", bytes(8 * days))
+        on_hand = stock
+        position = stock  # on hand including planned receipts
+        first_shortage = None
+
+        for day in range(days):
+            need = demand[day]
+            on_hand -= need
+            projected[day] = on_hand
+            if on_hand < 0 and first_shortage is None:
+                first_shortage = day
+            position -= need
+            if position < 0:
+                net[day] = -position
+                position = 0.0
+
+        return {
+            "projected_on_hand": projected,
+            "net_requirements": net,
+            "first_shortage_day": first_shortage,
+        }
+
+    @staticmethod
+    def load_lead_times(db: Session, ingredient_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Lead time per ingredient (2 queries): the default supplier's, otherwise
+        the shortest among suppliers with an available offer, otherwise 0.
+        """
+        ingredient_ids = list(ingredient_ids)
+        if not ingredient_ids:
+            return {}
+
+        lead_times: Dict[int, Dict[str, Any]] = {
+            row.ingredient_id: {"supplier_id": None, "supplier_name": None, "lead_time_days": row.lead_time_days or 0}
+            for row in db.query(
+                SupplierProduct.ingredient_id,
+                func.min(Supplier.lead_time_days).label("lead_time_days")
+            ).join(Supplier, Supplier.id == SupplierProduct.supplier_id).filter(
+                SupplierProduct.ingredient_id.in_(ingredient_ids),
+                SupplierProduct.is_available == 1,
+                Supplier.is_active == 1
+            ).group_by(SupplierProduct.ingredient_id)
+        }
+
+        for row in db.query(
+            Ingredient.id,
+            Supplier.id.label("supplier_id"),
+            Supplier.name,
+            Supplier.lead_time_days
+        ).join(Supplier, Supplier.id == Ingredient.default_supplier_id).filter(
+            Ingredient.id.in_(ingredient_ids)
+        ):
+            lead_times[row.id] = {
+                "supplier_id": row.supplier_id,
+                "supplier_name": row.name,
+                "lead_time_days": row.lead_time_days or 0,
+            }
+        return lead_times
+
+    @staticmethod
+    def get_requirements(
+        db: Session,
+        start_date: date,
+        horizon_days: int = 90,
+        include_series: bool = True,
+        today: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """
+        Day-by-day projected stock and net requirements per ingredient,
+        from start_date over horizon_days (inclusive of start_date).
+
+        Ingredients that run short come first, earliest shortage first.
+        """
+        today = today or date.today()
+        end_date = start_date + timedelta(days=horizon_days - 1)
+        inputs = ProductionService.load_plan_inputs(db, start_date, end_date)
+        demand = MRPService.bucket_demand(inputs, start_date, horizon_days)
+        lead_times = MRPService.load_lead_times(db, demand.keys())
+        dates = [start_date + timedelta(days=day) for day in range(horizon_days)]
+
+        results: List[Dict[str, Any]] = []
+        for ing_id, series in demand.items():
+            ing = inputs["ingredients"][ing_id]
+            stock = ing.stock_quantity or 0.0
+            projection = MRPService.project(series, stock)
+            lead = lead_times.get(ing_id, {"supplier_id": None, "supplier_name": None, "lead_time_days": 0})
+
+            planned_orders = []
+            for day, quantity in enumerate(projection["net_requirements"]):
+                if quantity > 0:
+                    order_by = dates[day] - timedelta(days=lead["lead_time_days"])
+                    planned_orders.append({
+                        "need_date": dates[day],
+                        "order_by": order_by,
+                        "quantity": quantity,
+                        "is_late": order_by < today,
+                    })
+
+            first_shortage = projection["first_shortage_day"]
+            result = {
+                "id": ing_id,
+                "name": ing.name,
+                "sku": ing.sku,
+                "unit": inputs["conversions"]["unit_names"][ing_id],
+                "stock": stock,
+                "total_demand": sum(series),
+                "first_shortage_date": dates[first_shortage] if first_shortage is not None else None,
+                "supplier_id": lead["supplier_id"],
+                "supplier_name": lead["supplier_name"],
+                "lead_time_days": lead["lead_time_days"],
+                "planned_orders": planned_orders,
+            }
+            if include_series:
+                result["demand"] = series.tolist()
+                result["projected_on_hand"] = projection["projected_on_hand"].tolist()
+                result["net_requirements"] = projection["net_requirements"].tolist()
+            results.append(result)
+
+        results.sort(key=lambda r: (r["first_shortage_date"] is None, r["first_shortage_date"] or date.max, r["name"]))
+
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "dates": dates if include_series else None,
+            "ingredients": results,
+        }
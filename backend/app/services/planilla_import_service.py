@@ -0,0 +1,359 @@
+"""
+Planilla Import Service
+Loads the legacy PlanillaLEO costing workbook (DATA/PlanillaLEO/*.xlsx)
+into ingredients and recipes.
+
+Workbook layout (sheet "Menu", cached values):
+- "Cant Ori" row: base portions the quantities are written for (D)
+- summary block (P/Q): dish codes F1..Fn -> code (e.g. "Emp.Bond")
+- sections: a header row with "Mat" in B (section name in A); ingredient
+  sections have "Unidad" in D, the labour/overhead ones (Brigada, Salon,
+  Costos) do not and are skipped
+- item rows: A dish code, B ingredient, D unit, E quantity for the base
+  portions, F price factor (0 = free, "Bonificado"), G unit price, H subtotal
+- "Depostado / Desperdicio" row: waste fraction of the section (D)
+- "tot" row (G): section total (H)
+
+Result: one recipe per dish (yield = base portions), named
+"<menu> – <code>" since the short codes repeat across workbooks, and one
+menu recipe (one portion per guest) using every dish once as a sub-recipe. Rows whose
+code is not a listed dish (condiments, supplies) go on the menu itself.
+
+Units are resolved against units.abbreviation from one in-memory lookup.
+Ingredients, recipes, recipe items and recipe_closure rows are inserted in
+dependency order with one executemany per table; the new recipes are then
+costed in one batch and compared with the sheet's own totals. With dry_run
+the comparison is returned and everything is rolled back.
+"""
+from fastapi import HTTPException
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Iterator, List, Optional
+import re
+
+from app.core.logging_config import get_logger
+from app.models.ingredient import Ingredient
+from app.models.recipe import Recipe, RecipeClosure, RecipeItem, RecipeType
+from app.models.unit import Unit
+from app.services.cost_cache_service import RecipeCostCacheService
+from app.services.dashboard_service import DashboardRollupService
+from app.services.recipe_graph_service import RecipeGraphService
+
+logger = get_logger(__name__)
+
+# Column positions on the Menu sheet (A=0)
+COL_CODE, COL_NAME, COL_NOTE, COL_UNIT, COL_QTY, COL_FACTOR, COL_PRICE, COL_SUBTOTAL = range(8)
+COL_SUMMARY_KEY, COL_SUMMARY_CODE = 15, 16
+
+# Spreadsheet unit spellings -> units.abbreviation (lower-case)
+UNIT_ALIASES = {
+    "kgs": "kg", "kilo": "kg", "kilos": "kg",
+    "grs": "g", "gr": "g",
+    "lts": "l", "lt": "l", "litro": "l", "litros": "l",
+    "cant": "un", "unidad": "un", "unidades": "un", "u": "un", "paq": "un",
+}
+COUNT_UNIT = "un"
+
+
+def _text(value: Any) -> str:
+    return str(value).strip() if value is not None else ""
+
+
+def _number(value: Any) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class PlanillaImportService:
+    @staticmethod
+    def parse_menu_sheet(rows: Iterator[List[Any]]) -> Dict[str, Any]:
+        """
+        Menu sheet rows (values, header included) -> base portions, dish
+        codes, ingredient sections with their items and sheet totals.
+        """
+        parsed = {"base_portions": None, "dishes": [], "sections": [], "skipped_sections": []}
+        section = None
+
+        for row_number, row in enumerate(rows, start=1):
+            row = list(row) + [None] * max(0, COL_SUMMARY_CODE + 1 - len(row))
+            label = _text(row[COL_NAME]).lower()
+
+            if label == "cant ori":
+                parsed["base_portions"] = _number(row[COL_UNIT])
+            if re.fullmatch(r"F\d+", _text(row[COL_SUMMARY_KEY])) and _text(row[COL_SUMMARY_CODE]):
+                parsed["dishes"].append(_text(row[COL_SUMMARY_CODE]))
+
+            if label == "mat":
+                section = {
+                    "name": _text(row[COL_CODE]),
+                    "row": row_number,
+                    "waste": 0.0,
+                    "sheet_total": 0.0,
+                    "items": [],
+                }
+                if _text(row[COL_UNIT]).lower() == "unidad":
+                    parsed["sections"].append(section)
+                else:
+                    parsed["skipped_sections"].append(section)
+                continue
+            if section is None:
+                continue
+
+            if _text(row[COL_NOTE]).lower().startswith("depostado"):
+                section["waste"] = _number(row[COL_UNIT]) or 0.0
+            elif _text(row[COL_PRICE]).lower() == "tot":
+                section["sheet_total"] = _number(row[COL_SUBTOTAL]) or 0.0
+                section = None
+            elif _text(row[COL_NAME]):
+                factor = _number(row[COL_FACTOR])
+                section["items"].append({
+                    "row": row_number,
+                    "code": _text(row[COL_CODE]),
+                    "name": _text(row[COL_NAME]),
+                    "unit": _text(row[COL_UNIT]),
+                    "quantity": _number(row[COL_QTY]) or 0.0,
+                    "factor": 1.0 if factor is None else factor,
+                    "price": _number(row[COL_PRICE]) or 0.0,
+                    "sheet_subtotal": _number(row[COL_SUBTOTAL]) or 0.0,
+                })
+
+        if not parsed["base_portions"]:
+            raise HTTPException(status_code=400, detail="Workbook has no 'Cant Ori' (base portions) row")
+        if not parsed["sections"]:
+            raise HTTPException(status_code=400, detail="Workbook has no ingredient sections")
+        return parsed
+
+    @staticmethod
+    def import_workbook(
+        db: Session,
+        rows: Iterator[List[Any]],
+        menu_name: str,
+        apply_waste: bool = True,
+        dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Create the workbook's ingredients, dish recipes and menu recipe.
+
+        Existing ingredients and recipes (same name, case-insensitive) are
+        reused, not modified. With apply_waste a section's waste fraction
+        becomes the yield_factor of its new ingredients (the sheet itself
+        does not cost the waste, so those dishes will differ). Commits
+        unless dry_run.
+        """
+        parsed = PlanillaImportService.parse_menu_sheet(rows)
+        base = parsed["base_portions"]
+        dishes = set(parsed["dishes"])
+        report = {
+            "menu": menu_name,
+            "dry_run": dry_run,
+            "base_portions": base,
+            "ingredients_created": 0,
+            "ingredients_existing": 0,
+            "recipes_created": 0,
+            "recipes_existing": 0,
+            "items_created": 0,
+            "rows_skipped": 0,
+            "skipped_sections": [
+                {"section": s["name"], "sheet_total": s["sheet_total"]} for s in parsed["skipped_sections"]
+            ],
+            "errors": [],
+            "costs": [],
+        }
+
+        # Units: one in-memory lookup
+        units = {abbreviation.lower(): unit_id for unit_id, abbreviation in db.execute(select(Unit.id, Unit.abbreviation))}
+
+        def unit_id(spelling: str) -> Optional[int]:
+            key = spelling.strip().lower()
+            return units.get(key) or units.get(UNIT_ALIASES.get(key, key))
+
+        if unit_id(COUNT_UNIT) is None:
+            raise HTTPException(status_code=400, detail=f"Unit '{COUNT_UNIT}' is required for menu items")
+
+        items = []
+        for section in parsed["sections"]:
+            for item in section["items"]:
+                if not item["quantity"]:
+                    report["rows_skipped"] += 1
+                    continue
+                item["unit_id"] = unit_id(item["unit"])
+                if item["unit_id"] is None:
+                    report["errors"].append({"row": item["row"], "error": f"Unknown unit '{item['unit']}'"})
+                    continue
+                item["section"] = section["name"]
+                item["waste"] = section["waste"] if apply_waste else 0.0
+                items.append(item)
+
+        # 1. Ingredients (first occurrence of a name defines it)
+        names = {}
+        for item in items:
+            names.setdefault(item["name"].lower(), item)
+        ingredient_ids = {
+            name.lower(): ingredient_id
+            for ingredient_id, name in db.execute(
+                select(Ingredient.id, Ingredient.name).where(func.lower(Ingredient.name).in_(list(names)))
+            )
+        }
+        report["ingredients_existing"] = len(ingredient_ids)
+        new_ingredients = [
+            {
+                "name": item["name"],
+                "category": item["section"],
+                "description": f"Imported from {menu_name}" + (
+                    f" (Bonificado {round((1 - item['factor']) * 100)} %)" if item["factor"] < 1 else ""
+                ),
+                "purchase_unit_id": item["unit_id"],
+                "usage_unit_id": item["unit_id"],
+                "conversion_ratio": 1.0,
+                "current_cost": item["price"] * item["factor"],
+                "yield_factor": 1.0 - item["waste"],
+            }
+            for key, item in names.items() if key not in ingredient_ids
+        ]
+        if new_ingredients:
+            db.execute(insert(Ingredient), new_ingredients)
+            ingredient_ids.update(
+                (name.lower(), ingredient_id)
+                for ingredient_id, name in db.execute(
+                    select(Ingredient.id, Ingredient.name).where(
+                        Ingredient.name.in_([i["name"] for i in new_ingredients])
+                    )
+                )
+            )
+        report["ingredients_created"] = len(new_ingredients)
+
+        # 2. Recipes: dishes with at least one item, then the menu
+        dish_items: Dict[str, List[Dict[str, Any]]] = {}
+        menu_items = []
+        for item in items:
+            if item["code"] in dishes:
+                dish_items.setdefault(item["code"], []).append(item)
+            else:
+                menu_items.append(item)
+        dish_names = {code: f"{menu_name} – {code}" for code in parsed["dishes"] if code in dish_items}
+        recipe_names = list(dish_names.values()) + [menu_name]
+        recipe_ids = {
+            name.lower(): recipe_id
+            for recipe_id, name in db.execute(
+                select(Recipe.id, Recipe.name).where(func.lower(Recipe.name).in_([n.lower() for n in recipe_names]))
+            )
+        }
+        existing_recipes = set(recipe_ids.values())
+        report["recipes_existing"] = len(existing_recipes)
+        new_recipes = [
+            {
+                "name": name,
+                "description": f"Imported from {menu_name}",
+                "recipe_type": RecipeType.FINAL_DISH,
+                "yield_quantity": 1.0 if name == menu_name else base,
+                "yield_unit_id": unit_id(COUNT_UNIT),
+            }
+            for name in recipe_names if name.lower() not in recipe_ids
+        ]
+        if new_recipes:
+            db.execute(insert(Recipe), new_recipes)
+            recipe_ids.update(
+                (name.lower(), recipe_id)
+                for recipe_id, name in db.execute(
+                    select(Recipe.id, Recipe.name).where(
+                        Recipe.name.in_([r["name"] for r in new_recipes]), Recipe.id.notin_(existing_recipes)
+                    )
+                )
+            )
+        report["recipes_created"] = len(new_recipes)
+        menu_id = recipe_ids[menu_name.lower()]
+        dish_ids = {code: recipe_ids[name.lower()] for code, name in dish_names.items()}
+        created = set(recipe_ids.values()) - existing_recipes
+
+        # 3. Recipe items of the new recipes
+        recipe_items = []
+        for code, rows_ in dish_items.items():
+            dish_id = dish_ids[code]
+            if dish_id not in created:
+                continue
+            recipe_items.extend(
+                {
+                    "parent_recipe_id": dish_id,
+                    "ingredient_id": ingredient_ids[item["name"].lower()],
+                    "quantity": item["quantity"],
+                    "unit_id": item["unit_id"],
+                    "notes": f"Planilla row {item['row']}",
+                }
+                for item in rows_
+            )
+        if menu_id in created:
+            recipe_items.extend(
+                {
+                    "parent_recipe_id": menu_id,
+                    "child_recipe_id": dish_ids[code],
+                    "quantity": 1.0,
+                    "unit_id": unit_id(COUNT_UNIT),
+                }
+                for code in dish_items
+            )
+            recipe_items.extend(
+                {
+                    "parent_recipe_id": menu_id,
+                    "ingredient_id": ingredient_ids[item["name"].lower()],
+                    "quantity": item["quantity"] / base,
+                    "unit_id": item["unit_id"],
+                    "notes": f"Planilla row {item['row']}" + (f" ({item['code']})" if item["code"] else ""),
+                }
+                for item in menu_items
+            )
+        if recipe_items:
+            db.execute(insert(RecipeItem), recipe_items)
+        report["items_created"] = len(recipe_items)
+
+        # 4. Closure rows: new recipes are only ancestors (nothing used them yet)
+        closure = [{"ancestor_id": r, "descendant_id": r, "depth": 0} for r in created]
+        if menu_id in created:
+            for code in dish_items:
+                dish_id = dish_ids[code]
+                closure.append({"ancestor_id": menu_id, "descendant_id": dish_id, "depth": 1})
+                if dish_id not in created:
+                    closure.extend(
+                        {"ancestor_id": menu_id, "descendant_id": d, "depth": depth + 1}
+                        for d, depth in RecipeGraphService.get_descendants(db, dish_id).items()
+                    )
+        if closure:
+            db.execute(insert(RecipeClosure), closure)
+
+        # 5. Cost the new recipes and compare with the sheet
+        costs = RecipeCostCacheService.refresh(db, created)
+        costs.update(RecipeCostCacheService.get_costs(db, set(recipe_ids.values()) - created, commit=False))
+        for code in dish_items:
+            sheet = sum(i["sheet_subtotal"] for i in dish_items[code])
+            report["costs"].append(PlanillaImportService._compare(dish_names[code], sheet, costs[dish_ids[code]]["total_cost"]))
+        sheet_menu = sum(s["sheet_total"] for s in parsed["sections"]) / base
+        report["costs"].append(PlanillaImportService._compare(
+            menu_name, sheet_menu, costs[menu_id]["cost_per_portion"], basis="per guest"
+        ))
+
+        if dry_run:
+            db.rollback()
+        else:
+            DashboardRollupService.mark_catalog_dirty(db)
+            db.commit()
+
+        logger.info(
+            f"Planilla import '{menu_name}': {report['ingredients_created']} ingredients, "
+            f"{report['recipes_created']} recipes{' (dry run)' if dry_run else ''}"
+        )
+        return report
+
+    @staticmethod
+    def _compare(name: str, sheet_cost: float, computed_cost: float, basis: str = "base portions") -> Dict[str, Any]:
+        difference = computed_cost - sheet_cost
+        return {
+            "recipe": name,
+            "basis": basis,
+            "sheet_cost": round(sheet_cost, 2),
+            "computed_cost": round(computed_cost, 2),
+            "difference": round(difference, 2),
+            "difference_pct": round(difference / sheet_cost * 100, 2) if sheet_cost else None,
+        }
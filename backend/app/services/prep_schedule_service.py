@@ -0,0 +1,118 @@
+"""
+Prep Schedule Service
+Batches sub-recipe (mise en place) demand across events by shelf life.
+
+A batch prepared on day P can serve every event up to P + shelf_life_hours // 24
+days later. Per sub-recipe, demand days are swept in date order and each
+batch is prepared on the first uncovered day, covering as many following
+days as its shelf life allows. This greedy sweep gives the fewest batches
+(classic interval cover) in O(n log n), so a full season is cheap.
+
+Prep minutes: Recipe.preparation_time is per run of the recipe's
+yield_quantity, so a batch takes preparation_time x ceil(quantity / yield).
+"""
+from sqlalchemy.orm import Session
+from datetime import date, timedelta
+from typing import Any, Dict, List
+import math
+
+from app.models.recipe import RecipeType
+from app.services.production_service import ProductionService
+
+
+class PrepScheduleService:
+    @staticmethod
+    def shelf_life_days(shelf_life_hours) -> int:
+        """Whole days a batch stays usable after its prep day (0 = same day only)"""
+        return max(0, (shelf_life_hours or 0) // 24)
+
+    @staticmethod
+    def batch_demand(demand: List[Dict[str, Any]], shelf_days: int) -> List[List[Dict[str, Any]]]:
+        """
+        Greedy interval cover (pure).
+        demand: [{"date", ...}]; returns batches as lists of demand entries,
+        each batch spanning at most shelf_days days from its first date.
+        """
+        batches: List[List[Dict[str, Any]]] = []
+        window_end = None
+        for entry in sorted(demand, key=lambda e: e["date"]):
+            if window_end is None or entry["date"] > window_end:
+                batches.append([])
+                window_end = entry["date"] + timedelta(days=shelf_days)
+            batches[-1].append(entry)
+        return batches
+
+    @staticmethod
+    def get_prep_schedule(db: Session, start_date: date, end_date: date) -> Dict[str, Any]:
+        """
+        Prep batches for every sub-recipe needed by confirmed events in range,
+        and a per-day kitchen timeline with total prep minutes.
+        """
+        inputs = ProductionService.load_plan_inputs(db, start_date, end_date)
+        recipes = inputs["recipes"]
+
+        # Sub-recipe demand per (sub-recipe, event)
+        demand: Dict[int, Dict[int, Dict[str, Any]]] = {}
+        for event in inputs["events"]:
+            for order in event.orders:
+                vector = inputs["vectors"].get(order.recipe_id)
+                if vector is None:
+                    continue
+                for sub_id, coef in vector["sub_recipes"].items():
+                    entry = demand.setdefault(sub_id, {}).setdefault(event.id, {
+                        "event_id": event.id,
+                        "name": event.name,
+                        "date": event.event_date,
+                        "quantity": 0.0,
+                    })
+                    entry["quantity"] += order.quantity * coef
+
+        batches: List[Dict[str, Any]] = []
+        for sub_id, by_event in demand.items():
+            recipe = recipes[sub_id]
+            if recipe.recipe_type != RecipeType.SUB_RECIPE:
+                continue
+            shelf_days = PrepScheduleService.shelf_life_days(recipe.shelf_life_hours)
+
+            for entries in PrepScheduleService.batch_demand(list(by_event.values()), shelf_days):
+                quantity = sum(e["quantity"] for e in entries)
+                runs = math.ceil(quantity / recipe.yield_quantity - 1e-9) if recipe.yield_quantity else 0
+                prep_date = entries[0]["date"]
+                batches.append({
+                    "recipe_id": sub_id,
+                    "name": recipe.name,
+                    "unit": recipe.yield_unit.name if recipe.yield_unit else "units",
+                    "prep_date": prep_date,
+                    "use_by": prep_date + timedelta(days=shelf_days),
+                    "shelf_life_hours": recipe.shelf_life_hours,
+                    "quantity": quantity,
+                    "runs": runs,
+                    "prep_minutes": runs * (recipe.preparation_time or 0),
+                    "events": entries,
+                })
+
+        batches.sort(key=lambda b: (b["prep_date"], b["name"]))
+
+        timeline: Dict[date, Dict[str, Any]] = {}
+        for batch in batches:
+            day = timeline.setdefault(batch["prep_date"], {
+                "date": batch["prep_date"],
+                "total_prep_minutes": 0,
+                "batches": [],
+            })
+            day["total_prep_minutes"] += batch["prep_minutes"]
+            day["batches"].append({
+                "recipe_id": batch["recipe_id"],
+                "name": batch["name"],
+                "quantity": batch["quantity"],
+                "unit": batch["unit"],
+                "prep_minutes": batch["prep_minutes"],
+            })
+
+        return {
+            "period": {"start": start_date, "end": end_date},
+            "batches": batches,
+            "timeline": list(timeline.values()),
+            "total_batches": len(batches),
+            "total_prep_minutes": sum(b["prep_minutes"] for b in batches),
+        }
@@ -0,0 +1,250 @@
+"""
+Price History Service
+Ingredient price series over a time range, downsampled in SQL.
+
+Series are read from ingredient_price_daily (one row per ingredient and day
+with at least one change) when that table exists, otherwise from the raw
+log through ix_ingredient_price_history_ingredient_created. Reads never
+write.
+
+The rollup is maintained where history is written (ingredient update, bulk
+price update, supplier import): refresh_daily() recomputes the recent days
+of the changed ingredients and upserts them (ON CONFLICT DO UPDATE), so
+concurrent refreshes of the same day converge instead of colliding.
+History inserted with past timestamps needs refresh_daily(..., since=...)
+or a rebuild (migrate_price_history.py).
+
+Either source is reduced to one row per (ingredient, bucket) by a single
+grouped query; "last" joins back to the bucket's last change.
+"""
+from sqlalchemy import Date, cast, delete, func, insert, inspect, literal, select, update
+from sqlalchemy.orm import Session
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional, Set
+
+from app.core.logging_config import get_logger
+from app.models.ingredient import Ingredient, IngredientPriceDaily, IngredientPriceHistory
+from app.services.analytics_service import AnalyticsService, bucket_start
+
+logger = get_logger(__name__)
+
+# Binds known to have the ingredient_price_daily table (checked once per database)
+_ready_urls: Set[str] = set()
+
+# Days recomputed before the refresh instant (covers app/DB clock and time zone skew)
+REFRESH_SLACK = timedelta(days=1)
+
+
+class PriceHistoryService:
+    @staticmethod
+    def day_expression(dialect: str, column):
+        """Calendar day of a timestamp column"""
+        if dialect == "sqlite":
+            return func.date(column)
+        return cast(column, Date)
+
+    @staticmethod
+    def rollup_ready(db: Session) -> bool:
+        connection = db.connection()
+        url = str(connection.engine.url)
+        if url not in _ready_urls:
+            if not inspect(connection).has_table(IngredientPriceDaily.__tablename__):
+                return False
+            _ready_urls.add(url)
+        return True
+
+    @staticmethod
+    def refresh_daily(
+        db: Session,
+        ingredient_ids: Optional[Iterable[int]] = None,
+        since: Optional[datetime] = None,
+        rebuild: bool = False
+    ) -> int:
+        """
+        Recompute rollup rows from the history and upsert them.
+
+        With ingredient_ids only those ingredients are refreshed, for the
+        days from `since` (default: now) minus REFRESH_SLACK onward; without
+        them every ingredient and day. rebuild first empties the table.
+        Returns the number of day rows written. Does not commit; no-op
+        while the rollup table does not exist.
+        """
+        if not PriceHistoryService.rollup_ready(db):
+            return 0
+        db.flush()
+        daily = IngredientPriceDaily.__table__
+        history = IngredientPriceHistory.__table__
+
+        scope = []
+        if ingredient_ids is not None:
+            ingredient_ids = list(set(ingredient_ids))
+            if not ingredient_ids:
+                return 0
+            since = since or datetime.now(timezone.utc)
+            first_day = (since - REFRESH_SLACK).date()
+            scope = [
+                history.c.ingredient_id.in_(ingredient_ids),
+                history.c.created_at >= datetime.combine(first_day, time.min),
+            ]
+
+        dialect = db.get_bind().dialect.name
+        day = PriceHistoryService.day_expression(dialect, history.c.created_at)
+        grouped = select(
+            history.c.ingredient_id,
+            day,
+            func.min(history.c.new_cost),
+            func.max(history.c.new_cost),
+            func.sum(history.c.new_cost),
+            func.count(history.c.id),
+            func.max(history.c.id),
+        ).where(history.c.created_at.is_not(None), *scope).group_by(history.c.ingredient_id, day)
+        columns = ["ingredient_id", "day", "min_cost", "max_cost", "sum_cost", "changes", "last_history_id"]
+
+        if rebuild:
+            db.execute(delete(daily))
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            statement = dialect_insert(daily).from_select(columns, grouped)
+            statement = statement.on_conflict_do_update(
+                index_elements=["ingredient_id", "day"],
+                set_={name: statement.excluded[name] for name in columns[2:]} | {"close_cost": None},
+            )
+        else:
+            # No ON CONFLICT: replace the recomputed days in this transaction
+            if scope:
+                db.execute(delete(daily).where(
+                    daily.c.ingredient_id.in_(ingredient_ids), daily.c.day >= first_day
+                ))
+            elif not rebuild:
+                db.execute(delete(daily))
+            statement = insert(daily).from_select(columns, grouped)
+
+        written = db.execute(statement).rowcount
+        db.execute(
+            update(daily).where(daily.c.close_cost.is_(None)).values(
+                close_cost=select(history.c.new_cost).where(history.c.id == daily.c.last_history_id).scalar_subquery()
+            )
+        )
+        return written
+
+    @staticmethod
+    def get_series(
+        db: Session,
+        start_date: date,
+        end_date: date,
+        granularity: str = "day",
+        agg: str = "last",
+        ingredient_id: Optional[int] = None,
+        category: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        One price series per ingredient (one ingredient, a category or the
+        whole catalog) with a point per day/week/month that had changes.
+        agg picks the point value: last price, avg/min/max of the new prices.
+        """
+        dialect = db.get_bind().dialect.name
+        use_rollup = PriceHistoryService.rollup_ready(db)
+
+        if use_rollup:
+            daily = IngredientPriceDaily.__table__
+            facts = select(
+                daily.c.ingredient_id,
+                daily.c.day.label("day"),
+                daily.c.min_cost,
+                daily.c.max_cost,
+                daily.c.sum_cost,
+                daily.c.changes,
+                daily.c.close_cost,
+                daily.c.last_history_id.label("seq"),
+            ).where(daily.c.day >= start_date, daily.c.day <= end_date)
+        else:
+            history = IngredientPriceHistory.__table__
+            facts = select(
+                history.c.ingredient_id,
+                PriceHistoryService.day_expression(dialect, history.c.created_at).label("day"),
+                history.c.new_cost.label("min_cost"),
+                history.c.new_cost.label("max_cost"),
+                history.c.new_cost.label("sum_cost"),
+                literal(1).label("changes"),
+                history.c.new_cost.label("close_cost"),
+                history.c.id.label("seq"),
+            ).where(
+                history.c.created_at >= start_date,
+                history.c.created_at < end_date + timedelta(days=1)
+            )
+
+        if ingredient_id is not None:
+            facts = facts.where(facts.selected_columns.ingredient_id == ingredient_id)
+        if category:
+            facts = facts.where(facts.selected_columns.ingredient_id.in_(
+                select(Ingredient.id).where(Ingredient.category == category)
+            ))
+
+        f = facts.subquery("facts")
+        last = facts.subquery("last_fact")
+        sql_bucket = AnalyticsService.bucket_expression(dialect, granularity, f.c.day)
+        bucket = (sql_bucket if sql_bucket is not None else f.c.day).label("bucket")
+        buckets = select(
+            f.c.ingredient_id,
+            bucket,
+            func.min(f.c.min_cost).label("min_cost"),
+            func.max(f.c.max_cost).label("max_cost"),
+            func.sum(f.c.sum_cost).label("sum_cost"),
+            func.sum(f.c.changes).label("changes"),
+            func.max(f.c.seq).label("last_seq"),
+        ).group_by(f.c.ingredient_id, bucket).subquery("buckets")
+
+        rows = db.execute(
+            select(buckets, last.c.close_cost, Ingredient.name)
+            .join(last, last.c.seq == buckets.c.last_seq)
+            .join(Ingredient, Ingredient.id == buckets.c.ingredient_id)
+            .order_by(Ingredient.name, buckets.c.ingredient_id, buckets.c.bucket)
+        ).all()
+
+        # Merge to bucket starts (no-op unless the dialect bucketed by day)
+        series: Dict[int, Dict[str, Any]] = {}
+        for row in rows:
+            day = date.fromisoformat(row.bucket) if isinstance(row.bucket, str) else row.bucket
+            s = series.setdefault(row.ingredient_id, {
+                "ingredient_id": row.ingredient_id, "ingredient_name": row.name, "points": {},
+            })
+            period = bucket_start(day, granularity)
+            p = s["points"].get(period)
+            if p is None:
+                s["points"][period] = {
+                    "min": row.min_cost, "max": row.max_cost, "sum": row.sum_cost,
+                    "changes": row.changes, "seq": row.last_seq, "last": row.close_cost,
+                }
+                continue
+            p["min"], p["max"] = min(p["min"], row.min_cost), max(p["max"], row.max_cost)
+            p["sum"] += row.sum_cost
+            p["changes"] += row.changes
+            if row.last_seq > p["seq"]:
+                p["seq"], p["last"] = row.last_seq, row.close_cost
+
+        def value(p: Dict[str, Any]) -> float:
+            if agg == "avg":
+                return round(p["sum"] / p["changes"], 4)
+            return round(p[agg], 4)
+
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "granularity": granularity,
+            "agg": agg,
+            "source": "rollup" if use_rollup else "raw",
+            "series": [
+                {
+                    "ingredient_id": s["ingredient_id"],
+                    "ingredient_name": s["ingredient_name"],
+                    "points": [
+                        {"period": period, "value": value(p), "changes": p["changes"]}
+                        for period, p in sorted(s["points"].items())
+                    ],
+                }
+                for s in series.values()
+            ],
+        }
@@ -2,15 +2,72 @@
 Production Service
 Handles logic for consolidating event orders into production plans and shopping lists.
 """
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from datetime import date
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any
 
 from app.models.event import Event, EventStatus
 from app.models.recipe import Recipe, RecipeItem, RecipeType
 from app.models.ingredient import Ingredient
+from app.services.recipe_service import RecipeService
+from app.services.unit_conversion_service import UnitConversionService
 
 class ProductionService:
+    @staticmethod
+    def load_plan_inputs(db: Session, start_date: date, end_date: date) -> Dict[str, Any]:
+        """
+        Bulk-load everything a plan over the date range needs: 4 queries in
+        total, however many events or levels of sub-recipes are involved.
+        
+        Returns {
+            "events": confirmed / in-progress events, with orders loaded,
+            "recipes": {recipe_id: Recipe} for ordered recipes and their trees,
+            "ingredients": {ingredient_id: Ingredient},
+            "conversions": UnitConversionService table,
+            "vectors": {recipe_id: _flatten_recipe vector} for ordered recipes
+        }
+        """
+        # 1. Fetch relevant events with their orders (2 queries)
+        events = db.query(Event).options(selectinload(Event.orders)).filter(
+            Event.event_date >= start_date,
+            Event.event_date <= end_date,
+            Event.status.in_([EventStatus.CONFIRMED, EventStatus.IN_PROGRESS])
+        ).order_by(Event.id).all()
+        
+        if not events:
+            return {"events": [], "recipes": {}, "ingredients": {}, "conversions": None, "vectors": {}}
+
+        # 2. Every ordered recipe and its sub-recipe tree, with items,
+        # ingredients and units (1 query, whatever the depth)
+        recipes: Dict[int, Recipe] = RecipeService.load_recipe_trees(
+            db, {order.recipe_id for event in events for order in event.orders}
+        )
+        
+        # 3. Unit conversion table: every quantity is summed in the
+        # ingredient's purchase unit, the unit stock is kept in (1 query)
+        ingredients: Dict[int, Ingredient] = {
+            item.ingredient_id: item.ingredient
+            for recipe in recipes.values()
+            for item in recipe.items
+            if item.ingredient_id and item.ingredient
+        }
+        conversions = UnitConversionService.load_table(db, ingredients.values())
+
+        # 4. Flatten each distinct ordered recipe once into per-yield-unit vectors
+        vectors: Dict[int, Dict] = {}
+        for event in events:
+            for order in event.orders:
+                if order.recipe_id in recipes:
+                    ProductionService._flatten_recipe(recipes[order.recipe_id], vectors, recipes, conversions)
+
+        return {
+            "events": events,
+            "recipes": recipes,
+            "ingredients": ingredients,
+            "conversions": conversions,
+            "vectors": vectors,
+        }
+
     @staticmethod
     def get_production_plan(db: Session, start_date: date, end_date: date) -> Dict[str, Any]:
         """
@@ -19,37 +76,87 @@ class ProductionService:
         - events: List of events included
         - ingredients: Aggregated list of ingredients needed
         - sub_recipes: Aggregated list of sub-recipes to prepare
+        
+        Each distinct recipe is flattened once into a per-yield-unit vector;
+        the plan is then the product of ordered quantities and those vectors.
+        Ingredient quantities are in each ingredient's purchase unit.
         """
-        # 1. Fetch relevant events
-        events = db.query(Event).filter(
-            Event.event_date >= start_date,
-            Event.event_date <= end_date,
-            Event.status.in_([EventStatus.CONFIRMED, EventStatus.IN_PROGRESS])
-        ).all()
+        inputs = ProductionService.load_plan_inputs(db, start_date, end_date)
+        events = inputs["events"]
+        recipes = inputs["recipes"]
+        ingredients = inputs["ingredients"]
+        conversions = inputs["conversions"]
+        vectors = inputs["vectors"]
         
         if not events:
             return {"events": [], "ingredients": [], "sub_recipes": []}
 
-        # 2. Initialize aggregators
+        # Demand vector: total quantity ordered per recipe, and which
+        # events (by position) order it
+        recipe_demand: Dict[int, float] = {}  # recipe_id -> yield units ordered
+        recipe_events: Dict[int, List[int]] = {}  # recipe_id -> event indexes
+        
+        for event_idx, event in enumerate(events):
+            for order in sorted(event.orders, key=lambda o: o.id):
+                if order.recipe_id not in recipes:
+                    continue
+                recipe_demand[order.recipe_id] = recipe_demand.get(order.recipe_id, 0.0) + order.quantity
+                event_idxs = recipe_events.setdefault(order.recipe_id, [])
+                if not event_idxs or event_idxs[-1] != event_idx:
+                    event_idxs.append(event_idx)
+        
+        # Sparse matrix-vector product: demand x recipe vectors
         ingredient_needs: Dict[int, Dict] = {} # ingredient_id -> {qty, details}
         sub_recipe_needs: Dict[int, Dict] = {} # recipe_id -> {qty, details}
+        ingredient_events: Dict[int, set] = {}
+        sub_recipe_events: Dict[int, set] = {}
         
-        # 3. Process each event
-        for event in events:
-            for order in event.orders:
-                recipe = order.recipe
-                if not recipe:
-                    continue
-                    
-                # Calculate total servings needed for this order
-                qty_needed = order.quantity
-                
-                # Recursive explosion of recipe
-                ProductionService._explode_recipe(
-                    db, recipe, qty_needed, ingredient_needs, sub_recipe_needs, event.name
-                )
+        for recipe_id, qty_needed in recipe_demand.items():
+            vector = vectors[recipe_id]
+            event_idxs = recipe_events[recipe_id]
+            
+            for sub_id, coef in vector["sub_recipes"].items():
+                if sub_id not in sub_recipe_needs:
+                    sub = recipes[sub_id]
+                    sub_recipe_needs[sub_id] = {
+                        "id": sub.id,
+                        "name": sub.name,
+                        "unit": sub.yield_unit.name if sub.yield_unit else "units",
+                        "total_quantity": 0.0,
+                        "events": []
+                    }
+                    sub_recipe_events[sub_id] = set()
+                sub_recipe_needs[sub_id]["total_quantity"] += qty_needed * coef
+                sub_recipe_events[sub_id].update(event_idxs)
+            
+            for ing_id, coef in vector["ingredients"].items():
+                if ing_id not in ingredient_needs:
+                    ing = ingredients[ing_id]
+                    ingredient_needs[ing_id] = {
+                        "id": ing.id,
+                        "name": ing.name,
+                        "sku": ing.sku,
+                        "category": ing.category,
+                        "unit": conversions["unit_names"][ing_id],
+                        "stock": ing.stock_quantity,
+                        "total_required": 0.0,
+                        "to_buy": 0.0,
+                        "events": []
+                    }
+                    ingredient_events[ing_id] = set()
+                ingredient_needs[ing_id]["total_required"] += qty_needed * coef
+                ingredient_events[ing_id].update(event_idxs)
+        
+        # Net against stock and list events in plan order
+        for ing_id, need in ingredient_needs.items():
+            need["to_buy"] = max(0.0, need["total_required"] - (need["stock"] or 0.0))
+            need["events"] = ProductionService._event_names(events, ingredient_events[ing_id])
+            need["event_ids"] = [events[idx].id for idx in sorted(ingredient_events[ing_id])]
+        for sub_id, need in sub_recipe_needs.items():
+            need["events"] = ProductionService._event_names(events, sub_recipe_events[sub_id])
+            need["event_ids"] = [events[idx].id for idx in sorted(sub_recipe_events[sub_id])]
 
-        # 4. Format output
+        # Format output
         return {
             "events": [
                 {"id": e.id, "name": e.name, "date": e.event_date, "guests": e.guest_count} 
@@ -60,81 +167,61 @@ class ProductionService:
         }
 
     @staticmethod
-    def _explode_recipe(
-        db: Session, 
-        recipe: Recipe, 
-        quantity_needed: float, 
-        ing_agg: Dict, 
-        sub_agg: Dict,
-        event_ref: str
-    ):
-        """
-        Recursively break down a recipe into ingredients and sub-recipes.
-        quantity_needed: Number of 'yield units' of this recipe needed (e.g. 50 portions)
+    def _event_names(events: List[Event], event_idxs: set) -> List[str]:
+        """Distinct event names, in plan order"""
+        names: List[str] = []
+        for idx in sorted(event_idxs):
+            if events[idx].name not in names:
+                names.append(events[idx].name)
+        return names
+
+    @staticmethod
+    def _flatten_recipe(
+        recipe: Recipe,
+        vectors: Dict[int, Dict],
+        recipes: Dict[int, Recipe],
+        conversions: Dict[str, Dict]
+    ) -> Dict:
         """
+        Flatten a recipe into sparse vectors per 1 yield unit, with sub-recipes
+        folded in. Memoized in `vectors`, so each recipe is walked only once
+        however many orders/events use it.
+        Ingredient quantities are converted to purchase units with the
+        UnitConversionService table.
         
-        # Base logic: How many "batches" of the recipe do we need?
-        # If recipe yields 10 portions and we need 50, we need 5 batches.
-        # However, 'quantity' in RecipeItem is usually per 1 unit of yield if yield_quantity=1
+        Returns {
+            "ingredients": {ingredient_id: purchase units per yield unit},
+            "sub_recipes": {recipe_id: yield units per yield unit}
+        }
+        Keys are in depth-first order: items in order, a sub-recipe's
+        contents where it is used.
+        """
+        if recipe.id in vectors:
+            return vectors[recipe.id]
         
-        # Let's assume standard catering model:
-        # Recipe defined for X portions (yield_quantity).
-        # We need Y portions.
-        # Scaling Factor = Y / X
+        vector = {"ingredients": {}, "sub_recipes": {}}
+        vectors[recipe.id] = vector
+        recipes[recipe.id] = recipe
         
         if recipe.yield_quantity == 0:
-            return
-
-        scaling_factor = quantity_needed / recipe.yield_quantity
+            return vector
         
-        # If this is a SUB_RECIPE (mise en place), track it as a production item itself
         if recipe.recipe_type == RecipeType.SUB_RECIPE:
-            if recipe.id not in sub_agg:
-                sub_agg[recipe.id] = {
-                    "id": recipe.id,
-                    "name": recipe.name,
-                    "unit": recipe.yield_unit.name if recipe.yield_unit else "units",
-                    "total_quantity": 0.0,
-                    "events": []
-                }
-            sub_agg[recipe.id]["total_quantity"] += quantity_needed
-            if event_ref not in sub_agg[recipe.id]["events"]:
-                sub_agg[recipe.id]["events"].append(event_ref)
-
-        # Process items
+            vector["sub_recipes"][recipe.id] = 1.0
+        
         for item in recipe.items:
-            # Scaled quantity for this item
-            item_qty = item.quantity * scaling_factor
+            coef = item.quantity / recipe.yield_quantity
             
             if item.ingredient_id:
-                # Aggregate Ingredient
                 ing_id = item.ingredient_id
-                if ing_id not in ing_agg:
-                    ing = item.ingredient
-                    ing_agg[ing_id] = {
-                        "id": ing.id,
-                        "name": ing.name,
-                        "sku": ing.sku,
-                        "category": ing.category,
-                        "unit": item.unit.name if item.unit else "units", # Assuming consistent units for MVP 
-                        "stock": ing.stock_quantity,
-                        "total_required": 0.0,
-                        "to_buy": 0.0,
-                        "events": []
-                    }
-                
-                ing_agg[ing_id]["total_required"] += item_qty
-                
-                # Logic to determine "To Buy"
-                net_needed = ing_agg[ing_id]["total_required"] - ing_agg[ing_id]["stock"]
-                ing_agg[ing_id]["to_buy"] = max(0.0, net_needed)
-                
-                if event_ref not in ing_agg[ing_id]["events"]:
-                    ing_agg[ing_id]["events"].append(event_ref)
-                    
+                coef *= UnitConversionService.to_purchase_factor(conversions, ing_id, item.unit_id)
+                vector["ingredients"][ing_id] = vector["ingredients"].get(ing_id, 0.0) + coef
+            
             elif item.child_recipe_id:
-                # Recursive call for Sub-Recipe
-                child = item.child_recipe
-                ProductionService._explode_recipe(
-                    db, child, item_qty, ing_agg, sub_agg, event_ref
-                )
+                child = ProductionService._flatten_recipe(item.child_recipe, vectors, recipes, conversions)
+                for ing_id, child_coef in child["ingredients"].items():
+                    vector["ingredients"][ing_id] = vector["ingredients"].get(ing_id, 0.0) + coef * child_coef
+                for sub_id, child_coef in child["sub_recipes"].items():
+                    vector["sub_recipes"][sub_id] = vector["sub_recipes"].get(sub_id, 0.0) + coef * child_coef
+        
+        return vector
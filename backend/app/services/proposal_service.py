@@ -3,6 +3,7 @@ Proposal Service
 Handles business logic for creating and managing proposals
 """
 from sqlalchemy.orm import Session, joinedload
+from app.core.pagination import paginate
 from app.models.proposal import Proposal
 from app.models.event import Event, EventStatus
 from fastapi import HTTPException
@@ -142,22 +143,28 @@ class ProposalService:
         db: Session,
         skip: int = 0,
         limit: int = 10,
-        event_id: Optional[int] = None
+        event_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        include_total: Optional[bool] = None
     ):
-        """List proposals with pagination"""
+        """List proposals with pagination (page offset or keyset cursor), newest first"""
         query = db.query(Proposal)
         
         if event_id:
             query = query.filter(Proposal.event_id == event_id)
         
-        total = query.count()
-        proposals = query.order_by(Proposal.generated_at.desc()).offset(skip).limit(limit).all()
+        page = paginate(
+            query, Proposal.generated_at, Proposal.id, limit, sort="generated_at",
+            descending=True, cursor=cursor, skip=skip, include_total=include_total
+        )
         
         return {
-            "items": proposals,
-            "total": total,
+            "items": page["items"],
+            "total": page["total"],
             "page": (skip // limit) + 1,
-            "size": limit
+            "size": limit,
+            "next_cursor": page["next_cursor"],
+            "has_more": page["has_more"]
         }
     
     @staticmethod
@@ -0,0 +1,275 @@
+"""
+Purchasing Service
+Turns the shopping list into per-supplier purchase orders.
+
+For every ingredient to buy, all available SupplierProduct offers are
+loaded in one indexed query. The solver then works in memory:
+
+1. Pick the offer with the lowest cost after rounding up to whole packages.
+2. Suppliers whose order falls below Supplier.minimum_order either move
+   their lines to the next best supplier (when that costs less than the
+   shortfall) or keep them and report the shortfall.
+3. Each order gets an order-by date: first event date needing it minus
+   Supplier.lead_time_days.
+
+Prices are compared as stored (one currency is assumed across suppliers).
+"""
+from sqlalchemy.orm import Session
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+import math
+
+from app.core.logging_config import get_logger
+from app.models.ingredient import Ingredient
+from app.models.supplier import Supplier, SupplierProduct
+from app.services.production_service import ProductionService
+from app.services.unit_conversion_service import UnitConversionService
+
+logger = get_logger(__name__)
+
+
+class PurchasingService:
+    @staticmethod
+    def load_offers(db: Session, ingredient_ids: List[int], conversions: Dict[str, Dict]) -> Dict[int, List[Dict]]:
+        """
+        Available offers from active suppliers, one query.
+        package_size is converted to the ingredient's purchase unit.
+
+        Returns {ingredient_id: [offer dict]}.
+        """
+        if not ingredient_ids:
+            return {}
+
+        rows = db.query(
+            SupplierProduct.id,
+            SupplierProduct.ingredient_id,
+            SupplierProduct.supplier_id,
+            SupplierProduct.supplier_sku,
+            SupplierProduct.price,
+            SupplierProduct.package_size,
+            SupplierProduct.package_unit_id,
+            Supplier.name.label("supplier_name"),
+            Supplier.currency_code,
+            Supplier.lead_time_days,
+            Supplier.minimum_order,
+        ).join(Supplier, Supplier.id == SupplierProduct.supplier_id).filter(
+            SupplierProduct.ingredient_id.in_(ingredient_ids),
+            SupplierProduct.is_available == 1,
+            Supplier.is_active == 1
+        ).all()
+
+        offers: Dict[int, List[Dict]] = {}
+        for row in rows:
+            package_size = row.package_size or 1.0
+            if row.package_unit_id is not None:
+                package_size *= UnitConversionService.to_purchase_factor(
+                    conversions, row.ingredient_id, row.package_unit_id
+                )
+            if package_size <= 0:
+                continue
+            offers.setdefault(row.ingredient_id, []).append({
+                "supplier_product_id": row.id,
+                "supplier_id": row.supplier_id,
+                "supplier_name": row.supplier_name,
+                "supplier_sku": row.supplier_sku,
+                "currency_code": row.currency_code,
+                "lead_time_days": row.lead_time_days or 0,
+                "minimum_order": row.minimum_order or 0.0,
+                "price": row.price,
+                "package_size": package_size,
+            })
+        return offers
+
+    @staticmethod
+    def quote(offer: Dict, quantity: float) -> Dict[str, float]:
+        """Whole packages covering quantity (purchase units) and their cost"""
+        packages = math.ceil(quantity / offer["package_size"] - 1e-9)
+        return {
+            "packages": packages,
+            "quantity": packages * offer["package_size"],
+            "cost": packages * offer["price"],
+        }
+
+    @staticmethod
+    def optimize(needs: List[Dict], offers: Dict[int, List[Dict]]) -> Dict[str, Any]:
+        """
+        Assign every need to a supplier (pure, no DB).
+
+        needs: [{"id", "to_buy", ...}] in purchase units
+        Returns {"assignments": {ingredient_id: (offer, quote)},
+                 "unsourced": [need], "below_minimum": {supplier_id: shortfall}}
+        """
+        ranked: Dict[int, List] = {}
+        unsourced: List[Dict] = []
+        for need in needs:
+            quotes = [
+                (offer, PurchasingService.quote(offer, need["to_buy"]))
+                for offer in offers.get(need["id"], [])
+            ]
+            if not quotes:
+                unsourced.append(need)
+                continue
+            quotes.sort(key=lambda q: (q[1]["cost"], q[0]["lead_time_days"], q[0]["supplier_id"]))
+            ranked[need["id"]] = quotes
+
+        assignments = {ing_id: quotes[0] for ing_id, quotes in ranked.items()}
+
+        def supplier_totals() -> Dict[int, float]:
+            totals: Dict[int, float] = {}
+            for offer, q in assignments.values():
+                totals[offer["supplier_id"]] = totals.get(offer["supplier_id"], 0.0) + q["cost"]
+            return totals
+
+        # Minimum orders: smallest shortfalls first, a supplier is dropped only
+        # if every line can move to a supplier that stays above its minimum
+        # and the extra cost is below the shortfall.
+        settled = set()
+        while True:
+            totals = supplier_totals()
+            minimums = {offer["supplier_id"]: offer["minimum_order"] for offer, _ in assignments.values()}
+            below = sorted(
+                (sid for sid, total in totals.items() if total < minimums[sid] and sid not in settled),
+                key=lambda sid: minimums[sid] - totals[sid]
+            )
+            if not below:
+                break
+
+            supplier_id = below[0]
+            shortfall = minimums[supplier_id] - totals[supplier_id]
+            moves = {}
+            extra = 0.0
+            for ing_id, (offer, q) in assignments.items():
+                if offer["supplier_id"] != supplier_id:
+                    continue
+                alternative = next((
+                    (alt, alt_q) for alt, alt_q in ranked[ing_id]
+                    if alt["supplier_id"] != supplier_id
+                    and alt["supplier_id"] not in settled
+                    and totals.get(alt["supplier_id"], 0.0) >= alt["minimum_order"]
+                ), None)
+                if alternative is None:
+                    moves = None
+                    break
+                moves[ing_id] = alternative
+                extra += alternative[1]["cost"] - q["cost"]
+
+            settled.add(supplier_id)
+            if moves is not None and extra < shortfall:
+                assignments.update(moves)
+
+        totals = supplier_totals()
+        below_minimum = {
+            offer["supplier_id"]: offer["minimum_order"] - totals[offer["supplier_id"]]
+            for offer, _ in assignments.values()
+            if totals[offer["supplier_id"]] < offer["minimum_order"]
+        }
+        return {"assignments": assignments, "unsourced": unsourced, "below_minimum": below_minimum}
+
+    @staticmethod
+    def get_purchase_orders(
+        db: Session,
+        start_date: date,
+        end_date: date,
+        today: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """
+        Shopping list for the period, solved into purchase orders.
+        Includes total spend and savings versus each ingredient's default supplier.
+        """
+        today = today or date.today()
+        plan = ProductionService.get_production_plan(db, start_date, end_date)
+        needs = [item for item in plan["ingredients"] if item["to_buy"] > 0]
+        ingredient_ids = [need["id"] for need in needs]
+
+        ingredients = {
+            row.id: row
+            for row in db.query(
+                Ingredient.id,
+                Ingredient.purchase_unit_id,
+                Ingredient.usage_unit_id,
+                Ingredient.conversion_ratio,
+                Ingredient.current_cost,
+                Ingredient.default_supplier_id,
+            ).filter(Ingredient.id.in_(ingredient_ids))
+        } if ingredient_ids else {}
+        conversions = UnitConversionService.load_table(db, ingredients.values())
+        offers = PurchasingService.load_offers(db, ingredient_ids, conversions)
+        solution = PurchasingService.optimize(needs, offers)
+
+        # First date each ingredient is needed
+        event_dates: Dict[int, date] = {event["id"]: event["date"] for event in plan["events"]}
+
+        orders: Dict[int, Dict] = {}
+        total_spend = 0.0
+        default_spend = 0.0
+        for need in needs:
+            assigned = solution["assignments"].get(need["id"])
+            if assigned is None:
+                continue
+            offer, q = assigned
+            need_by = min((event_dates[event_id] for event_id in need["event_ids"]), default=start_date)
+
+            order = orders.get(offer["supplier_id"])
+            if order is None:
+                order = orders[offer["supplier_id"]] = {
+                    "supplier_id": offer["supplier_id"],
+                    "supplier_name": offer["supplier_name"],
+                    "currency_code": offer["currency_code"],
+                    "lead_time_days": offer["lead_time_days"],
+                    "minimum_order": offer["minimum_order"],
+                    "minimum_order_met": offer["supplier_id"] not in solution["below_minimum"],
+                    "need_by": need_by,
+                    "order_by": None,
+                    "is_late": False,
+                    "total": 0.0,
+                    "lines": [],
+                }
+            order["need_by"] = min(order["need_by"], need_by)
+            order["total"] += q["cost"]
+            order["lines"].append({
+                "ingredient_id": need["id"],
+                "name": need["name"],
+                "sku": need["sku"],
+                "supplier_sku": offer["supplier_sku"],
+                "unit": need["unit"],
+                "to_buy": need["to_buy"],
+                "package_size": offer["package_size"],
+                "packages": q["packages"],
+                "quantity": q["quantity"],
+                "package_price": offer["price"],
+                "cost": q["cost"],
+                "need_by": need_by,
+            })
+            total_spend += q["cost"]
+
+            # Baseline: the default supplier's offer, when it has one
+            default_id = ingredients[need["id"]].default_supplier_id
+            default_offer = next(
+                (o for o in offers.get(need["id"], []) if o["supplier_id"] == default_id), None
+            )
+            default_spend += PurchasingService.quote(default_offer, need["to_buy"])["cost"] if default_offer else q["cost"]
+
+        for order in orders.values():
+            order["order_by"] = order["need_by"] - timedelta(days=order["lead_time_days"])
+            order["is_late"] = order["order_by"] < today
+
+        if solution["unsourced"]:
+            logger.warning(f"{len(solution['unsourced'])} ingredients have no available supplier offer")
+
+        return {
+            "period": {"start": start_date, "end": end_date},
+            "purchase_orders": sorted(orders.values(), key=lambda o: (o["order_by"], o["supplier_id"])),
+            "unsourced": [
+                {
+                    "ingredient_id": need["id"],
+                    "name": need["name"],
+                    "unit": need["unit"],
+                    "to_buy": need["to_buy"],
+                    "estimated_cost": need["to_buy"] * (ingredients[need["id"]].current_cost or 0.0),
+                }
+                for need in solution["unsourced"]
+            ],
+            "total_spend": total_spend,
+            "default_supplier_spend": default_spend,
+            "savings": default_spend - total_spend,
+        }
@@ -0,0 +1,209 @@
+"""
+Recipe Graph Service
+Maintains the recipe_closure table (ancestor, descendant, depth) for the
+sub-recipe DAG.
+
+With the closure in place:
+- cycle check on insert is a single primary-key lookup
+- "all sub-recipes of X" / "all dishes that use X" are single indexed queries
+- cost invalidation only touches the real dependents of a change
+"""
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.models.recipe import Recipe, RecipeItem, RecipeClosure
+
+
+class RecipeGraphService:
+    @staticmethod
+    def would_create_cycle(db: Session, parent_id: int, child_id: int) -> bool:
+        """
+        True if adding child_id as a sub-recipe of parent_id closes a cycle,
+        i.e. parent_id is child_id itself or already one of its descendants.
+        """
+        if parent_id == child_id:
+            return True
+        return db.get(RecipeClosure, (child_id, parent_id)) is not None
+
+    @staticmethod
+    def get_descendants(db: Session, recipe_id: int) -> Dict[int, int]:
+        """All sub-recipes of a recipe (any depth) -> {recipe_id: depth}"""
+        rows = db.query(RecipeClosure.descendant_id, RecipeClosure.depth).filter(
+            RecipeClosure.ancestor_id == recipe_id,
+            RecipeClosure.depth > 0
+        ).all()
+        return {row.descendant_id: row.depth for row in rows}
+
+    @staticmethod
+    def get_ancestors(db: Session, recipe_ids: Iterable[int]) -> Set[int]:
+        """All recipes that use any of the given recipes (any depth), excluding themselves"""
+        recipe_ids = list(set(recipe_ids))
+        if not recipe_ids:
+            return set()
+        rows = db.query(RecipeClosure.ancestor_id).filter(
+            RecipeClosure.descendant_id.in_(recipe_ids),
+            RecipeClosure.depth > 0
+        ).distinct().all()
+        return {row.ancestor_id for row in rows} - set(recipe_ids)
+
+    @staticmethod
+    def add_recipe(db: Session, recipe_id: int) -> None:
+        """Register a new recipe (its reflexive row)"""
+        if db.get(RecipeClosure, (recipe_id, recipe_id)) is None:
+            db.add(RecipeClosure(ancestor_id=recipe_id, descendant_id=recipe_id, depth=0))
+
+    @staticmethod
+    def add_edge(db: Session, parent_id: int, child_id: int) -> None:
+        """
+        Record that parent_id uses child_id. Every ancestor of the parent
+        gains every descendant of the child.
+        Callers must check would_create_cycle() first.
+        """
+        ancestors = {parent_id: 0}
+        for row in db.query(RecipeClosure.ancestor_id, RecipeClosure.depth).filter(
+            RecipeClosure.descendant_id == parent_id
+        ):
+            ancestors[row.ancestor_id] = row.depth
+
+        descendants = {child_id: 0}
+        for row in db.query(RecipeClosure.descendant_id, RecipeClosure.depth).filter(
+            RecipeClosure.ancestor_id == child_id
+        ):
+            descendants[row.descendant_id] = row.depth
+
+        existing = {
+            (row.ancestor_id, row.descendant_id): row
+            for row in db.query(RecipeClosure).filter(
+                RecipeClosure.ancestor_id.in_(list(ancestors)),
+                RecipeClosure.descendant_id.in_(list(descendants))
+            )
+        }
+
+        for ancestor_id, up in ancestors.items():
+            for descendant_id, down in descendants.items():
+                depth = up + 1 + down
+                row = existing.get((ancestor_id, descendant_id))
+                if row is None:
+                    db.add(RecipeClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth))
+                elif depth < row.depth:
+                    row.depth = depth
+
+        RecipeGraphService.add_recipe(db, parent_id)
+        RecipeGraphService.add_recipe(db, child_id)
+        db.flush()
+
+    @staticmethod
+    def remove_edge(db: Session, parent_id: int) -> None:
+        """
+        An item pointing to a sub-recipe was removed from parent_id.
+        Paths may survive through other items, so the closure rows of the
+        parent and its ancestors are recomputed from the remaining edges.
+        """
+        affected = RecipeGraphService.get_ancestors(db, [parent_id]) | {parent_id}
+        RecipeGraphService._recompute(db, affected)
+
+    @staticmethod
+    def remove_recipe(db: Session, recipe_id: int) -> None:
+        """A recipe is being deleted: drop its rows and fix up its ancestors"""
+        ancestors = RecipeGraphService.get_ancestors(db, [recipe_id])
+        db.query(RecipeClosure).filter(
+            (RecipeClosure.ancestor_id == recipe_id) | (RecipeClosure.descendant_id == recipe_id)
+        ).delete()
+        RecipeGraphService._recompute(db, ancestors, exclude={recipe_id})
+
+    @staticmethod
+    def _load_edges(
+        db: Session,
+        exclude: Set[int] = frozenset(),
+        roots: Optional[Iterable[int]] = None
+    ) -> Dict[int, Set[int]]:
+        """
+        Current parent -> {children} adjacency from recipe_items.
+        With roots, only the edges reachable from them (one recursive CTE
+        down recipe_items, not the closure: the roots' rows are being redone).
+        """
+        db.flush()
+        edges: Dict[int, Set[int]] = {}
+        rows = db.query(RecipeItem.parent_recipe_id, RecipeItem.child_recipe_id).filter(
+            RecipeItem.child_recipe_id.isnot(None)
+        )
+        if roots is not None:
+            reachable = select(Recipe.id.label("recipe_id")).where(
+                Recipe.id.in_(list(roots))
+            ).cte("reachable", recursive=True)
+            step = select(RecipeItem.child_recipe_id).join(
+                reachable, RecipeItem.parent_recipe_id == reachable.c.recipe_id
+            ).where(RecipeItem.child_recipe_id.isnot(None))
+            if exclude:
+                step = step.where(RecipeItem.child_recipe_id.notin_(list(exclude)))
+            reachable = reachable.union(step)
+            rows = rows.filter(RecipeItem.parent_recipe_id.in_(select(reachable.c.recipe_id)))
+        rows = rows.distinct()
+        for parent_id, child_id in rows:
+            if parent_id in exclude or child_id in exclude:
+                continue
+            edges.setdefault(parent_id, set()).add(child_id)
+        return edges
+
+    @staticmethod
+    def _closure_rows(edges: Dict[int, Set[int]], ancestor_id: int) -> List[Tuple[int, int, int]]:
+        """Breadth-first walk from one recipe -> [(ancestor, descendant, min depth)]"""
+        depths = {ancestor_id: 0}
+        frontier = [ancestor_id]
+        while frontier:
+            next_frontier = []
+            for node in frontier:
+                for child_id in edges.get(node, ()):
+                    if child_id not in depths:
+                        depths[child_id] = depths[node] + 1
+                        next_frontier.append(child_id)
+            frontier = next_frontier
+        return [(ancestor_id, descendant_id, depth) for descendant_id, depth in depths.items()]
+
+    @staticmethod
+    def _recompute(db: Session, ancestor_ids: Set[int], exclude: Set[int] = frozenset()) -> None:
+        """Rewrite all closure rows whose ancestor is in ancestor_ids"""
+        ancestor_ids = set(ancestor_ids) - set(exclude)
+        if not ancestor_ids:
+            return
+        edges = RecipeGraphService._load_edges(db, exclude, roots=ancestor_ids)
+        db.query(RecipeClosure).filter(
+            RecipeClosure.ancestor_id.in_(list(ancestor_ids))
+        ).delete()
+        rows = []
+        for ancestor_id in ancestor_ids:
+            rows.extend(RecipeGraphService._closure_rows(edges, ancestor_id))
+        db.bulk_insert_mappings(RecipeClosure, [
+            {"ancestor_id": a, "descendant_id": d, "depth": depth} for a, d, depth in rows
+        ])
+        db.flush()
+
+    @staticmethod
+    def find_cycles(db: Session) -> List[int]:
+        """Recipes that are their own descendant in recipe_items (pre-existing bad data)"""
+        edges = RecipeGraphService._load_edges(db)
+        cyclic = []
+        for recipe_id in edges:
+            for _, descendant_id, _ in RecipeGraphService._closure_rows(edges, recipe_id):
+                if recipe_id in edges.get(descendant_id, ()):
+                    cyclic.append(recipe_id)
+                    break
+        return sorted(cyclic)
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """
+        Rebuild the whole closure table from recipe_items.
+        Returns number of rows written.
+        """
+        db.query(RecipeClosure).delete(synchronize_session=False)
+        edges = RecipeGraphService._load_edges(db)
+        rows = []
+        for (recipe_id,) in db.query(Recipe.id):
+            rows.extend(RecipeGraphService._closure_rows(edges, recipe_id))
+        db.bulk_insert_mappings(RecipeClosure, [
+            {"ancestor_id": a, "descendant_id": d, "depth": depth} for a, d, depth in rows
+        ])
+        db.commit()
+        return len(rows)
@@ -1,10 +1,69 @@
+from sqlalchemy import Integer, literal, select
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 from app.models.recipe import Recipe, RecipeItem
 from app.models.ingredient import Ingredient
 from fastapi import HTTPException
+from typing import Dict, Iterable, Optional
 import math
 
 class RecipeService:
+    @staticmethod
+    def load_recipe_tree(db: Session, recipe_id: int) -> Optional[Recipe]:
+        """
+        Load a recipe and its whole sub-recipe tree in a single SQL statement
+        (see load_recipe_trees).
+        """
+        return RecipeService.load_recipe_trees(db, [recipe_id]).get(recipe_id)
+
+    @staticmethod
+    def load_recipe_trees(db: Session, recipe_ids: Iterable[int]) -> Dict[int, Recipe]:
+        """
+        Load several recipes and all their sub-recipes in a single SQL statement.
+
+        A WITH RECURSIVE CTE over recipe_items collects every recipe id in the
+        trees; the recipes are then fetched with their yield unit, items,
+        ingredients and units joined in, and every item.child_recipe is wired
+        to the loaded object, so total_cost / cost_per_portion afterwards issue
+        no further SQL.
+
+        Works on PostgreSQL and SQLite (both support recursive CTEs).
+        UNION (not UNION ALL) also stops the recursion on legacy cycles.
+
+        Returns {recipe_id: Recipe} for the roots and every sub-recipe.
+        Keep the dict alive while using the objects: the identity map only
+        holds weak references.
+        """
+        recipe_ids = list(set(recipe_ids))
+        if not recipe_ids:
+            return {}
+
+        if len(recipe_ids) == 1:
+            roots = select(literal(recipe_ids[0], Integer).label("id"))
+        else:
+            roots = select(Recipe.id.label("id")).where(Recipe.id.in_(recipe_ids))
+        tree = roots.cte("recipe_tree", recursive=True)
+        tree = tree.union(
+            select(RecipeItem.child_recipe_id)
+            .join(tree, RecipeItem.parent_recipe_id == tree.c.id)
+            .where(RecipeItem.child_recipe_id.isnot(None))
+        )
+
+        recipes = db.query(Recipe).options(
+            joinedload(Recipe.yield_unit),
+            joinedload(Recipe.items).joinedload(RecipeItem.ingredient),
+            joinedload(Recipe.items).joinedload(RecipeItem.unit)
+        ).filter(Recipe.id.in_(select(tree.c.id))).all()
+
+        # Wire item.child_recipe to the loaded objects
+        by_id = {r.id: r for r in recipes}
+        for r in recipes:
+            for item in r.items:
+                if item.child_recipe_id in by_id:
+                    set_committed_value(item, "child_recipe", by_id[item.child_recipe_id])
+
+        return by_id
+
     @staticmethod
     def scale_recipe(db: Session, recipe_id: int, target_quantity: float):
         """
@@ -14,11 +73,7 @@ class RecipeService:
             Linear: New = Old * Factor
             Logarithmic: New = Old * (Factor ^ 0.85)
         """
-        recipe = db.query(Recipe).options(
-            joinedload(Recipe.items).joinedload(RecipeItem.ingredient),
-            joinedload(Recipe.items).joinedload(RecipeItem.child_recipe),
-            joinedload(Recipe.items).joinedload(RecipeItem.unit)
-        ).filter(Recipe.id == recipe_id).first()
+        recipe = RecipeService.load_recipe_tree(db, recipe_id)
         
         if not recipe:
             raise HTTPException(status_code=404, detail="Recipe not found")
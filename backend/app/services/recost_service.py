@@ -0,0 +1,185 @@
+"""
+Recost Service
+Batch re-costing of event orders over a date range.
+
+1. One query selects every order of the matching events.
+2. Each distinct recipe is costed once (recipe_cost_cache, batch warm-up).
+3. Changed orders are updated with one UPDATE per recipe and get one
+   event_order_cost_audit row each (a single multi-row INSERT per chunk).
+4. Stored event totals and dashboard months are refreshed for the
+   affected events.
+
+Everything runs in one transaction. Jobs started in the background are
+tracked in an in-process registry (status, progress, result), so they are
+visible only to the worker that runs them and do not survive a restart.
+"""
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timezone
+from threading import Lock
+from typing import Any, Dict, List, Optional
+import uuid
+
+from app.core.logging_config import get_logger
+from app.models.event import Event, EventOrder, EventOrderCostAudit, EventStatus
+from app.services.cost_cache_service import RecipeCostCacheService
+from app.services.dashboard_service import DashboardRollupService
+from app.services.event_service import EventService
+
+logger = get_logger(__name__)
+
+DEFAULT_STATUSES = (EventStatus.PROSPECT, EventStatus.QUOTED, EventStatus.CONFIRMED)
+CHUNK_SIZE = 500
+TOLERANCE = 1e-9
+
+_jobs: Dict[str, Dict[str, Any]] = {}
+_jobs_lock = Lock()
+
+
+class RecostService:
+    @staticmethod
+    def _update_job(job_id: Optional[str], **fields) -> None:
+        if job_id is None:
+            return
+        with _jobs_lock:
+            _jobs[job_id].update(fields)
+
+    @staticmethod
+    def recost_events(
+        db: Session,
+        start_date: date,
+        end_date: date,
+        statuses: Optional[List[EventStatus]] = None,
+        dry_run: bool = False,
+        job_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Re-cost every order of the events in range with the current recipe
+        costs. unit_price_frozen is never touched.
+        With dry_run the changes are reported but nothing is written.
+        """
+        statuses = list(statuses or DEFAULT_STATUSES)
+
+        # 1. Orders in scope (1 query)
+        orders = db.query(
+            EventOrder.id, EventOrder.event_id, EventOrder.recipe_id, EventOrder.quantity,
+            EventOrder.cost_at_sale, Event.event_date
+        ).join(Event, Event.id == EventOrder.event_id).filter(
+            Event.event_date >= start_date,
+            Event.event_date <= end_date,
+            Event.status.in_(statuses)
+        ).order_by(EventOrder.recipe_id, EventOrder.id).all()
+
+        # 2. One cost per distinct recipe
+        recipe_ids = {row.recipe_id for row in orders}
+        costs = RecipeCostCacheService.get_costs(db, recipe_ids, commit=False)
+
+        changed: Dict[int, List[Any]] = {}
+        for row in orders:
+            new_cost = costs[row.recipe_id]["total_cost"] if row.recipe_id in costs else row.cost_at_sale
+            if abs(new_cost - row.cost_at_sale) > TOLERANCE:
+                changed.setdefault(row.recipe_id, []).append(row)
+        changed_count = sum(len(rows) for rows in changed.values())
+        RecostService._update_job(job_id, orders_total=changed_count, orders_done=0)
+
+        # 3. One UPDATE per recipe, audit rows per chunk
+        orders_table = EventOrder.__table__
+        audits: List[Dict[str, Any]] = []
+        done = 0
+        cost_delta = 0.0
+        for recipe_id, rows in changed.items():
+            new_cost = costs[recipe_id]["total_cost"]
+            cost_delta += sum((new_cost - row.cost_at_sale) * row.quantity for row in rows)
+            if not dry_run:
+                for start in range(0, len(rows), CHUNK_SIZE):
+                    chunk = rows[start:start + CHUNK_SIZE]
+                    db.execute(
+                        update(orders_table)
+                        .where(orders_table.c.id.in_([row.id for row in chunk]))
+                        .values(cost_at_sale=new_cost)
+                    )
+            audits.extend(
+                {
+                    "order_id": row.id,
+                    "event_id": row.event_id,
+                    "recipe_id": recipe_id,
+                    "old_cost": row.cost_at_sale,
+                    "new_cost": new_cost,
+                    "job_id": job_id,
+                }
+                for row in rows
+            )
+            done += len(rows)
+            if len(audits) >= CHUNK_SIZE or done == changed_count:
+                if not dry_run and audits:
+                    db.execute(insert(EventOrderCostAudit.__table__), audits)
+                audits = []
+                RecostService._update_job(job_id, orders_done=done)
+
+        # 4. Stored totals and dashboard months of the affected events
+        affected_events = {row.event_id for rows in changed.values() for row in rows}
+        if not dry_run:
+            EventService.refresh_order_totals(db, affected_events)
+            DashboardRollupService.mark_months_dirty(
+                db, {row.event_date for rows in changed.values() for row in rows}
+            )
+            db.commit()
+
+        logger.info(
+            f"Re-costed {changed_count} of {len(orders)} orders on {len(affected_events)} events"
+            f"{' (dry run)' if dry_run else ''}"
+        )
+        return {
+            "period": {"start": start_date, "end": end_date},
+            "statuses": [s.value for s in statuses],
+            "dry_run": dry_run,
+            "orders_checked": len(orders),
+            "recipes_costed": len(recipe_ids),
+            "orders_changed": changed_count,
+            "events_affected": len(affected_events),
+            "cost_delta": round(cost_delta, 2),
+        }
+
+    # ------------------------------------------------------------------
+    # Background jobs
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def create_job(params: Dict[str, Any]) -> Dict[str, Any]:
+        """Register a pending job and return its record"""
+        job_id = str(uuid.uuid4())
+        job = {
+            "job_id": job_id,
+            "status": "pending",
+            "params": params,
+            "orders_total": None,
+            "orders_done": 0,
+            "result": None,
+            "error": None,
+            "created_at": datetime.now(timezone.utc),
+            "finished_at": None,
+        }
+        with _jobs_lock:
+            _jobs[job_id] = job
+        return dict(job)
+
+    @staticmethod
+    def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+        with _jobs_lock:
+            job = _jobs.get(job_id)
+            return dict(job) if job else None
+
+    @staticmethod
+    def run_job(bind, job_id: str, **kwargs) -> None:
+        """Background task body: own session on the given engine/connection"""
+        RecostService._update_job(job_id, status="running")
+        db = Session(bind=bind)
+        try:
+            result = RecostService.recost_events(db, job_id=job_id, **kwargs)
+            RecostService._update_job(job_id, status="completed", result=result, finished_at=datetime.now(timezone.utc))
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Re-cost job {job_id} failed: {e}")
+            RecostService._update_job(job_id, status="failed", error=str(e), finished_at=datetime.now(timezone.utc))
+        finally:
+            db.close()
@@ -1,6 +1,13 @@
 from sqlalchemy.orm import Session
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+import csv
+import io
+
+from app.models.event import Event, EventOrder, EventStatus
 from app.models.ingredient import Ingredient
-from app.models.recipe import Recipe, RecipeItem
+from app.services.cost_cache_service import RecipeCostCacheService
+from app.services.costing_service import CostingService
 
 class SimulationService:
     @staticmethod
@@ -21,45 +28,39 @@ class SimulationService:
         if not affected_ingredient_ids:
             return {"message": f"No ingredients found in category '{category}'", "impacted_recipes": []}
 
-        # 2. Find Recipes using these ingredients
-        # This is a naive implementation. For massive DBs, we'd use a more optimized query.
-        impacted_recipes = []
+        # 2. The catalog flattened into a recipe x ingredient coefficient
+        # matrix (through every level of sub-recipes), reused until the cost
+        # cache changes; the price shock is then a single sparse multiply
+        # over the affected ingredient columns.
+        catalog = RecipeCostCacheService.get_catalog(db)
+        data, original_costs, columns = catalog["data"], catalog["costs"], catalog["columns"]
         
-        all_recipes = db.query(Recipe).all()
+        unit_cost_deltas = {}
+        for ing_id, new_cost in affected_ingredient_ids.items():
+            ing = data["ingredients"].get(ing_id)
+            if ing is None:
+                continue  # not used by any recipe
+            unit_cost_deltas[ing_id] = (
+                CostingService.real_cost_per_usage_unit(new_cost, ing.conversion_ratio, ing.yield_factor)
+                - CostingService.real_cost_per_usage_unit(ing.current_cost, ing.conversion_ratio, ing.yield_factor)
+            )
+        cost_deltas = CostingService.propagate_cost_deltas(columns, unit_cost_deltas)
         
-        for recipe in all_recipes:
-            original_cost = recipe.total_cost
-            new_cost = 0.0
-            
-            # Recalculate cost
-            # We need to traverse items. 
-            # Note: This simulation is shallow (doesn't recursively propagate sub-recipe changes efficiently yet)
-            # For MVP, we calculate direct ingredient impact.
-            
-            affected = False
-            simulated_items_cost = 0.0
-            
-            for item in recipe.items:
-                if item.ingredient_id in affected_ingredient_ids:
-                    # New cost for this item
-                    # Quantity * New_Price / Yield... 
-                    # We can approximate: ItemCost * Multiplier
-                    item_impact = item.item_cost * multiplier
-                    simulated_items_cost += item_impact
-                    affected = True
-                else:
-                    simulated_items_cost += item.item_cost
-            
-            if affected:
-                diff = simulated_items_cost - original_cost
-                impacted_recipes.append({
-                    "recipe_id": recipe.id,
-                    "recipe_name": recipe.name,
-                    "original_cost": round(original_cost, 2),
-                    "new_cost": round(simulated_items_cost, 2),
-                    "increase_amount": round(diff, 2),
-                    "increase_percentage": round((diff / original_cost * 100), 2) if original_cost > 0 else 0
-                })
+        impacted_recipes = []
+        
+        for recipe_id, diff in cost_deltas.items():
+            if diff == 0 or recipe_id not in original_costs:
+                continue
+            original_cost = original_costs[recipe_id]["total_cost"]
+            simulated_cost = original_cost + diff
+            impacted_recipes.append({
+                "recipe_id": recipe_id,
+                "recipe_name": data["recipes"][recipe_id].name,
+                "original_cost": round(original_cost, 2),
+                "new_cost": round(simulated_cost, 2),
+                "increase_amount": round(diff, 2),
+                "increase_percentage": round((diff / original_cost * 100), 2) if original_cost > 0 else 0
+            })
         
         # Sort by impact
         impacted_recipes.sort(key=lambda x: x['increase_amount'], reverse=True)
@@ -71,3 +72,216 @@ class SimulationService:
             "recipes_affected_count": len(impacted_recipes),
             "top_impacted_recipes": impacted_recipes[:20]
         }
+
+    @staticmethod
+    def _ingredients_by_category(db: Session, categories: Iterable[str]) -> Dict[str, List[int]]:
+        """{category: [ingredient_id]} for the given categories (1 query)"""
+        categories = set(categories)
+        result: Dict[str, List[int]] = {}
+        if categories:
+            for row in db.query(Ingredient.id, Ingredient.category).filter(Ingredient.category.in_(categories)):
+                result.setdefault(row.category, []).append(row.id)
+        return result
+
+    @staticmethod
+    def _shock_percentages(
+        ingredients_by_category: Dict[str, List[int]],
+        category_shocks: Dict[str, float],
+        ingredient_shocks: Dict[int, float]
+    ) -> Dict[int, float]:
+        """% change per ingredient; ingredient shocks override their category's"""
+        pct_by_ingredient: Dict[int, float] = {}
+        for category, pct in category_shocks.items():
+            for ing_id in ingredients_by_category.get(category, []):
+                pct_by_ingredient[ing_id] = pct
+        for ing_id, pct in ingredient_shocks.items():
+            pct_by_ingredient[int(ing_id)] = pct
+        return pct_by_ingredient
+
+    @staticmethod
+    def simulate_scenarios(db: Session, scenarios: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Evaluate several price-shock scenarios in one pass.
+
+        Each scenario: {"name", "category_shocks": {category: pct},
+        "ingredient_shocks": {ingredient_id: pct}} (ingredient shocks override
+        their category's). The flattened catalog is shared with the other
+        simulations (RecipeCostCacheService.get_catalog); each scenario is
+        one sparse multiply over the shocked columns.
+
+        Returns per-scenario summaries and a recipe x scenario matrix of
+        cost increases (rows: recipes impacted by at least one scenario).
+        """
+        catalog = RecipeCostCacheService.get_catalog(db)
+        data, original_costs, columns = catalog["data"], catalog["costs"], catalog["columns"]
+
+        unit_costs = {
+            ing_id: CostingService.real_cost_per_usage_unit(ing.current_cost, ing.conversion_ratio, ing.yield_factor)
+            for ing_id, ing in data["ingredients"].items()
+        }
+
+        ingredients_by_category = SimulationService._ingredients_by_category(
+            db, {c for s in scenarios for c in s.get("category_shocks", {})}
+        )
+
+        summaries = []
+        scenario_deltas: List[Dict[int, float]] = []
+        for scenario in scenarios:
+            pct_by_ingredient = SimulationService._shock_percentages(
+                ingredients_by_category,
+                scenario.get("category_shocks", {}),
+                scenario.get("ingredient_shocks", {})
+            )
+
+            deltas = CostingService.propagate_cost_deltas(columns, {
+                ing_id: unit_costs[ing_id] * pct / 100.0
+                for ing_id, pct in pct_by_ingredient.items()
+                if ing_id in unit_costs
+            })
+            deltas = {r: d for r, d in deltas.items() if d != 0 and r in original_costs}
+            scenario_deltas.append(deltas)
+
+            worst = max(deltas, key=deltas.get, default=None)
+            summaries.append({
+                "name": scenario["name"],
+                "ingredients_affected_count": len(pct_by_ingredient),
+                "recipes_affected_count": len(deltas),
+                "total_increase_amount": round(sum(deltas.values()), 2),
+                "max_increase": {
+                    "recipe_id": worst,
+                    "recipe_name": data["recipes"][worst].name,
+                    "increase_amount": round(deltas[worst], 2),
+                } if worst is not None else None,
+            })
+
+        impacted = sorted(set().union(*scenario_deltas), key=lambda r: data["recipes"][r].name)
+        matrix = []
+        for recipe_id in impacted:
+            original_cost = original_costs[recipe_id]["total_cost"]
+            increases = [deltas.get(recipe_id, 0.0) for deltas in scenario_deltas]
+            matrix.append({
+                "recipe_id": recipe_id,
+                "recipe_name": data["recipes"][recipe_id].name,
+                "original_cost": round(original_cost, 2),
+                "increase_amounts": [round(d, 2) for d in increases],
+                "increase_percentages": [
+                    round(d / original_cost * 100, 2) if original_cost > 0 else 0 for d in increases
+                ],
+            })
+
+        return {
+            "scenarios": summaries,
+            "recipes_count": len(original_costs),
+            "matrix": matrix,
+        }
+
+    @staticmethod
+    def scenarios_to_csv(result: Dict[str, Any]) -> str:
+        """Impact matrix as CSV: one row per recipe, new cost and % per scenario"""
+        output = io.StringIO()
+        writer = csv.writer(output)
+        header = ["recipe_id", "recipe_name", "original_cost"]
+        for scenario in result["scenarios"]:
+            header += [f"{scenario['name']} new_cost", f"{scenario['name']} increase_%"]
+        writer.writerow(header)
+
+        for row in result["matrix"]:
+            line = [row["recipe_id"], row["recipe_name"], row["original_cost"]]
+            for amount, pct in zip(row["increase_amounts"], row["increase_percentages"]):
+                line += [round(row["original_cost"] + amount, 2), pct]
+            writer.writerow(line)
+        return output.getvalue()
+
+    @staticmethod
+    def simulate_margin_at_risk(
+        db: Session,
+        start_date: date,
+        end_date: date,
+        statuses: Optional[List[EventStatus]] = None,
+        category_shocks: Optional[Dict[str, float]] = None,
+        ingredient_shocks: Optional[Dict[int, float]] = None
+    ) -> Dict[str, Any]:
+        """
+        Re-cost every order of the events in range (current prices, optionally
+        shocked by %) and compare with the frozen sale price and cost.
+        Events are ranked by margin erosion (frozen margin - simulated margin).
+
+        Costs use the same basis as EventOrder.cost_at_sale. Nothing is written:
+        use EventService.recalculate_event_financials to actually refresh an event.
+        """
+        statuses = statuses or [EventStatus.CONFIRMED, EventStatus.QUOTED]
+
+        # 1. All orders of the matching events (1 query)
+        rows = db.query(
+            Event.id, Event.name, Event.client_name, Event.event_date, Event.status,
+            EventOrder.recipe_id, EventOrder.quantity, EventOrder.unit_price_frozen, EventOrder.cost_at_sale
+        ).join(EventOrder, EventOrder.event_id == Event.id).filter(
+            Event.event_date >= start_date,
+            Event.event_date <= end_date,
+            Event.status.in_(statuses)
+        ).order_by(Event.event_date, Event.id).all()
+
+        # 2. Batch cost of every ordered recipe, under the shocked prices
+        recipe_ids = {row.recipe_id for row in rows}
+        data = CostingService.load_costing_data(db, recipe_ids)
+        pct_by_ingredient = SimulationService._shock_percentages(
+            SimulationService._ingredients_by_category(db, (category_shocks or {}).keys()),
+            category_shocks or {},
+            ingredient_shocks or {}
+        )
+        overrides = {
+            ing_id: (data["ingredients"][ing_id].current_cost or 0.0) * (1 + pct / 100.0)
+            for ing_id, pct in pct_by_ingredient.items()
+            if ing_id in data["ingredients"]
+        }
+        costs = CostingService.compute_costs_from_data(data, overrides) if recipe_ids else {}
+
+        # 3. Frozen vs simulated per event
+        events: Dict[int, Dict[str, Any]] = {}
+        for row in rows:
+            event = events.setdefault(row.id, {
+                "event_id": row.id,
+                "name": row.name,
+                "client_name": row.client_name,
+                "date": row.event_date,
+                "status": row.status.value if row.status else None,
+                "revenue": 0.0,
+                "frozen_cost": 0.0,
+                "simulated_cost": 0.0,
+            })
+            event["revenue"] += row.quantity * row.unit_price_frozen
+            event["frozen_cost"] += row.quantity * row.cost_at_sale
+            cost = costs.get(row.recipe_id)
+            event["simulated_cost"] += row.quantity * (cost["total_cost"] if cost else row.cost_at_sale)
+
+        def margin(revenue: float, cost: float) -> float:
+            return (revenue - cost) / revenue if revenue else 0.0
+
+        results = []
+        for event in events.values():
+            frozen_margin = margin(event["revenue"], event["frozen_cost"])
+            simulated_margin = margin(event["revenue"], event["simulated_cost"])
+            results.append({
+                **{k: v for k, v in event.items() if k not in ("revenue", "frozen_cost", "simulated_cost")},
+                "revenue": round(event["revenue"], 2),
+                "frozen_cost": round(event["frozen_cost"], 2),
+                "simulated_cost": round(event["simulated_cost"], 2),
+                "frozen_margin": round(frozen_margin * 100, 2),
+                "simulated_margin": round(simulated_margin * 100, 2),
+                "margin_erosion": round((frozen_margin - simulated_margin) * 100, 2),
+                "profit_change": round(event["frozen_cost"] - event["simulated_cost"], 2),
+                "is_unprofitable": event["simulated_cost"] > event["revenue"],
+            })
+        results.sort(key=lambda e: e["margin_erosion"], reverse=True)
+
+        return {
+            "period": {"start": start_date, "end": end_date},
+            "statuses": [s.value for s in statuses],
+            "ingredients_shocked_count": len(overrides),
+            "events_count": len(results),
+            "unprofitable_count": sum(1 for e in results if e["is_unprofitable"]),
+            "total_revenue": round(sum(e["revenue"] for e in results), 2),
+            "total_frozen_cost": round(sum(e["frozen_cost"] for e in results), 2),
+            "total_simulated_cost": round(sum(e["simulated_cost"] for e in results), 2),
+            "events": results,
+        }
@@ -0,0 +1,398 @@
+"""
+Supplier Import Service
+Streaming import of supplier price lists (CSV or XLSX).
+
+The file is read row by row (csv reader over the upload stream, openpyxl in
+read-only mode) and processed in batches of BATCH_SIZE rows, so memory stays
+bounded whatever the file size. Per batch:
+
+1. one query for the supplier's products by supplier_sku and one for the
+   ingredients by sku (or by the matched products' ingredient ids)
+2. one INSERT ... ON CONFLICT (supplier_id, supplier_sku) DO UPDATE for the
+   new or changed supplier products
+3. one executemany UPDATE of Ingredient.current_cost and one executemany
+   INSERT of price history, only for ingredients whose cost changed and
+   whose default supplier is the importing supplier
+
+Prices are per package; the ingredient cost is the price divided by the
+package size, converted to the purchase unit when the supplier product has
+a package_unit_id.
+
+Rows that cannot be parsed or matched are reported with their row number.
+The whole import is one transaction; recipe costs and the daily price
+rollup of the changed ingredients are refreshed once at the end.
+
+XLSX support needs the optional openpyxl package.
+"""
+from fastapi import HTTPException
+from sqlalchemy import bindparam, insert, or_, select, update
+from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+import csv
+import io
+import re
+
+from app.core.logging_config import get_logger
+from app.models.ingredient import Ingredient, IngredientPriceHistory
+from app.models.supplier import Supplier, SupplierProduct
+from app.services.cost_cache_service import RecipeCostCacheService
+from app.services.dashboard_service import DashboardRollupService
+from app.services.price_history_service import PriceHistoryService
+from app.services.unit_conversion_service import UnitConversionService
+
+logger = get_logger(__name__)
+
+BATCH_SIZE = 1000
+MAX_ERRORS = 1000
+TOLERANCE = 1e-9
+
+# Accepted header names (lower-case, accents/spaces normalized) per field
+COLUMN_ALIASES = {
+    "sku": ("sku", "codigo", "cod", "ingredient_sku"),
+    "supplier_sku": ("supplier_sku", "codigo_proveedor", "cod_proveedor", "sku_proveedor"),
+    "price": ("price", "precio", "cost", "costo", "current_cost"),
+    "package_size": ("package_size", "presentacion", "pack"),
+}
+
+
+def _normalize_header(value: Any) -> str:
+    text = str(value or "").strip().lower()
+    for accented, plain in (("á", "a"), ("é", "e"), ("í", "i"), ("ó", "o"), ("ú", "u")):
+        text = text.replace(accented, plain)
+    return re.sub(r"[\s\-/]+", "_", text)
+
+
+def parse_number(value: Any) -> Optional[float]:
+    """
+    Spreadsheet cell -> float. Strings may carry a currency sign and either
+    decimal separator ("1.234,50" and "1,234.50" are both 1234.5).
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = re.sub(r"[^\d,.\-]", "", str(value))
+    if "," in text and "." in text:
+        decimal = "," if text.rfind(",") > text.rfind(".") else "."
+        thousands = "." if decimal == "," else ","
+        text = text.replace(thousands, "").replace(decimal, ".")
+    elif "," in text:
+        text = text.replace(",", ".")
+    return float(text)
+
+
+class SupplierImportService:
+    @staticmethod
+    def map_columns(header: List[Any]) -> Dict[str, int]:
+        """Header row -> {field: column index}; 400 without a price or any SKU column"""
+        normalized = [_normalize_header(h) for h in header]
+        columns = {}
+        for field, aliases in COLUMN_ALIASES.items():
+            for alias in aliases:
+                if alias in normalized:
+                    columns[field] = normalized.index(alias)
+                    break
+        if "price" not in columns or not ({"sku", "supplier_sku"} & columns.keys()):
+            raise HTTPException(
+                status_code=400,
+                detail="Price list needs a price column and a sku or supplier_sku column"
+            )
+        return columns
+
+    @staticmethod
+    def iter_rows(stream: BinaryIO, filename: str, sheet: Optional[str] = None) -> Iterator[List[Any]]:
+        """Yield rows (header first) of a CSV or XLSX file without loading it whole"""
+        name = (filename or "").lower()
+        if name.endswith(".xlsx"):
+            try:
+                from openpyxl import load_workbook
+            except ImportError:
+                raise HTTPException(status_code=400, detail="XLSX import requires the openpyxl package")
+            workbook = load_workbook(stream, read_only=True, data_only=True)
+            try:
+                worksheet = workbook[sheet] if sheet else workbook.worksheets[0]
+                for row in worksheet.iter_rows(values_only=True):
+                    yield list(row)
+            finally:
+                workbook.close()
+        elif name.endswith(".csv"):
+            text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+            sample = text.read(4096)
+            text.seek(0)
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t") if sample else csv.excel
+            for row in csv.reader(text, dialect):
+                yield row
+        else:
+            raise HTTPException(status_code=400, detail="Unsupported file type (use .csv or .xlsx)")
+
+    @staticmethod
+    def import_price_list(
+        db: Session,
+        supplier_id: int,
+        rows: Iterator[List[Any]],
+        update_costs: bool = True,
+        dry_run: bool = False,
+        batch_size: int = BATCH_SIZE,
+        changed_by: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Import price list rows (header first) for a supplier.
+
+        Rows match an existing supplier product on supplier_sku, otherwise an
+        ingredient on sku (a missing supplier_sku defaults to the ingredient
+        sku). Supplier products are upserted; with update_costs the matched
+        ingredient's current_cost follows the imported price per purchase unit
+        (price / package size) when this supplier is the ingredient's default
+        supplier, and changes are logged to price history. Commits unless
+        dry_run.
+        """
+        supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
+        if not supplier:
+            raise HTTPException(status_code=404, detail="Supplier not found")
+
+        header = next(rows, None)
+        if header is None:
+            raise HTTPException(status_code=400, detail="Price list is empty")
+        columns = SupplierImportService.map_columns(header)
+
+        report = {
+            "supplier_id": supplier_id,
+            "dry_run": dry_run,
+            "rows_read": 0,
+            "rows_imported": 0,
+            "products_created": 0,
+            "products_updated": 0,
+            "ingredients_updated": 0,
+            "costs_skipped_not_default": 0,
+            "unchanged": 0,
+            "errors": [],
+            "errors_truncated": 0,
+        }
+        changed_ingredients: Set[int] = set()
+        changed_by = changed_by or f"Price list: {supplier.name}"[:100]
+        units = UnitConversionService.load_units(db)
+
+        def cell(row: List[Any], field: str) -> Any:
+            index = columns.get(field)
+            value = row[index] if index is not None and index < len(row) else None
+            return value.strip() if isinstance(value, str) else value
+
+        def error(row_number: int, message: str) -> None:
+            if len(report["errors"]) < MAX_ERRORS:
+                report["errors"].append({"row": row_number, "error": message})
+            else:
+                report["errors_truncated"] += 1
+
+        batch: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for row_number, row in enumerate(rows, start=2):
+            if not any(v not in (None, "") for v in row):
+                continue
+            report["rows_read"] += 1
+            sku = cell(row, "sku")
+            supplier_sku = cell(row, "supplier_sku")
+            sku = str(sku) if sku not in (None, "") else None
+            supplier_sku = str(supplier_sku) if supplier_sku not in (None, "") else None
+            try:
+                price = parse_number(cell(row, "price"))
+                package_size = parse_number(cell(row, "package_size"))
+            except ValueError:
+                error(row_number, "Price or package size is not a number")
+                continue
+            if not (sku or supplier_sku):
+                error(row_number, "Row has no SKU")
+                continue
+            if price is None or price < 0:
+                error(row_number, "Missing or negative price")
+                continue
+            if package_size is not None and package_size <= 0:
+                error(row_number, "Package size must be positive")
+                continue
+
+            # A later row for the same SKU replaces an earlier one
+            batch[(sku, supplier_sku)] = {
+                "row": row_number, "sku": sku, "supplier_sku": supplier_sku,
+                "price": price, "package_size": package_size,
+            }
+            if len(batch) >= batch_size:
+                SupplierImportService._import_batch(
+                    db, supplier_id, list(batch.values()), update_costs, dry_run, changed_by,
+                    report, changed_ingredients, error, units
+                )
+                batch = {}
+        if batch:
+            SupplierImportService._import_batch(
+                db, supplier_id, list(batch.values()), update_costs, dry_run, changed_by,
+                report, changed_ingredients, error, units
+            )
+
+        report["errors"].sort(key=lambda e: e["row"])
+        if dry_run:
+            db.rollback()
+        else:
+            if changed_ingredients:
+                RecipeCostCacheService.invalidate_ingredients(db, changed_ingredients)
+                PriceHistoryService.refresh_daily(db, changed_ingredients)
+                DashboardRollupService.mark_catalog_dirty(db)
+            db.commit()
+
+        logger.info(
+            f"Price list import for supplier {supplier_id}: {report['rows_imported']} of "
+            f"{report['rows_read']} rows, {report['ingredients_updated']} costs changed"
+            f"{' (dry run)' if dry_run else ''}"
+        )
+        return report
+
+    @staticmethod
+    def _import_batch(
+        db: Session,
+        supplier_id: int,
+        batch: List[Dict[str, Any]],
+        update_costs: bool,
+        dry_run: bool,
+        changed_by: str,
+        report: Dict[str, Any],
+        changed_ingredients: Set[int],
+        error,
+        units: Dict[int, Any]
+    ) -> None:
+        """Match and write one batch of parsed rows (constant number of statements)"""
+        skus = {r["sku"] for r in batch if r["sku"]}
+        # Products keyed by an ingredient sku are found under that sku too
+        supplier_skus = {r["supplier_sku"] for r in batch if r["supplier_sku"]} | skus
+        products = {
+            row.supplier_sku: row
+            for row in db.execute(
+                select(
+                    SupplierProduct.supplier_sku, SupplierProduct.ingredient_id,
+                    SupplierProduct.price, SupplierProduct.package_size, SupplierProduct.package_unit_id
+                ).where(
+                    SupplierProduct.supplier_id == supplier_id,
+                    SupplierProduct.supplier_sku.in_(supplier_skus)
+                )
+            )
+        }
+
+        product_ingredients = {p.ingredient_id for p in products.values()}
+        ingredients = db.execute(
+            select(
+                Ingredient.id, Ingredient.sku, Ingredient.current_cost, Ingredient.default_supplier_id,
+                Ingredient.purchase_unit_id, Ingredient.usage_unit_id, Ingredient.conversion_ratio
+            ).where(
+                or_(Ingredient.sku.in_(skus), Ingredient.id.in_(product_ingredients))
+            )
+        ).all()
+        by_sku = {row.sku: row for row in ingredients if row.sku}
+        by_id = {row.id: row for row in ingredients}
+        conversions = UnitConversionService.build_table(units, ingredients)
+
+        now = datetime.now(timezone.utc)
+        # Keyed like the ON CONFLICT target, so one statement never hits a product twice
+        upserts: Dict[str, Dict[str, Any]] = {}
+        cost_updates: Dict[int, Dict[str, Any]] = {}
+        for r in batch:
+            product = products.get(r["supplier_sku"]) if r["supplier_sku"] else None
+            if product is None and r["supplier_sku"] and not r["sku"]:
+                error(r["row"], f"Unknown supplier SKU {r['supplier_sku']}")
+                continue
+            ingredient = by_id.get(product.ingredient_id) if product else by_sku.get(r["sku"])
+            if ingredient is None:
+                error(r["row"], f"Unknown SKU {r['sku']}")
+                continue
+            report["rows_imported"] += 1
+
+            supplier_sku = r["supplier_sku"] or ingredient.sku
+            product = product or products.get(supplier_sku)
+            package_size = r["package_size"] if r["package_size"] is not None else (
+                product.package_size if product else 1.0
+            )
+            product_changed = product is None or abs(product.price - r["price"]) > TOLERANCE \
+                or abs((product.package_size or 1.0) - package_size) > TOLERANCE
+            if product_changed:
+                if supplier_sku not in upserts:
+                    report["products_created" if product is None else "products_updated"] += 1
+                upserts[supplier_sku] = {
+                    "supplier_id": supplier_id, "ingredient_id": ingredient.id, "supplier_sku": supplier_sku,
+                    "price": r["price"], "package_size": package_size, "is_available": 1, "last_updated": now,
+                }
+
+            # Package price -> cost per purchase unit
+            purchase_units = package_size
+            if product is not None and product.package_unit_id is not None:
+                purchase_units *= UnitConversionService.to_purchase_factor(
+                    conversions, ingredient.id, product.package_unit_id
+                )
+            unit_cost = r["price"] / purchase_units
+            cost_changed = update_costs and abs(ingredient.current_cost - unit_cost) > TOLERANCE
+            if cost_changed and ingredient.default_supplier_id != supplier_id:
+                report["costs_skipped_not_default"] += 1
+                cost_changed = False
+            if cost_changed:
+                cost_updates[ingredient.id] = {
+                    "b_id": ingredient.id, "b_old": ingredient.current_cost, "b_new": unit_cost,
+                }
+            if not (product_changed or cost_changed):
+                report["unchanged"] += 1
+
+        report["ingredients_updated"] += len(cost_updates.keys() - changed_ingredients)
+        changed_ingredients.update(cost_updates)
+        if dry_run:
+            return
+
+        if upserts:
+            SupplierImportService._upsert_products(db, list(upserts.values()))
+        if cost_updates:
+            table = Ingredient.__table__
+            db.execute(
+                update(table).where(table.c.id == bindparam("b_id")).values(current_cost=bindparam("b_new")),
+                list(cost_updates.values())
+            )
+            db.execute(insert(IngredientPriceHistory.__table__), [
+                {"ingredient_id": u["b_id"], "old_cost": u["b_old"], "new_cost": u["b_new"], "changed_by": changed_by}
+                for u in cost_updates.values()
+            ])
+
+    @staticmethod
+    def _upsert_products(db: Session, rows: List[Dict[str, Any]]) -> None:
+        """INSERT ... ON CONFLICT (supplier_id, supplier_sku) DO UPDATE for a batch"""
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            # No ON CONFLICT: rows were matched in this transaction, so split
+            # into updates of existing keys and inserts of new ones
+            table = SupplierProduct.__table__
+            existing = {
+                (row.supplier_id, row.supplier_sku)
+                for row in db.execute(select(table.c.supplier_id, table.c.supplier_sku).where(
+                    table.c.supplier_id == rows[0]["supplier_id"],
+                    table.c.supplier_sku.in_([r["supplier_sku"] for r in rows])
+                ))
+            }
+            updates = [r for r in rows if (r["supplier_id"], r["supplier_sku"]) in existing]
+            inserts = [r for r in rows if (r["supplier_id"], r["supplier_sku"]) not in existing]
+            if updates:
+                db.execute(
+                    update(table).where(
+                        table.c.supplier_id == bindparam("b_supplier"), table.c.supplier_sku == bindparam("b_sku")
+                    ).values(price=bindparam("b_price"), package_size=bindparam("b_size"), last_updated=bindparam("b_now")),
+                    [{"b_supplier": r["supplier_id"], "b_sku": r["supplier_sku"], "b_price": r["price"],
+                      "b_size": r["package_size"], "b_now": r["last_updated"]} for r in updates]
+                )
+            if inserts:
+                db.execute(insert(table), inserts)
+            return
+
+        statement = dialect_insert(SupplierProduct.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=["supplier_id", "supplier_sku"],
+            set_={
+                "price": statement.excluded.price,
+                "package_size": statement.excluded.package_size,
+                "is_available": statement.excluded.is_available,
+                "last_updated": statement.excluded.last_updated,
+            },
+        )
+        db.execute(statement, rows)
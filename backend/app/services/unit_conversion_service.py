@@ -0,0 +1,89 @@
+"""
+Unit Conversion Service
+Converts recipe quantities into each ingredient's purchase unit.
+
+Built on Unit.conversion_to_base (within a UnitCategory) and
+Ingredient.conversion_ratio (purchase unit -> usage unit). The table is
+computed once per request; lookups afterwards are plain dict reads.
+"""
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Iterable, Optional
+
+from app.core.logging_config import get_logger
+from app.models.unit import Unit
+
+logger = get_logger(__name__)
+
+
+class UnitConversionService:
+    @staticmethod
+    def load_units(db: Session) -> Dict[int, Any]:
+        """All units -> {unit_id: row(id, name, category_id, conversion_to_base)}"""
+        rows = db.query(Unit.id, Unit.name, Unit.category_id, Unit.conversion_to_base).all()
+        return {row.id: row for row in rows}
+
+    @staticmethod
+    def build_table(units: Dict[int, Any], ingredients: Iterable[Any]) -> Dict[str, Dict]:
+        """
+        Precompute, for every ingredient, the factor turning 1 of any
+        compatible unit into purchase units.
+
+        - the purchase unit itself: 1
+        - the usage unit: 1 / conversion_ratio
+        - other units of the usage unit's category: via conversion_to_base,
+          then conversion_ratio
+        - other units of the purchase unit's category: via conversion_to_base
+
+        Incompatible units fall back to the usage unit (as costing does).
+
+        Returns {
+            "factors": {ingredient_id: {unit_id: factor}},
+            "fallback": {ingredient_id: factor},
+            "unit_names": {ingredient_id: purchase unit name}
+        }
+        """
+        factors: Dict[int, Dict[int, float]] = {}
+        fallback: Dict[int, float] = {}
+        unit_names: Dict[int, str] = {}
+
+        for ing in ingredients:
+            if ing.id in factors:
+                continue
+            ratio = ing.conversion_ratio or 1.0
+            purchase = units.get(ing.purchase_unit_id)
+            usage = units.get(ing.usage_unit_id)
+
+            table: Dict[int, float] = {}
+            if usage and usage.conversion_to_base:
+                for unit in units.values():
+                    if unit.category_id == usage.category_id:
+                        table[unit.id] = unit.conversion_to_base / usage.conversion_to_base / ratio
+            if purchase and purchase.conversion_to_base:
+                for unit in units.values():
+                    if unit.category_id == purchase.category_id:
+                        table[unit.id] = unit.conversion_to_base / purchase.conversion_to_base
+            table[ing.usage_unit_id] = 1.0 / ratio
+            table[ing.purchase_unit_id] = 1.0
+
+            factors[ing.id] = table
+            fallback[ing.id] = 1.0 / ratio
+            unit_names[ing.id] = purchase.name if purchase else "units"
+
+        return {"factors": factors, "fallback": fallback, "unit_names": unit_names}
+
+    @staticmethod
+    def to_purchase_factor(table: Dict[str, Dict], ingredient_id: int, unit_id: Optional[int]) -> float:
+        """Factor from unit_id to the ingredient's purchase unit (see build_table)"""
+        factor = table["factors"][ingredient_id].get(unit_id)
+        if factor is None:
+            logger.warning(
+                f"Unit {unit_id} is not convertible for ingredient {ingredient_id}, "
+                f"assuming its usage unit"
+            )
+            return table["fallback"][ingredient_id]
+        return factor
+
+    @staticmethod
+    def load_table(db: Session, ingredients: Iterable[Any]) -> Dict[str, Dict]:
+        """load_units + build_table (1 query)"""
+        return UnitConversionService.build_table(UnitConversionService.load_units(db), ingredients)
@@ -0,0 +1,62 @@
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+
+# Ensure we can import app modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Load env vars explicitly
+env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+load_dotenv(env_path)
+
+from app.core.database import SessionLocal
+from app.services.planilla_import_service import PlanillaImportService
+from app.services.supplier_import_service import SupplierImportService
+
+
+def import_planilla():
+    """
+    Load a PlanillaLEO costing workbook (e.g. DATA/PlanillaLEO/*.xlsx) into
+    ingredients and recipes. Needs openpyxl.
+    Run with --dry-run to only compare computed costs with the sheet.
+    """
+    parser = argparse.ArgumentParser(description="Import a PlanillaLEO costing workbook")
+    parser.add_argument("path")
+    parser.add_argument("--name", help="Menu recipe name (default: 'Menu <file name>')")
+    parser.add_argument("--sheet", default="Menu")
+    parser.add_argument("--no-waste", action="store_true", help="Ignore the sheet's waste rows (yield_factor 1)")
+    parser.add_argument("--dry-run", action="store_true", help="Report cost differences without writing")
+    args = parser.parse_args()
+    name = args.name or f"Menu {os.path.splitext(os.path.basename(args.path))[0]}"
+
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as stream:
+            rows = SupplierImportService.iter_rows(stream, args.path, sheet=args.sheet)
+            report = PlanillaImportService.import_workbook(
+                db, rows, name, apply_waste=not args.no_waste, dry_run=args.dry_run
+            )
+        print(
+            f"{name}: {report['ingredients_created']} ingredients created ({report['ingredients_existing']} existing), "
+            f"{report['recipes_created']} recipes created ({report['recipes_existing']} existing), "
+            f"{report['items_created']} items{' (dry run)' if args.dry_run else ''}"
+        )
+        for section in report["skipped_sections"]:
+            print(f"  skipped section {section['section']} (sheet total {section['sheet_total']})")
+        for err in report["errors"]:
+            print(f"  row {err['row']}: {err['error']}")
+        print("Cost check (computed vs sheet):")
+        for cost in report["costs"]:
+            print(
+                f"  {cost['recipe']:<30} {cost['computed_cost']:>12.2f} vs {cost['sheet_cost']:>12.2f} "
+                f"({cost['difference']:+.2f}, {cost['basis']})"
+            )
+    except Exception as e:
+        print(f"Import failed: {e}")
+        raise e
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    import_planilla()
@@ -0,0 +1,56 @@
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+
+# Ensure we can import app modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Load env vars explicitly
+env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+load_dotenv(env_path)
+
+from app.core.database import SessionLocal
+from app.services.supplier_import_service import BATCH_SIZE, SupplierImportService
+
+
+def import_price_list():
+    """
+    Import a supplier price list (CSV or XLSX) from the command line.
+    Same streaming, batched upsert as POST /suppliers/{id}/price-list.
+    """
+    parser = argparse.ArgumentParser(description="Import a supplier price list")
+    parser.add_argument("supplier_id", type=int)
+    parser.add_argument("path")
+    parser.add_argument("--sheet", help="XLSX sheet name (default: first sheet)")
+    parser.add_argument("--no-cost-update", action="store_true", help="Only update supplier products (never ingredient costs)")
+    parser.add_argument("--dry-run", action="store_true", help="Validate and report without writing")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as stream:
+            rows = SupplierImportService.iter_rows(stream, args.path, sheet=args.sheet)
+            report = SupplierImportService.import_price_list(
+                db, args.supplier_id, rows,
+                update_costs=not args.no_cost_update, dry_run=args.dry_run, batch_size=args.batch_size
+            )
+        print(
+            f"Rows read: {report['rows_read']}, imported: {report['rows_imported']}, "
+            f"products created/updated: {report['products_created']}/{report['products_updated']}, "
+            f"ingredient costs changed: {report['ingredients_updated']}"
+            f"{' (dry run)' if args.dry_run else ''}"
+        )
+        for err in report["errors"]:
+            print(f"  row {err['row']}: {err['error']}")
+        if report["errors_truncated"]:
+            print(f"  ... {report['errors_truncated']} more errors")
+    except Exception as e:
+        print(f"Import failed: {e}")
+        raise e
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    import_price_list()
@@ -0,0 +1,46 @@
+import os
+import sys
+from dotenv import load_dotenv
+
+# Ensure we can import app modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Load env vars explicitly
+env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+load_dotenv(env_path)
+
+from app.core.database import engine, SessionLocal
+from app.db.base import RecipeCostCache
+from app.services.cost_cache_service import RecipeCostCacheService
+
+
+def migrate_cost_cache():
+    """
+    Create the recipe_cost_cache table (if missing) and fill it.
+    Run with --check to only compare the cache against a full recompute.
+    """
+    if "--check" not in sys.argv:
+        print("Migrating: Creating 'recipe_cost_cache' table...")
+        RecipeCostCache.__table__.create(bind=engine, checkfirst=True)
+
+    db = SessionLocal()
+    try:
+        if "--check" not in sys.argv:
+            print("Computing costs for all recipes...")
+            count = RecipeCostCacheService.rebuild(db)
+            print(f"Migration successful: cached costs for {count} recipes.")
+
+        report = RecipeCostCacheService.check_consistency(db)
+        print(
+            f"Consistency: {'OK' if report['consistent'] else 'DRIFT'} "
+            f"({report['recipes_checked']} recipes, {len(report['stale'])} stale values, "
+            f"{len(report['missing'])} missing, {len(report['orphans'])} orphans)"
+        )
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        raise e
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    migrate_cost_cache()
@@ -0,0 +1,40 @@
+import os
+import sys
+from dotenv import load_dotenv
+
+# Ensure we can import app modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Load env vars explicitly
+env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+load_dotenv(env_path)
+
+from app.core.database import engine, SessionLocal
+from app.db.base import DashboardRollup, Recipe
+from app.services.cost_cache_service import RecipeCostCacheService
+from app.services.dashboard_service import DashboardRollupService
+
+
+def migrate_dashboard_rollup():
+    """
+    Create the dashboard_rollup table (if missing) and rebuild it from scratch.
+    Safe to re-run at any time to repair the rollup.
+    """
+    print("Migrating: Creating 'dashboard_rollup' table...")
+    DashboardRollup.__table__.create(bind=engine, checkfirst=True)
+
+    db = SessionLocal()
+    try:
+        # Recipe cost figures are read from recipe_cost_cache: warm any missing rows
+        RecipeCostCacheService.get_costs(db, [row.id for row in db.query(Recipe.id)])
+
+        count = DashboardRollupService.rebuild(db)
+        print(f"Migration successful: wrote {count} monthly rollup rows.")
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        raise e
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    migrate_dashboard_rollup()
@@ -0,0 +1,53 @@
+import os
+import sys
+from dotenv import load_dotenv
+from sqlalchemy import inspect, text
+
+# Ensure we can import app modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Load env vars explicitly
+env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+load_dotenv(env_path)
+
+from app.core.database import engine, SessionLocal
+from app.db.base import Event
+from app.services.event_service import EventService
+
+
+def migrate_event_totals():
+    """
+    Add the stored order totals to events (if missing) and backfill them.
+    Run with --check to only report drift between stored totals and orders.
+    """
+    if "--check" not in sys.argv:
+        print("Migrating: Adding order total columns to events table...")
+        existing = {column["name"] for column in inspect(engine).get_columns("events")}
+        with engine.begin() as conn:
+            for column in ("orders_total_cost", "orders_total_revenue"):
+                if column in existing:
+                    print(f"  {column}: already exists")
+                    continue
+                conn.execute(text(f"ALTER TABLE events ADD COLUMN {column} FLOAT NOT NULL DEFAULT 0"))
+                print(f"  {column}: added")
+
+    db = SessionLocal()
+    try:
+        if "--check" not in sys.argv:
+            print("Backfilling totals from event_orders...")
+            EventService.refresh_order_totals(db, [row.id for row in db.query(Event.id)])
+            db.commit()
+
+        report = EventService.check_order_totals(db)
+        print(
+            f"Consistency: {'OK' if report['consistent'] else 'DRIFT'} "
+            f"({report['events_checked']} events, {len(report['drift'])} drifted values)"
+        )
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        raise e
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    migrate_event_totals()
@@ -0,0 +1,44 @@
+import os
+import sys
+from dotenv import load_dotenv
+from sqlalchemy import inspect, text
+
+# Ensure we can import app modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Load env vars explicitly
+env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+load_dotenv(env_path)
+
+from app.core.database import engine
+
+
+def migrate_order_created_at():
+    """
+    Add created_at to event_orders (if missing) and backfill existing orders
+    with their event's creation time, the closest known costing instant.
+    SQLite cannot add a column with a non-constant default, so there new
+    rows rely on the fallback to the event's creation time instead.
+    """
+    print("Migrating: Adding created_at to event_orders table...")
+    existing = {column["name"] for column in inspect(engine).get_columns("event_orders")}
+    with engine.begin() as conn:
+        if "created_at" in existing:
+            print("  created_at: already exists")
+        elif engine.dialect.name == "postgresql":
+            conn.execute(text("ALTER TABLE event_orders ADD COLUMN created_at TIMESTAMP WITH TIME ZONE DEFAULT now()"))
+            print("  created_at: added")
+        else:
+            conn.execute(text("ALTER TABLE event_orders ADD COLUMN created_at DATETIME"))
+            print("  created_at: added (no default)")
+
+        print("Backfilling created_at from events...")
+        result = conn.execute(text(
+            "UPDATE event_orders SET created_at = "
+            "(SELECT events.created_at FROM events WHERE events.id = event_orders.event_id) "
+            "WHERE created_at IS NULL"
+        ))
+        print(f"Migration successful. {result.rowcount} orders backfilled.")
+
+if __name__ == "__main__":
+    migrate_order_created_at()
@@ -0,0 +1,43 @@
+import os
+import sys
+from dotenv import load_dotenv
+
+# Ensure we can import app modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Load env vars explicitly
+env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+load_dotenv(env_path)
+
+from app.core.database import engine, SessionLocal
+from app.db.base import IngredientPriceDaily, IngredientPriceHistory
+from app.services.price_history_service import PriceHistoryService
+
+
+def migrate_price_history():
+    """
+    Create the ingredient_price_history indexes and the ingredient_price_daily
+    rollup table (if missing), then rebuild the rollup from the raw history.
+    Safe to re-run; also use it after back-dating history rows.
+    """
+    print("Migrating: Creating price history indexes and daily rollup...")
+    db = SessionLocal()
+    try:
+        for index in IngredientPriceHistory.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+            print(f"  {index.name}: OK")
+        IngredientPriceDaily.__table__.create(bind=engine, checkfirst=True)
+        print(f"  {IngredientPriceDaily.__tablename__}: OK")
+
+        print("Rebuilding daily rollup...")
+        days = PriceHistoryService.refresh_daily(db, rebuild=True)
+        db.commit()
+        print(f"Migration successful. {days} ingredient-days rolled up.")
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        raise e
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    migrate_price_history()
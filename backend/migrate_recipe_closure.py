@@ -0,0 +1,40 @@
+import os
+import sys
+from dotenv import load_dotenv
+
+# Ensure we can import app modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Load env vars explicitly
+env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+load_dotenv(env_path)
+
+from app.core.database import engine, SessionLocal
+from app.db.base import RecipeClosure
+from app.services.recipe_graph_service import RecipeGraphService
+
+
+def migrate_recipe_closure():
+    """
+    Create the recipe_closure table (if missing) and rebuild it from recipe_items.
+    Safe to re-run at any time to repair the closure.
+    """
+    print("Migrating: Creating 'recipe_closure' table...")
+    RecipeClosure.__table__.create(bind=engine, checkfirst=True)
+
+    db = SessionLocal()
+    try:
+        cyclic = RecipeGraphService.find_cycles(db)
+        if cyclic:
+            print(f"WARNING: recipes involved in sub-recipe cycles: {cyclic}. Fix them before costing.")
+
+        count = RecipeGraphService.rebuild(db)
+        print(f"Migration successful: wrote {count} closure rows.")
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        raise e
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    migrate_recipe_closure()
@@ -0,0 +1,29 @@
+import os
+import sys
+from dotenv import load_dotenv
+from sqlalchemy import inspect
+
+# Ensure we can import app modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Load env vars explicitly
+env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+load_dotenv(env_path)
+
+from app.core.database import engine
+from app.db.base import EventOrderCostAudit
+
+
+def migrate_recost_audit():
+    """
+    Create the event_order_cost_audit table written by re-cost jobs (if missing).
+    """
+    print("Migrating: Creating event_order_cost_audit table...")
+    if inspect(engine).has_table(EventOrderCostAudit.__tablename__):
+        print("  event_order_cost_audit: already exists")
+        return
+    EventOrderCostAudit.__table__.create(bind=engine)
+    print("  event_order_cost_audit: created")
+
+if __name__ == "__main__":
+    migrate_recost_audit()
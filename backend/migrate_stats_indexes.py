@@ -0,0 +1,33 @@
+import os
+import sys
+from dotenv import load_dotenv
+
+# Ensure we can import app modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Load env vars explicitly
+env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+load_dotenv(env_path)
+
+from app.core.database import engine
+from app.db.base import Event, EventOrder
+
+
+def migrate_stats_indexes():
+    """
+    Create the events / event_orders indexes used by the stats time series.
+    Safe to re-run.
+    """
+    print("Migrating: Creating events and event_orders indexes...")
+    try:
+        for table in (Event.__table__, EventOrder.__table__):
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
+                print(f"  {index.name}: OK")
+        print("Migration successful.")
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        raise e
+
+if __name__ == "__main__":
+    migrate_stats_indexes()
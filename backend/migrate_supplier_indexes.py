@@ -0,0 +1,34 @@
+import os
+import sys
+from dotenv import load_dotenv
+
+# Ensure we can import app modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Load env vars explicitly
+env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+load_dotenv(env_path)
+
+from app.core.database import engine
+from app.db.base import SupplierProduct
+
+
+def migrate_supplier_indexes():
+    """
+    Create the supplier_products indexes used by the purchase optimizer
+    and the unique (supplier_id, supplier_sku) index used by the price list
+    import (fails if a supplier has duplicate SKUs; dedupe those first).
+    Safe to re-run.
+    """
+    print("Migrating: Creating supplier_products indexes...")
+    try:
+        for index in SupplierProduct.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+            print(f"  {index.name}: OK")
+        print("Migration successful.")
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        raise e
+
+if __name__ == "__main__":
+    migrate_supplier_indexes()
@@ -4,7 +4,7 @@ Pytest configuration and shared fixtures for testing
 import pytest
 from datetime import date, timedelta
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event as sa_event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
@@ -15,6 +15,7 @@ from app.models.ingredient import Ingredient
 from app.models.recipe import Recipe, RecipeItem, RecipeType
 from app.models.event import Event, EventOrder, EventStatus
 from app.models.supplier import Supplier
+from app.services.event_service import EventService
 
 
 # Use in-memory SQLite for testing
@@ -26,6 +27,24 @@ engine = create_engine(
     poolclass=StaticPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+EventService.register_session_hooks(TestingSessionLocal)
+
+
+class QueryCounter:
+    """Counts SQL statements executed on the test engine"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        sa_event.listen(engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        sa_event.remove(engine, "before_cursor_execute", self)
 
 
 @pytest.fixture(scope="function")
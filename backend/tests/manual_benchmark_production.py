@@ -0,0 +1,175 @@
+import sys
+import os
+import random
+import time
+from datetime import date, timedelta
+
+# Path setup
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + '/../')
+from dotenv import load_dotenv
+
+env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../.env')
+load_dotenv(env_path)
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.models.unit import Unit, UnitCategory
+from app.models.ingredient import Ingredient
+from app.models.recipe import Recipe, RecipeItem, RecipeType
+from app.models.event import Event, EventOrder, EventStatus
+from app.services.production_service import ProductionService
+from app.services.mrp_service import MRPService
+from app.services.unit_conversion_service import UnitConversionService
+
+MONTH_START = date(2025, 6, 1)
+
+
+def build_synthetic_month(db, n_events=200, n_ingredients=300, n_sub_recipes=60, n_dishes=150, n_days=30, seed=42):
+    """
+    Synthetic catalog + n_days (one month by default) of confirmed events.
+    Sub-recipes nest up to 3 levels; each event orders 8 dishes.
+    """
+    rng = random.Random(seed)
+
+    db.add(UnitCategory(id=1, name="Weight"))
+    db.add(UnitCategory(id=3, name="Count"))
+    db.add_all([
+        Unit(id=1, name="Kilogram", abbreviation="kg", category_id=1, is_base_unit=True, conversion_to_base=1.0),
+        Unit(id=2, name="Gram", abbreviation="g", category_id=1, conversion_to_base=0.001),
+        Unit(id=5, name="Unit", abbreviation="un", category_id=3, is_base_unit=True, conversion_to_base=1.0),
+    ])
+    db.add_all([
+        Ingredient(
+            id=i, name=f"Ingredient {i}", sku=f"SKU-{i:05d}", category=f"Cat {i % 12}",
+            purchase_unit_id=1, usage_unit_id=2, conversion_ratio=1000.0,
+            current_cost=rng.uniform(50, 5000), yield_factor=rng.uniform(0.7, 1.0),
+            stock_quantity=rng.uniform(0, 50),
+        )
+        for i in range(1, n_ingredients + 1)
+    ])
+    db.commit()
+
+    sub_ids = []
+    for i in range(n_sub_recipes):
+        recipe = Recipe(
+            name=f"Sub {i}", recipe_type=RecipeType.SUB_RECIPE,
+            yield_quantity=rng.choice([1.0, 2.0, 5.0]), yield_unit_id=1,
+            preparation_time=rng.randint(20, 180), shelf_life_hours=rng.choice([12, 24, 48, 72, 120]),
+        )
+        db.add(recipe)
+        db.flush()
+        for ing_id in rng.sample(range(1, n_ingredients + 1), 6):
+            db.add(RecipeItem(parent_recipe_id=recipe.id, ingredient_id=ing_id, quantity=rng.uniform(10, 500), unit_id=2))
+        # Nest on earlier sub-recipes only, so the graph stays acyclic
+        for child_id in rng.sample(sub_ids, min(len(sub_ids), rng.randint(0, 2))):
+            db.add(RecipeItem(parent_recipe_id=recipe.id, child_recipe_id=child_id, quantity=rng.uniform(0.1, 1.0), unit_id=1))
+        sub_ids.append(recipe.id)
+
+    dish_ids = []
+    for i in range(n_dishes):
+        recipe = Recipe(name=f"Dish {i}", recipe_type=RecipeType.FINAL_DISH, yield_quantity=rng.choice([1.0, 4.0, 10.0]), yield_unit_id=5)
+        db.add(recipe)
+        db.flush()
+        for ing_id in rng.sample(range(1, n_ingredients + 1), 5):
+            db.add(RecipeItem(parent_recipe_id=recipe.id, ingredient_id=ing_id, quantity=rng.uniform(5, 300), unit_id=2))
+        for child_id in rng.sample(sub_ids, 3):
+            db.add(RecipeItem(parent_recipe_id=recipe.id, child_recipe_id=child_id, quantity=rng.uniform(0.05, 0.5), unit_id=1))
+        dish_ids.append(recipe.id)
+    db.commit()
+
+    for i in range(n_events):
+        event = Event(
+            name=f"Event {i}", client_name=f"Client {i}",
+            event_date=MONTH_START + timedelta(days=rng.randint(0, n_days - 1)),
+            guest_count=rng.randint(30, 300), status=EventStatus.CONFIRMED,
+        )
+        db.add(event)
+        db.flush()
+        for dish_id in rng.sample(dish_ids, 8):
+            db.add(EventOrder(
+                event_id=event.id, recipe_id=dish_id, quantity=float(event.guest_count),
+                unit_price_frozen=100.0, cost_at_sale=0.0,
+            ))
+    db.commit()
+
+
+def new_session():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine, autoflush=False)()
+
+
+def legacy_plan(db, start_date, end_date):
+    """Per-order recursive explosion (the previous algorithm)"""
+    events = db.query(Event).filter(
+        Event.event_date >= start_date,
+        Event.event_date <= end_date,
+        Event.status.in_([EventStatus.CONFIRMED, EventStatus.IN_PROGRESS])
+    ).all()
+    conversions = UnitConversionService.load_table(db, db.query(Ingredient).all())
+    required = {}
+
+    def explode(recipe, quantity):
+        if recipe.yield_quantity == 0:
+            return
+        scale = quantity / recipe.yield_quantity
+        for item in recipe.items:
+            if item.ingredient_id:
+                factor = UnitConversionService.to_purchase_factor(conversions, item.ingredient_id, item.unit_id)
+                required[item.ingredient_id] = required.get(item.ingredient_id, 0.0) + item.quantity * scale * factor
+            elif item.child_recipe_id:
+                explode(item.child_recipe, item.quantity * scale)
+
+    for event in events:
+        for order in event.orders:
+            explode(order.recipe, order.quantity)
+    return required
+
+
+def benchmark_production_plan():
+    print("Benchmarking production plan on a synthetic month of 200 events...")
+    db = new_session()
+    build_synthetic_month(db)
+    end = MONTH_START + timedelta(days=30)
+
+    db.expunge_all()
+    t0 = time.perf_counter()
+    ing_ref = legacy_plan(db, MONTH_START, end)
+    legacy_seconds = time.perf_counter() - t0
+
+    db.expunge_all()
+    t0 = time.perf_counter()
+    plan = ProductionService.get_production_plan(db, MONTH_START, end)
+    vector_seconds = time.perf_counter() - t0
+
+    for item in plan["ingredients"]:
+        expected = ing_ref[item["id"]]
+        assert abs(item["total_required"] - expected) <= 1e-6 * max(1.0, expected), item["id"]
+
+    print(f"  events: {len(plan['events'])}, ingredients: {len(plan['ingredients'])}, sub-recipes: {len(plan['sub_recipes'])}")
+    print(f"  recursive explosion: {legacy_seconds * 1000:.1f} ms")
+    print(f"  vector plan:         {vector_seconds * 1000:.1f} ms")
+    print("SUCCESS: Outputs match.")
+
+
+def benchmark_mrp():
+    print("Benchmarking MRP on a 6-month horizon of 1200 events...")
+    db = new_session()
+    build_synthetic_month(db, n_events=1200, n_days=180)
+
+    db.expunge_all()
+    t0 = time.perf_counter()
+    result = MRPService.get_requirements(db, MONTH_START, horizon_days=180, today=MONTH_START)
+    seconds = time.perf_counter() - t0
+
+    short = [i for i in result["ingredients"] if i["first_shortage_date"]]
+    print(f"  ingredients: {len(result['ingredients'])}, running short: {len(short)}")
+    print(f"  MRP: {seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    benchmark_production_plan()
+    benchmark_mrp()
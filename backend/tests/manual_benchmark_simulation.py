@@ -0,0 +1,70 @@
+import sys
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+# Path setup
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + '/../')
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from dotenv import load_dotenv
+
+env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../.env')
+load_dotenv(env_path)
+
+from app.models.ingredient import IngredientPriceHistory
+from app.services.costing_service import CostingService
+from app.services.monte_carlo_service import MonteCarloService
+from manual_benchmark_production import MONTH_START, build_synthetic_month, new_session
+
+
+def benchmark_inflation_shock():
+    print("Benchmarking inflation shock on 3000 recipes...")
+    db = new_session()
+    build_synthetic_month(db, n_events=0, n_ingredients=1000, n_sub_recipes=600, n_dishes=2400)
+
+    t0 = time.perf_counter()
+    data = CostingService.load_costing_data(db)
+    columns = CostingService.ingredient_columns(CostingService.build_coefficient_matrix(data))
+    build_seconds = time.perf_counter() - t0
+
+    shock = {ing_id: 0.2 for ing_id in range(1, 101)}
+    t0 = time.perf_counter()
+    deltas = CostingService.propagate_cost_deltas(columns, shock)
+    shock_seconds = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    CostingService.compute_costs_from_data(data, {ing_id: 1.0 for ing_id in shock})
+    recompute_seconds = time.perf_counter() - t0
+
+    print(f"  recipes: {len(data['recipes'])}, recipes impacted: {len(deltas)}")
+    print(f"  load + matrix:  {build_seconds * 1000:.1f} ms")
+    print(f"  shock multiply: {shock_seconds * 1000:.1f} ms")
+    print(f"  full recompute: {recompute_seconds * 1000:.1f} ms")
+
+
+def benchmark_monte_carlo(workers=1):
+    print(f"Benchmarking Monte Carlo: 10k draws, 3000 recipes, {workers} worker(s)...")
+    db = new_session()
+    build_synthetic_month(db, n_events=200, n_ingredients=1000, n_sub_recipes=600, n_dishes=2400)
+    rng = random.Random(7)
+    now = datetime.now(timezone.utc)
+    db.bulk_insert_mappings(IngredientPriceHistory, [
+        {"ingredient_id": rng.randint(1, 1000), "old_cost": 100.0, "new_cost": 100.0 * rng.uniform(0.9, 1.2),
+         "created_at": now - timedelta(days=rng.randint(1, 365))}
+        for _ in range(5000)
+    ])
+    db.commit()
+
+    t0 = time.perf_counter()
+    result = MonteCarloService.run_simulation(db, draws=10000, workers=workers, seed=1, today=MONTH_START)
+    seconds = time.perf_counter() - t0
+
+    print(f"  recipes: {len(result['recipes'])}, events: {len(result['events'])}")
+    print(f"  simulation: {seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    benchmark_inflation_shock()
+    benchmark_monte_carlo()
+    benchmark_monte_carlo(workers=2)
@@ -0,0 +1,32 @@
+import sys
+import os
+import time
+from datetime import date
+
+# Path setup
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + '/../')
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from dotenv import load_dotenv
+
+env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../.env')
+load_dotenv(env_path)
+
+from app.services.analytics_service import AnalyticsService
+from manual_benchmark_production import MONTH_START, build_synthetic_month, new_session
+
+
+def benchmark_timeseries():
+    print("Benchmarking time series over 5 years (5000 events, 40000 order lines)...")
+    db = new_session()
+    build_synthetic_month(db, n_events=5000, n_ingredients=100, n_sub_recipes=20, n_dishes=60, n_days=5 * 365)
+    end = date(MONTH_START.year + 5, MONTH_START.month, 1)
+
+    for granularity in ("day", "week", "month"):
+        t0 = time.perf_counter()
+        result = AnalyticsService.get_timeseries(db, MONTH_START, end, granularity)
+        seconds = time.perf_counter() - t0
+        print(f"  {granularity:<5} buckets: {len(result['series']):>5}  {seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    benchmark_timeseries()
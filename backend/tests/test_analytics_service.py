@@ -0,0 +1,94 @@
+"""
+Tests for the stats time series
+"""
+import pytest
+from datetime import date, timedelta
+from sqlalchemy import func, literal, select
+from app.models.event import Event, EventOrder, EventStatus
+from app.services.analytics_service import AnalyticsService, bucket_start
+from tests.conftest import QueryCounter
+
+
+@pytest.fixture
+def season(db_session, sample_recipes):
+    """Four events over two months with different statuses and types"""
+    specs = [
+        (date(2025, 6, 2), EventStatus.CONFIRMED, "COCKTAIL", 50, 100.0, 60.0),
+        (date(2025, 6, 8), EventStatus.CONFIRMED, "FORMAL", 100, 200.0, 80.0),
+        (date(2025, 6, 9), EventStatus.QUOTED, "COCKTAIL", 30, 100.0, 60.0),
+        (date(2025, 8, 20), EventStatus.CONFIRMED, "FORMAL", 80, 150.0, 90.0),
+    ]
+    for i, (day, status, event_type, guests, price, cost) in enumerate(specs):
+        event = Event(name=f"E{i}", client_name="C", event_date=day, guest_count=guests,
+                      status=status, event_type=event_type)
+        db_session.add(event)
+        db_session.flush()
+        # Two order lines per event so guests must not be double counted
+        for recipe in sample_recipes[:2]:
+            db_session.add(EventOrder(event_id=event.id, recipe_id=recipe.id, quantity=float(guests),
+                                      unit_price_frozen=price / 2, cost_at_sale=cost / 2))
+    db_session.commit()
+
+
+class TestTimeSeries:
+    """Grouped SQL aggregates per bucket"""
+
+    def test_monthly_buckets_with_gaps(self, db_session, season):
+        """Test month buckets, zero-filled July and totals"""
+        result = AnalyticsService.get_timeseries(db_session, date(2025, 6, 1), date(2025, 8, 31))
+        june, july, august = result["series"]
+
+        assert june["period"] == date(2025, 6, 1)
+        assert june["event_count"] == 3
+        assert june["guest_count"] == 180
+        assert june["revenue"] == pytest.approx(50 * 100 + 100 * 200 + 30 * 100)
+        assert june["cost"] == pytest.approx(50 * 60 + 100 * 80 + 30 * 60)
+        assert july["event_count"] == 0 and july["revenue"] == 0.0
+        assert august["margin"] == pytest.approx(0.4)
+        assert result["totals"]["event_count"] == 4
+
+    def test_weekly_buckets_start_monday(self, db_session, season):
+        """Test June 8 (Sunday) and June 9 (Monday) land in different weeks"""
+        result = AnalyticsService.get_timeseries(
+            db_session, date(2025, 6, 1), date(2025, 6, 15), granularity="week", fill_gaps=False
+        )
+
+        assert [(b["period"], b["event_count"]) for b in result["series"]] == [
+            (date(2025, 6, 2), 2), (date(2025, 6, 9), 1)
+        ]
+
+    def test_sql_week_bucket_matches_python(self, db_session):
+        """Test the SQLite week modifiers agree with bucket_start for every weekday"""
+        for offset in range(7):
+            day = date(2025, 6, 2) + timedelta(days=offset)
+            value = db_session.execute(select(func.date(literal(day.isoformat()), "-6 days", "weekday 1"))).scalar()
+
+            assert date.fromisoformat(value) == bucket_start(day, "week")
+
+    def test_filters(self, db_session, season):
+        """Test status and event_type filters"""
+        result = AnalyticsService.get_timeseries(
+            db_session, date(2025, 6, 1), date(2025, 8, 31),
+            statuses=[EventStatus.CONFIRMED], event_type="FORMAL", fill_gaps=False
+        )
+
+        assert [b["period"] for b in result["series"]] == [date(2025, 6, 1), date(2025, 8, 1)]
+        assert result["totals"]["guest_count"] == 180
+
+    def test_single_statement(self, db_session, season):
+        """Test the series is one SQL statement"""
+        with QueryCounter() as counter:
+            AnalyticsService.get_timeseries(db_session, date(2020, 1, 1), date(2025, 12, 31), granularity="day")
+
+        assert counter.count == 1
+
+    def test_endpoint(self, client, db_session, season):
+        """Test GET /stats/timeseries"""
+        response = client.get("/api/v1/stats/timeseries", params={
+            "start_date": "2025-06-01", "end_date": "2025-08-31",
+            "granularity": "month", "status": ["confirmed"],
+        })
+
+        assert response.status_code == 200
+        assert [b["event_count"] for b in response.json()["series"]] == [2, 0, 1]
+        assert client.get("/api/v1/stats/timeseries", params={"granularity": "year"}).status_code == 422
@@ -62,34 +62,28 @@ class TestProductionService:
     
     def test_recipe_explosion(self, db_session, sample_recipes):
         """Test that recipes are correctly exploded into ingredients"""
+        from app.models.ingredient import Ingredient
         from app.services.production_service import ProductionService
+        from app.services.unit_conversion_service import UnitConversionService
         
-        recipe = sample_recipes[0]  # Tomato Sauce
-        ing_agg = {}
-        sub_agg = {}
+        conversions = UnitConversionService.load_table(db_session, db_session.query(Ingredient).all())
+        vector = ProductionService._flatten_recipe(sample_recipes[0], {}, {}, conversions)
         
-        ProductionService._explode_recipe(
-            db_session, recipe, 1.0, ing_agg, sub_agg, "Test Event"
-        )
-        
-        # Should have ingredients
-        assert len(ing_agg) > 0
+        # Tomato Sauce per liter, in purchase units
+        assert vector["ingredients"] == {
+            1: pytest.approx(0.8), 2: pytest.approx(0.1), 3: pytest.approx(0.05), 4: pytest.approx(0.005)
+        }
     
-    def test_scaling_factor_calculation(self, db_session, sample_recipes):
+    def test_scaling_factor_calculation(self, db_session, sample_events):
         """Test that scaling factor is correctly calculated"""
         from app.services.production_service import ProductionService
         
-        recipe = sample_recipes[1]  # Pasta dish (4 portions)
-        ing_agg = {}
-        sub_agg = {}
-        
-        # Request 8 portions (2x the original)
-        ProductionService._explode_recipe(
-            db_session, recipe, 8.0, ing_agg, sub_agg, "Test Event"
-        )
+        # 100 portions of pasta (yield 4) -> 25 batches of 0.5 L sauce
+        plan = ProductionService.get_production_plan(db_session, date(2025, 6, 1), date(2025, 6, 30))
         
-        # Quantities should be doubled
-        # This would need specific assertions based on recipe composition
+        assert plan["sub_recipes"][0]["total_quantity"] == pytest.approx(12.5)
+        tomato = next(i for i in plan["ingredients"] if i["id"] == 1)
+        assert tomato["total_required"] == pytest.approx(12.5 * 0.8)
 
 
 # Document the known issue
@@ -0,0 +1,73 @@
+"""
+Tests for the persisted recipe cost cache and its incremental invalidation
+"""
+import pytest
+from fastapi import status
+from app.models.recipe import RecipeCostCache
+from app.services.cost_cache_service import RecipeCostCacheService
+from app.services.recipe_graph_service import RecipeGraphService
+
+
+class TestRecipeCostCache:
+    """Tests for RecipeCostCacheService"""
+
+    def test_get_costs_warms_cache(self, db_session, sample_recipes):
+        """Test a cache miss computes, stores and returns the cost"""
+        pasta = sample_recipes[1]
+        costs = RecipeCostCacheService.get_costs(db_session, [pasta.id])
+
+        assert costs[pasta.id]["total_cost"] == pytest.approx(pasta.total_cost)
+        row = db_session.query(RecipeCostCache).filter_by(recipe_id=pasta.id).one()
+        assert row.input_version == 1
+        assert row.computed_at is not None
+
+    def test_ingredient_change_refreshes_parents(self, client, db_session, sample_recipes):
+        """Test updating an ingredient price refreshes the sub-recipe and the dish using it"""
+        RecipeGraphService.rebuild(db_session)
+        RecipeCostCacheService.rebuild(db_session)
+        before = RecipeCostCacheService.get_costs(db_session, [1, 2])
+
+        response = client.put("/api/v1/ingredients/1", json={"current_cost": 300.0})
+        assert response.status_code == status.HTTP_200_OK
+
+        db_session.expire_all()
+        after = RecipeCostCacheService.get_costs(db_session, [1, 2])
+        assert after[1]["total_cost"] > before[1]["total_cost"]
+        assert after[2]["total_cost"] > before[2]["total_cost"]
+        assert RecipeCostCacheService.check_consistency(db_session)["consistent"]
+
+    def test_item_change_only_touches_dependents(self, client, db_session, sample_recipes):
+        """Test editing the dish leaves the sub-recipe row alone"""
+        RecipeGraphService.rebuild(db_session)
+        RecipeCostCacheService.rebuild(db_session)
+
+        pasta_item = sample_recipes[1].items[0]
+        response = client.put(
+            f"/api/v1/recipes/2/items/{pasta_item.id}", json={"quantity": 1.0}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        db_session.expire_all()
+        versions = {row.recipe_id: row.input_version for row in db_session.query(RecipeCostCache)}
+        assert versions == {1: 1, 2: 2}
+        assert RecipeCostCacheService.check_consistency(db_session)["consistent"]
+
+    def test_consistency_checker_detects_drift(self, db_session, sample_recipes):
+        """Test stale rows are reported"""
+        RecipeCostCacheService.rebuild(db_session)
+        row = db_session.query(RecipeCostCache).filter_by(recipe_id=1).one()
+        row.total_cost = 1.0
+        db_session.commit()
+
+        report = RecipeCostCacheService.check_consistency(db_session)
+
+        assert report["consistent"] is False
+        assert {s["recipe_id"] for s in report["stale"]} == {1}
+
+    def test_consistency_endpoint(self, client, sample_recipes):
+        """Test GET /recipes/cost-cache/consistency"""
+        client.get("/api/v1/recipes/")
+        response = client.get("/api/v1/recipes/cost-cache/consistency")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["consistent"] is True
@@ -0,0 +1,82 @@
+"""
+Tests for the batch recipe costing engine
+"""
+import pytest
+from app.models.ingredient import Ingredient
+from app.models.recipe import Recipe, RecipeItem, RecipeType
+from app.services.costing_service import CostingService
+
+
+class TestCostingService:
+    """Batch costs must match the model properties"""
+
+    def test_matches_model_properties(self, db_session, sample_recipes):
+        """Test engine output equals Recipe.total_cost / cost_per_portion / suggested_price"""
+        costs = CostingService.compute_costs(db_session)
+
+        for recipe in sample_recipes:
+            db_session.refresh(recipe)
+            assert costs[recipe.id]["total_cost"] == pytest.approx(recipe.total_cost)
+            assert costs[recipe.id]["cost_per_portion"] == pytest.approx(recipe.cost_per_portion)
+            assert costs[recipe.id]["suggested_price"] == pytest.approx(recipe.suggested_price)
+
+    def test_subset_includes_sub_recipes(self, db_session, sample_recipes):
+        """Test costing one dish also costs the sub-recipes it uses"""
+        pasta = sample_recipes[1]
+        costs = CostingService.compute_costs(db_session, [pasta.id])
+
+        assert set(costs.keys()) == {1, 2}
+        assert costs[pasta.id]["total_cost"] == pytest.approx(pasta.total_cost)
+
+    def test_deep_chain(self, db_session, sample_ingredients):
+        """Test a three-level sub-recipe chain"""
+        base = Recipe(name="Base", recipe_type=RecipeType.SUB_RECIPE, yield_quantity=2.0)
+        middle = Recipe(name="Middle", recipe_type=RecipeType.SUB_RECIPE, yield_quantity=1.0)
+        top = Recipe(name="Top", yield_quantity=4.0, target_margin=0.5)
+        db_session.add_all([base, middle, top])
+        db_session.commit()
+
+        db_session.add_all([
+            RecipeItem(parent_recipe_id=base.id, ingredient_id=1, quantity=500.0, unit_id=2),
+            RecipeItem(parent_recipe_id=middle.id, child_recipe_id=base.id, quantity=1.5, unit_id=5),
+            RecipeItem(parent_recipe_id=middle.id, ingredient_id=3, quantity=20.0, unit_id=4),
+            RecipeItem(parent_recipe_id=top.id, child_recipe_id=middle.id, quantity=2.0, unit_id=5),
+            RecipeItem(parent_recipe_id=top.id, child_recipe_id=base.id, quantity=1.0, unit_id=5),
+        ])
+        db_session.commit()
+        db_session.refresh(top)
+
+        costs = CostingService.compute_costs(db_session, [top.id])
+
+        assert costs[top.id]["total_cost"] == pytest.approx(top.total_cost)
+        assert costs[top.id]["suggested_price"] == pytest.approx(top.suggested_price)
+
+    def test_ingredient_cost_override(self, db_session, sample_recipes):
+        """Test simulated ingredient prices propagate to parent dishes"""
+        base_costs = CostingService.compute_costs(db_session)
+        shocked = CostingService.compute_costs(db_session, ingredient_costs={1: 300.0})  # Tomato x2
+
+        assert shocked[1]["total_cost"] > base_costs[1]["total_cost"]
+        assert shocked[2]["total_cost"] > base_costs[2]["total_cost"]
+
+    def test_cycle_is_skipped(self, db_session, sample_units):
+        """Test recipes in a cycle are left out instead of recursing forever"""
+        a = Recipe(name="A", yield_quantity=1.0)
+        b = Recipe(name="B", yield_quantity=1.0)
+        db_session.add_all([a, b])
+        db_session.commit()
+        db_session.add_all([
+            RecipeItem(parent_recipe_id=a.id, child_recipe_id=b.id, quantity=1.0, unit_id=5),
+            RecipeItem(parent_recipe_id=b.id, child_recipe_id=a.id, quantity=1.0, unit_id=5),
+        ])
+        db_session.commit()
+
+        costs = CostingService.compute_costs(db_session)
+
+        assert a.id not in costs
+        assert b.id not in costs
+
+    def test_empty_catalog(self, db_session):
+        """Test engine handles an empty database"""
+        assert CostingService.compute_costs(db_session) == {}
+        assert CostingService.compute_costs(db_session, []) == {}
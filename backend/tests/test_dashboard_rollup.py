@@ -0,0 +1,146 @@
+"""
+Tests for the materialized dashboard rollup
+"""
+import pytest
+from datetime import date
+from app.models.event import Event, EventOrder, EventStatus
+from app.models.ingredient import Ingredient
+from app.models.recipe import RecipeCostCache
+from app.models.stats import DashboardRollup
+from app.services.dashboard_service import DashboardRollupService, month_start
+from tests.conftest import QueryCounter
+
+JUNE = date(2025, 6, 1)
+
+
+def read(db_session, period):
+    return DashboardRollupService.get_month(db_session, period)
+
+
+class TestIncrementalRefresh:
+    """Commits mark the touched months and catalog snapshot stale; reads recompute them"""
+
+    def test_event_month_written_on_commit(self, db_session, sample_events):
+        """Test June 2025 is computed on first read"""
+        row = read(db_session, JUNE)
+        order = sample_events[0].orders[0]
+
+        assert row.events_count == 1
+        assert row.confirmed_events_count == 1
+        assert row.revenue == pytest.approx(100 * 150.0)
+        assert row.cost == pytest.approx(100 * order.cost_at_sale)
+        assert row.events_updated_at is not None
+
+    def test_order_change_updates_month(self, db_session, sample_events):
+        """Test editing an order marks its event's month stale"""
+        read(db_session, JUNE)
+        order = db_session.query(EventOrder).first()
+        order.quantity = 50.0
+        db_session.commit()
+
+        assert db_session.get(DashboardRollup, JUNE).events_updated_at is None
+        assert read(db_session, JUNE).revenue == pytest.approx(50 * 150.0)
+
+    def test_moving_event_refreshes_both_months(self, db_session, sample_events):
+        """Test rescheduling an event moves its figures to the new month"""
+        read(db_session, JUNE)
+        event = db_session.get(Event, 1)
+        event.event_date = date(2025, 7, 10)
+        db_session.commit()
+
+        assert read(db_session, JUNE).events_count == 0
+        assert read(db_session, JUNE).revenue == 0.0
+        assert read(db_session, date(2025, 7, 1)).revenue == pytest.approx(100 * 150.0)
+
+    def test_unconfirmed_events_count_without_revenue(self, db_session, sample_events):
+        """Test quoted events are counted but not in revenue"""
+        db_session.add(Event(name="Quote", client_name="C", event_date=date(2025, 6, 20),
+                             guest_count=10, status=EventStatus.QUOTED))
+        db_session.commit()
+
+        row = read(db_session, JUNE)
+        assert row.events_count == 2
+        assert row.confirmed_events_count == 1
+        assert row.revenue == pytest.approx(100 * 150.0)
+
+    def test_ingredient_change_updates_catalog(self, db_session, sample_ingredients):
+        """Test a stock change refreshes the current month's snapshot"""
+        row = read(db_session, None)
+        assert row.inventory_value == pytest.approx(24900.0)
+        assert row.low_stock_count == 0
+
+        tomato = db_session.query(Ingredient).filter(Ingredient.name == "Tomato").one()
+        tomato.stock_quantity = 0.0
+        db_session.commit()
+
+        row = read(db_session, None)
+        assert row.inventory_value == pytest.approx(24900.0 - 50 * 150.0)
+        assert row.low_stock_count == 1
+
+    def test_rollback_discards_pending(self, db_session, sample_events):
+        """Test rolled-back changes are not applied at the next commit"""
+        db_session.get(Event, 1).event_date = date(2025, 8, 1)
+        db_session.flush()
+        db_session.rollback()
+        db_session.commit()
+
+        assert db_session.get(DashboardRollup, date(2025, 8, 1)) is None
+
+
+    def test_catalog_costs_uncached_recipes(self, db_session, sample_recipes):
+        """Test recipes never read are costed into the snapshot"""
+        db_session.query(RecipeCostCache).delete()
+        db_session.commit()
+
+        row = read(db_session, None)
+
+        assert row.active_recipes == 2
+        assert row.profitable_recipes == 2
+        assert row.avg_recipe_cost == pytest.approx(
+            sum(r.cost_per_portion for r in sample_recipes) / 2
+        )
+        assert db_session.query(RecipeCostCache).count() == 2
+
+    def test_commit_runs_no_aggregates(self, db_session, sample_events):
+        """Test a write only flags the rollup (no recompute inside the commit)"""
+        read(db_session, JUNE)
+        db_session.query(EventOrder).first().quantity = 10.0
+        db_session.flush()
+
+        with QueryCounter() as counter:
+            db_session.commit()
+
+        assert counter.count <= 3
+
+
+class TestRebuild:
+    """Full rebuild matches the incremental state"""
+
+    def test_rebuild_matches_incremental(self, db_session, sample_events, sample_ingredients):
+        """Test rebuild recomputes the same figures"""
+        before = read(db_session, JUNE).revenue
+        db_session.query(DashboardRollup).delete()
+        db_session.commit()
+
+        count = DashboardRollupService.rebuild(db_session)
+
+        assert count == len({JUNE, month_start(date.today())})
+        assert db_session.get(DashboardRollup, JUNE).revenue == pytest.approx(before)
+        assert db_session.get(DashboardRollup, month_start(date.today())).total_ingredients == 4
+
+
+class TestDashboardEndpoint:
+    """GET /stats/dashboard reads the rollup"""
+
+    def test_dashboard_single_read(self, client, db_session, sample_ingredients):
+        """Test a warm dashboard is one primary-key read"""
+        assert client.get("/api/v1/stats/dashboard").status_code == 200
+
+        with QueryCounter() as counter:
+            response = client.get("/api/v1/stats/dashboard")
+
+        assert counter.count == 1
+        data = response.json()
+        assert data["total_ingredients"] == 4
+        assert data["inventory_value"] == pytest.approx(24900.0)
+        assert data["rollup_updated_at"] is not None
@@ -0,0 +1,58 @@
+"""
+Tests for bulk event menu assignment
+"""
+import pytest
+from app.models.event import EventOrder
+from app.services.cost_cache_service import RecipeCostCacheService
+from tests.conftest import QueryCounter
+
+
+class TestEventMenu:
+    """POST /events/{id}/menu"""
+
+    def test_adds_menu_and_returns_totals(self, client, db_session, sample_events, sample_recipes):
+        """Test every dish is frozen like single adds and totals come back"""
+        sauce, pasta = sample_recipes[0], sample_recipes[1]
+        response = client.post("/api/v1/events/1/menu", json={"items": [
+            {"recipe_id": sauce.id, "quantity": 10, "unit_price": 20.0},
+            {"recipe_id": pasta.id, "quantity": 5},
+        ]})
+
+        assert response.status_code == 200
+        data = response.json()
+        costs = RecipeCostCacheService.get_costs(db_session, [sauce.id, pasta.id])
+        assert data["orders_added"] == 2
+        assert data["orders"][1]["unit_price_frozen"] == pytest.approx(costs[pasta.id]["suggested_price"])
+        assert data["orders"][1]["cost_at_sale"] == pytest.approx(costs[pasta.id]["total_cost"])
+        assert data["total_revenue"] == pytest.approx(15000.0 + 200.0 + 5 * costs[pasta.id]["suggested_price"])
+        assert db_session.query(EventOrder).count() == 3
+
+    def test_unknown_recipe_adds_nothing(self, client, db_session, sample_events, sample_recipes):
+        """Test one bad recipe rejects the whole menu"""
+        response = client.post("/api/v1/events/1/menu", json={"items": [
+            {"recipe_id": sample_recipes[0].id, "quantity": 1},
+            {"recipe_id": 999, "quantity": 1},
+        ]})
+
+        assert response.status_code == 404
+        assert "999" in response.json()["detail"]
+        assert db_session.query(EventOrder).count() == 1
+
+    def test_query_count_independent_of_menu_size(self, client, db_session, sample_events, sample_recipes):
+        """Test a 20-dish menu costs the same number of queries as a 2-dish one"""
+        ids = [r.id for r in sample_recipes]
+        RecipeCostCacheService.get_costs(db_session, ids)
+
+        counts = []
+        for size in (2, 20):
+            menu = {"items": [{"recipe_id": ids[i % len(ids)], "quantity": 1} for i in range(size)]}
+            with QueryCounter() as counter:
+                assert client.post("/api/v1/events/1/menu", json=menu).status_code == 200
+            counts.append(counter.count)
+
+        assert counts[0] == counts[1]
+
+    def test_validation(self, client, sample_events):
+        """Test empty menus and non-positive quantities are rejected"""
+        assert client.post("/api/v1/events/1/menu", json={"items": []}).status_code == 422
+        assert client.post("/api/v1/events/1/menu", json={"items": [{"recipe_id": 1, "quantity": 0}]}).status_code == 422
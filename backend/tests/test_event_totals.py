@@ -0,0 +1,118 @@
+"""
+Tests for the stored event order totals
+"""
+import pytest
+from datetime import date
+from sqlalchemy.orm import Session
+from app.models.event import Event, EventOrder, EventStatus
+from app.services.event_service import EventService
+from tests.conftest import QueryCounter
+
+
+def orders_sum(event):
+    return (
+        sum(o.quantity * o.cost_at_sale for o in event.orders),
+        sum(o.quantity * o.unit_price_frozen for o in event.orders),
+    )
+
+
+class TestMaintainedTotals:
+    """Every EventOrder write updates its event in the same flush"""
+
+    def test_fixture_totals(self, db_session, sample_events):
+        """Test totals written when the fixture's order was inserted"""
+        event = db_session.get(Event, 1)
+
+        assert event.orders_total_revenue == pytest.approx(15000.0)
+        assert (event.orders_total_cost, event.orders_total_revenue) == pytest.approx(orders_sum(event))
+
+    def test_add_update_delete(self, db_session, sample_events, sample_recipes):
+        """Test insert, quantity change and delete of an order"""
+        event = db_session.get(Event, 1)
+        EventService.add_order_to_event(db_session, 1, sample_recipes[0].id, 10.0, unit_price_override=20.0)
+        assert event.total_revenue == pytest.approx(15000.0 + 200.0)
+
+        order = db_session.query(EventOrder).filter(EventOrder.unit_price_frozen == 20.0).one()
+        order.quantity = 5.0
+        db_session.commit()
+        assert event.total_revenue == pytest.approx(15000.0 + 100.0)
+
+        db_session.delete(order)
+        db_session.commit()
+        assert event.total_revenue == pytest.approx(15000.0)
+
+    def test_orphan_removal_and_move(self, db_session, sample_events):
+        """Test removing from the collection and moving an order between events"""
+        other = Event(name="Other", client_name="C", event_date=date(2025, 6, 20),
+                      guest_count=10, status=EventStatus.QUOTED)
+        db_session.add(other)
+        db_session.commit()
+        event = db_session.get(Event, 1)
+
+        order = event.orders[0]
+        order.event_id = other.id
+        db_session.commit()
+        assert event.total_revenue == 0.0
+        assert other.total_revenue == pytest.approx(15000.0)
+
+        other.orders.remove(other.orders[0])
+        db_session.commit()
+        assert other.total_revenue == 0.0
+        assert db_session.query(EventOrder).count() == 0
+
+    def test_recalculate_updates_cost(self, db_session, sample_events):
+        """Test recalculating costs refreshes the stored cost"""
+        event = EventService.recalculate_event_financials(db_session, 1)
+
+        assert event.total_cost == pytest.approx(orders_sum(event)[0])
+
+
+    def test_other_sessions_not_hooked(self, db_session, sample_events):
+        """Test sessions outside the registered factories leave the totals alone"""
+        other = Session(bind=db_session.get_bind())
+        try:
+            other.get(EventOrder, 1).quantity = 50.0
+            other.commit()
+        finally:
+            other.close()
+
+        assert EventService.check_order_totals(db_session)["consistent"] is False
+
+
+class TestReconciliation:
+    """Drift detection and repair"""
+
+    def test_detects_and_fixes_bulk_update_drift(self, db_session, sample_events):
+        """Test a bulk UPDATE bypassing the session is reported and repaired"""
+        db_session.query(EventOrder).update({"quantity": 50.0}, synchronize_session=False)
+        db_session.commit()
+
+        report = EventService.check_order_totals(db_session)
+        assert report["consistent"] is False
+        assert {d["field"] for d in report["drift"]} == {"orders_total_cost", "orders_total_revenue"}
+
+        EventService.check_order_totals(db_session, fix=True)
+        assert EventService.check_order_totals(db_session)["consistent"] is True
+        assert db_session.get(Event, 1).total_revenue == pytest.approx(50 * 150.0)
+
+
+class TestEventsListAPI:
+    """List sorting/filtering by margin without loading orders"""
+
+    def test_sort_and_filter_by_margin(self, client, db_session, sample_events):
+        """Test margin sort/filter is plain SQL on events"""
+        db_session.add(Event(name="Empty", client_name="C", event_date=date(2025, 7, 1),
+                             guest_count=10, status=EventStatus.PROSPECT))
+        db_session.commit()
+
+        with QueryCounter() as counter:
+            response = client.get("/api/v1/events/", params={"sort_by": "margin", "min_margin": 0.01})
+
+        assert response.status_code == 200
+        assert [e["name"] for e in response.json()["items"]] == ["Wedding Reception"]
+        assert counter.count == 2
+
+    def test_reconcile_endpoints(self, client, sample_events):
+        """Test GET /events/totals/consistency and POST /events/totals/reconcile"""
+        assert client.get("/api/v1/events/totals/consistency").json()["consistent"] is True
+        assert client.post("/api/v1/events/totals/reconcile").json()["fixed"] is False
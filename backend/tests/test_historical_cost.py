@@ -0,0 +1,138 @@
+"""
+Tests for point-in-time ("as of") recipe costing
+"""
+import pytest
+from datetime import date, datetime
+from app.models.event import Event, EventOrder, EventStatus
+from app.models.ingredient import IngredientPriceHistory
+from app.services.costing_service import CostingService
+from app.services.historical_cost_service import HistoricalCostService
+from tests.conftest import QueryCounter
+
+BEFORE, BETWEEN, AFTER = datetime(2025, 1, 1), datetime(2025, 1, 15), datetime(2025, 3, 1)
+
+
+def sauce_cost(tomato_cost):
+    """Tomato Sauce total cost (sample_recipes) for a given tomato price"""
+    return 800 * tomato_cost / 1000 / 0.85 + 100 * 80.0 / 1000 / 0.9 + 50 * 500.0 / 1000 + 5 * 50.0 / 1000
+
+
+@pytest.fixture
+def tomato_history(db_session, sample_recipes):
+    """Tomato went 100 -> 120 on Jan 10 and 120 -> 150 (current) on Feb 10"""
+    db_session.add_all([
+        IngredientPriceHistory(ingredient_id=1, old_cost=100.0, new_cost=120.0, created_at=datetime(2025, 1, 10)),
+        IngredientPriceHistory(ingredient_id=1, old_cost=120.0, new_cost=150.0, created_at=datetime(2025, 2, 10)),
+    ])
+    db_session.commit()
+
+
+def add_order(db_session, event_id, created_at, cost_at_sale, recipe_id=2):
+    db_session.add(EventOrder(
+        event_id=event_id, recipe_id=recipe_id, quantity=10.0, unit_price_frozen=20.0,
+        cost_at_sale=cost_at_sale, created_at=created_at
+    ))
+
+
+@pytest.fixture
+def june_event(db_session, tomato_history):
+    event = Event(
+        id=1, name="Gala", client_name="Client", event_date=date(2025, 6, 15),
+        guest_count=50, status=EventStatus.CONFIRMED
+    )
+    db_session.add(event)
+    db_session.commit()
+    return event
+
+
+class TestPricesAsOf:
+    """HistoricalCostService.ingredient_costs_as_of"""
+
+    def test_last_change_before_instant(self, db_session, tomato_history):
+        """Test prices before, between and after the recorded changes"""
+        assert HistoricalCostService.ingredient_costs_as_of(db_session, [1, 2], BEFORE) == {1: 100.0}
+        assert HistoricalCostService.ingredient_costs_as_of(db_session, [1, 2], BETWEEN) == {1: 120.0}
+        assert HistoricalCostService.ingredient_costs_as_of(db_session, [1, 2], AFTER) == {1: 150.0}
+
+    def test_change_instant_is_inclusive(self, db_session, tomato_history):
+        """Test a change applies from its own timestamp on"""
+        assert HistoricalCostService.ingredient_costs_as_of(db_session, [1], datetime(2025, 1, 10)) == {1: 120.0}
+
+
+class TestRecipeCostAsOf:
+    """HistoricalCostService.compute_costs_as_of"""
+
+    def test_sub_recipes_costed_at_instant(self, db_session, tomato_history):
+        """Test the dish is costed through its sub-recipe with past prices"""
+        costs = HistoricalCostService.compute_costs_as_of(db_session, [2], BETWEEN)
+
+        assert costs[1]["total_cost"] == pytest.approx(sauce_cost(120.0))
+        assert costs[2]["total_cost"] == pytest.approx(0.5 * sauce_cost(120.0))
+
+    def test_matches_current_costing_after_last_change(self, db_session, tomato_history):
+        """Test costing as of now equals the regular costing"""
+        current = CostingService.compute_costs(db_session, [2])
+
+        as_of = HistoricalCostService.compute_costs_as_of(db_session, [2], AFTER)
+
+        assert as_of[2]["total_cost"] == pytest.approx(current[2]["total_cost"])
+
+
+class TestReconcileOrders:
+    """HistoricalCostService.reconcile_orders"""
+
+    def test_orders_compared_at_creation_time(self, db_session, june_event):
+        """Test each order is checked against the cost of its own creation date"""
+        add_order(db_session, 1, BETWEEN, 0.5 * sauce_cost(120.0))
+        add_order(db_session, 1, AFTER, 0.5 * sauce_cost(120.0))
+        db_session.commit()
+
+        result = HistoricalCostService.reconcile_orders(db_session, date(2025, 6, 1), date(2025, 6, 30))
+
+        assert result["orders_checked"] == 2
+        assert result["orders_mismatched"] == 1
+        first, second = result["orders"]
+        assert first["matches"]
+        assert second["cost_as_of"] == pytest.approx(0.5 * sauce_cost(150.0))
+        assert second["difference"] == pytest.approx(0.5 * sauce_cost(120.0) - 0.5 * sauce_cost(150.0))
+
+    def test_query_count_independent_of_orders(self, db_session, june_event):
+        """Test a month of orders is reconciled with a fixed number of queries"""
+        add_order(db_session, 1, BEFORE, 1.0)
+        db_session.commit()
+        with QueryCounter() as few:
+            HistoricalCostService.reconcile_orders(db_session, event_id=1)
+
+        for day in range(1, 29):
+            add_order(db_session, 1, datetime(2025, 2, day, 12), 1.0)
+        db_session.commit()
+        with QueryCounter() as many:
+            result = HistoricalCostService.reconcile_orders(db_session, event_id=1)
+
+        assert result["orders_checked"] == 29
+        assert many.count == few.count
+        assert sorted({round(line["cost_as_of"], 6) for line in result["orders"]}) == pytest.approx(
+            [0.5 * sauce_cost(100.0), 0.5 * sauce_cost(120.0), 0.5 * sauce_cost(150.0)]
+        )
+
+
+class TestHistoricalCostEndpoints:
+    """GET /recipes/{id}/cost-as-of and /events/.../cost-reconciliation"""
+
+    def test_recipe_cost_as_of(self, client, tomato_history):
+        """Test the endpoint costs the recipe at the given instant"""
+        response = client.get("/api/v1/recipes/1/cost-as-of", params={"at": "2025-01-01T00:00:00"})
+
+        assert response.status_code == 200
+        assert response.json()["total_cost"] == pytest.approx(sauce_cost(100.0))
+        assert client.get("/api/v1/recipes/999/cost-as-of", params={"at": "2025-01-01T00:00:00"}).status_code == 404
+
+    def test_reconciliation_validation(self, client, june_event):
+        """Test reversed ranges and unknown events are rejected"""
+        response = client.get(
+            "/api/v1/events/cost-reconciliation", params={"start_date": "2025-07-01", "end_date": "2025-06-01"}
+        )
+
+        assert response.status_code == 400
+        assert client.get("/api/v1/events/999/cost-reconciliation").status_code == 404
+        assert client.get("/api/v1/events/1/cost-reconciliation").json()["orders_checked"] == 0
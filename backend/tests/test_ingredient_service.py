@@ -0,0 +1,64 @@
+"""
+Tests for set-based ingredient price maintenance
+"""
+import pytest
+from app.models.ingredient import Ingredient, IngredientPriceHistory
+from app.models.recipe import RecipeCostCache
+from app.services.cost_cache_service import RecipeCostCacheService
+from app.services.ingredient_service import IngredientService
+from tests.conftest import QueryCounter
+
+
+class TestBulkUpdatePrices:
+    """IngredientService.bulk_update_prices"""
+
+    def test_updates_prices_and_logs_history(self, db_session, sample_ingredients):
+        """Test prices, history rows and the SQL-computed summary"""
+        tomato = sample_ingredients[0]
+
+        result = IngredientService.bulk_update_prices(db_session, 10.0, category="Vegetables")
+
+        assert result["ingredients_updated"] == 2
+        assert result["total_cost_before"] == pytest.approx(230.0)
+        assert result["total_cost_after"] == pytest.approx(253.0)
+        assert tomato.current_cost == pytest.approx(165.0)
+        assert db_session.get(Ingredient, sample_ingredients[2].id).current_cost == 500.0
+
+        history = db_session.query(IngredientPriceHistory).filter_by(ingredient_id=tomato.id).one()
+        assert (history.old_cost, history.new_cost) == pytest.approx((150.0, 165.0))
+        assert history.changed_by == "Bulk Update 10.0%"
+
+    def test_refreshes_recipe_costs(self, db_session, sample_ingredients, sample_recipes):
+        """Test cached costs of recipes using the ingredients are recomputed"""
+        sauce = sample_recipes[0]
+        before = RecipeCostCacheService.get_costs(db_session, [sauce.id])[sauce.id]["total_cost"]
+
+        IngredientService.bulk_update_prices(db_session, 20.0, category="Vegetables")
+
+        cached = db_session.query(RecipeCostCache).filter_by(recipe_id=sauce.id).one()
+        assert cached.total_cost > before
+        assert RecipeCostCacheService.check_consistency(db_session)["consistent"]
+
+    def test_zero_change_and_empty_category(self, db_session, sample_ingredients):
+        """Test nothing is written when no price changes"""
+        assert IngredientService.bulk_update_prices(db_session, 0.0)["ingredients_updated"] == 0
+        result = IngredientService.bulk_update_prices(db_session, 10.0, category="Nope")
+
+        assert result["message"] == "No ingredients found in category"
+        assert db_session.query(IngredientPriceHistory).count() == 0
+
+    def test_statement_count_independent_of_catalog_size(self, db_session, sample_ingredients, sample_units):
+        """Test the update does not issue statements per ingredient"""
+        counts = []
+        for extra in (0, 30):
+            db_session.add_all([
+                Ingredient(name=f"Extra {extra}-{i}", category="Bulk", purchase_unit_id=sample_units[0].id,
+                           usage_unit_id=sample_units[0].id, current_cost=10.0)
+                for i in range(extra or 3)
+            ])
+            db_session.commit()
+            with QueryCounter() as counter:
+                IngredientService.bulk_update_prices(db_session, 5.0, category="Bulk")
+            counts.append(counter.count)
+
+        assert counts[0] == counts[1]
@@ -0,0 +1,85 @@
+"""
+Tests for the event margin-at-risk simulation
+"""
+import pytest
+from datetime import date
+from app.models.event import Event, EventOrder, EventStatus
+from app.models.recipe import Recipe
+from app.services.simulation_service import SimulationService
+
+JUNE = (date(2025, 6, 1), date(2025, 6, 30))
+
+
+@pytest.fixture
+def priced_events(db_session, sample_events):
+    """
+    Wedding (confirmed) sells pasta at 150 over a frozen cost; a quoted event
+    sells the same dish at a thin price, a cancelled one is ignored.
+    """
+    pasta_cost = db_session.get(Recipe, 2).total_cost
+    # Freeze the wedding on the same basis the service re-costs with
+    db_session.query(EventOrder).filter(EventOrder.event_id == 1).update({"cost_at_sale": pasta_cost})
+    for name, status, price in (("Thin Quote", EventStatus.QUOTED, pasta_cost * 1.1),
+                                ("Cancelled", EventStatus.CANCELLED, 1.0)):
+        event = Event(name=name, client_name="C", event_date=date(2025, 6, 20), guest_count=10, status=status)
+        db_session.add(event)
+        db_session.flush()
+        db_session.add(EventOrder(event_id=event.id, recipe_id=2, quantity=10.0,
+                                  unit_price_frozen=price, cost_at_sale=pasta_cost))
+    db_session.commit()
+    return pasta_cost
+
+
+class TestMarginAtRisk:
+    """Frozen vs re-costed margins, ranked by erosion"""
+
+    def test_current_prices_match_frozen(self, db_session, priced_events):
+        """Test no shock and unchanged prices gives zero erosion"""
+        result = SimulationService.simulate_margin_at_risk(db_session, *JUNE)
+
+        assert result["events_count"] == 2
+        assert {e["name"] for e in result["events"]} == {"Wedding Reception", "Thin Quote"}
+        for event in result["events"]:
+            assert event["margin_erosion"] == pytest.approx(0.0)
+        assert result["unprofitable_count"] == 0
+
+    def test_shock_ranks_thin_margin_first(self, db_session, priced_events):
+        """Test +50% on vegetables pushes the thin quote under water"""
+        result = SimulationService.simulate_margin_at_risk(
+            db_session, *JUNE, category_shocks={"Vegetables": 50.0}
+        )
+        thin, wedding = result["events"]
+
+        assert thin["name"] == "Thin Quote"
+        assert thin["is_unprofitable"] is True
+        assert thin["margin_erosion"] > wedding["margin_erosion"] > 0
+        assert wedding["is_unprofitable"] is False
+        assert result["unprofitable_count"] == 1
+        assert result["ingredients_shocked_count"] == 2
+
+    def test_ingredient_shock_and_status_filter(self, db_session, priced_events):
+        """Test an ingredient-level shock on confirmed events only"""
+        result = SimulationService.simulate_margin_at_risk(
+            db_session, *JUNE, statuses=[EventStatus.CONFIRMED], ingredient_shocks={1: 100.0}
+        )
+
+        assert [e["name"] for e in result["events"]] == ["Wedding Reception"]
+        assert result["events"][0]["simulated_cost"] > result["events"][0]["frozen_cost"]
+
+    def test_endpoint(self, client, db_session, priced_events):
+        """Test POST /simulation/margin-at-risk"""
+        response = client.post("/api/v1/simulation/margin-at-risk", json={
+            "start_date": "2025-06-01", "end_date": "2025-06-30",
+            "statuses": ["quoted"], "category_shocks": {"Vegetables": 50.0},
+        })
+
+        assert response.status_code == 200
+        assert response.json()["unprofitable_count"] == 1
+
+    def test_reversed_range_rejected(self, client):
+        """Test an end date before the start date is a validation error"""
+        response = client.post("/api/v1/simulation/margin-at-risk", json={
+            "start_date": "2025-07-01", "end_date": "2025-06-01",
+        })
+
+        assert response.status_code == 422
@@ -0,0 +1,130 @@
+"""
+Tests for the Monte Carlo cost-risk simulation
+"""
+import math
+import numpy as np
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from app.models.ingredient import IngredientPriceHistory
+from app.services import monte_carlo_service
+from app.services.monte_carlo_service import MonteCarloService
+
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+def _change(ingredient_id, old, new, days_ago):
+    return SimpleNamespace(ingredient_id=ingredient_id, old_cost=old, new_cost=new,
+                           created_at=NOW - timedelta(days=days_ago))
+
+
+@pytest.fixture
+def tomato_history(db_session, sample_events):
+    """Tomato rose 10% three times over the last 100 days"""
+    cost = 150.0 / 1.1 ** 3
+    for days_ago in (100, 60, 20):
+        db_session.add(IngredientPriceHistory(
+            ingredient_id=1, old_cost=cost, new_cost=cost * 1.1,
+            created_at=datetime.now(timezone.utc) - timedelta(days=days_ago),
+        ))
+        cost *= 1.1
+    db_session.commit()
+
+
+class TestHistogramPercentiles:
+    """Percentiles read from the per-output histograms"""
+
+    def test_matches_exact_percentiles(self):
+        """Test histogram percentiles stay within a bin of np.percentile"""
+        drift, volatility = np.array([0.001, 0.0, -0.002]), np.array([0.02, 0.0, 0.05])
+        weights = np.array([[1.0, 2.0, 0.0], [0.0, 3.0, 0.0], [0.5, 0.0, 4.0], [0.0, 0.0, 0.0]])
+        draws = 5000
+        exact = np.percentile(np.vstack(list(monte_carlo_service._sample_batches(
+            drift, volatility, weights, 90, draws, np.random.default_rng(11)
+        ))), monte_carlo_service.PERCENTILES, axis=0)
+
+        log_low = np.full(4, -2.0)
+        bin_width = np.full(4, 6.0 / monte_carlo_service.BINS)
+        counts, low, high = monte_carlo_service._sample_histograms(
+            drift, volatility, weights, 90, draws, 11, log_low, bin_width
+        )
+        estimate = monte_carlo_service._histogram_percentiles(counts, low, high, log_low, bin_width)
+
+        assert counts.shape == (4, monte_carlo_service.BINS)
+        assert counts.sum(axis=1).tolist() == [draws] * 4
+        assert estimate == pytest.approx(exact, rel=0.01)
+        assert estimate[:, 1].tolist() == [3.0] * 3 and estimate[:, 3].tolist() == [0.0] * 3
+
+
+class TestParameterEstimation:
+    """Drift and volatility from logged price changes"""
+
+    def test_ingredient_estimates(self):
+        """Test drift = sum(log changes) / window and realized volatility"""
+        history = [_change(1, 100.0, 110.0, 100), _change(1, 110.0, 121.0, 50), _change(1, 121.0, 133.1, 10)]
+        params = MonteCarloService.estimate_parameters(history, {1: "Veg", 2: None}, NOW)
+
+        r = math.log(1.1)
+        assert params[1]["drift_per_day"] == pytest.approx(3 * r / 100)
+        assert params[1]["volatility_per_day"] == pytest.approx(math.sqrt(3 * r * r / 100))
+        assert params[1]["source"] == "ingredient"
+        assert params[2]["source"] == "none"
+
+    def test_category_fallback(self):
+        """Test an ingredient without enough history borrows its category"""
+        history = [_change(1, 100.0, 110.0, 100), _change(1, 110.0, 121.0, 50),
+                   _change(1, 121.0, 133.1, 10), _change(2, 10.0, 9.0, 30)]
+        params = MonteCarloService.estimate_parameters(history, {1: "Veg", 2: "Veg", 3: "Veg"}, NOW)
+
+        assert params[1]["source"] == "ingredient"
+        assert params[2]["source"] == "category"
+        assert params[3] == params[2]
+        assert params[2]["observations"] == 4
+
+
+class TestMonteCarloSimulation:
+    """Percentiles per recipe and per confirmed event"""
+
+    def test_no_history_is_deterministic(self, db_session, sample_events):
+        """Test without price history every percentile equals today's cost"""
+        result = MonteCarloService.run_simulation(db_session, draws=200, seed=1, today=date(2025, 6, 1))
+
+        for recipe in result["recipes"]:
+            assert recipe["p50"] == recipe["p99"] == pytest.approx(recipe["current_cost_per_portion"], abs=0.01)
+        assert result["events"][0]["p50"] == pytest.approx(result["events"][0]["current_cost"], abs=0.01)
+
+    def test_rising_tomato_raises_sauce_and_event(self, db_session, tomato_history):
+        """Test upward drift on tomato shows in the sauce, the dish and the event"""
+        result = MonteCarloService.run_simulation(db_session, horizon_days=90, draws=2000, seed=7,
+                                                  today=date(2025, 6, 1))
+        sauce = next(r for r in result["recipes"] if r["recipe_id"] == 1)
+        event = result["events"][0]
+
+        assert sauce["current_cost_per_portion"] < sauce["p50"] <= sauce["p90"] <= sauce["p99"]
+        assert event["name"] == "Wedding Reception"
+        assert event["current_cost"] < event["p50"] < event["p99"]
+        # Onion has no history of its own: it borrows the Vegetables estimate
+        assert [(p["ingredient_id"], p["source"]) for p in result["parameters"]] == [(1, "ingredient"), (2, "category")]
+
+    def test_seed_is_reproducible(self, db_session, tomato_history):
+        """Test the same seed gives the same percentiles"""
+        first = MonteCarloService.run_simulation(db_session, draws=500, seed=3, today=date(2025, 6, 1))
+        second = MonteCarloService.run_simulation(db_session, draws=500, seed=3, today=date(2025, 6, 1))
+
+        assert first["recipes"] == second["recipes"]
+
+    def test_process_pool(self, db_session, tomato_history):
+        """Test draws split across two worker processes"""
+        result = MonteCarloService.run_simulation(db_session, draws=1001, workers=2, seed=5,
+                                                  today=date(2025, 6, 1))
+        sauce = next(r for r in result["recipes"] if r["recipe_id"] == 1)
+
+        assert result["draws"] == 1001
+        assert sauce["p50"] > sauce["current_cost_per_portion"]
+
+    def test_endpoint(self, client, db_session, tomato_history):
+        """Test GET /simulation/monte-carlo"""
+        response = client.get("/api/v1/simulation/monte-carlo?draws=500&seed=1&mode=category")
+
+        assert response.status_code == 200
+        assert response.json()["mode"] == "category"
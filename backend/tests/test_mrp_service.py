@@ -0,0 +1,94 @@
+"""
+Tests for the time-phased MRP engine
+"""
+import pytest
+from array import array
+from datetime import date
+from app.models.event import Event, EventOrder, EventStatus
+from app.models.ingredient import Ingredient
+from app.models.supplier import Supplier, SupplierProduct
+from app.services.mrp_service import MRPService
+
+START = date(2025, 6, 1)
+
+
+@pytest.fixture
+def two_events(db_session, sample_events):
+    """
+    Wedding on 06-15 (10 kg tomato) and a lunch on 06-20 (5.6 kg tomato).
+    Only 12 kg of tomato in stock; the default supplier needs 3 days.
+    """
+    event = Event(name="Corporate Lunch", client_name="ACME", event_date=date(2025, 6, 20),
+                  guest_count=40, status=EventStatus.CONFIRMED)
+    db_session.add(event)
+    db_session.add(Supplier(id=1, name="Mercado", lead_time_days=3))
+    db_session.commit()
+    db_session.add_all([
+        EventOrder(event_id=event.id, recipe_id=2, quantity=40.0, unit_price_frozen=150.0, cost_at_sale=0.0),
+        EventOrder(event_id=event.id, recipe_id=1, quantity=2.0, unit_price_frozen=10.0, cost_at_sale=0.0),
+    ])
+    tomato = db_session.get(Ingredient, 1)
+    tomato.stock_quantity = 12.0
+    tomato.default_supplier_id = 1
+    db_session.commit()
+
+
+class TestMRPService:
+    """Demand buckets, projected stock and planned orders"""
+
+    def test_projection(self):
+        """Test cumulative on-hand and lot-for-lot net requirements"""
+        result = MRPService.project(array("d", [0.0, 4.0, 0.0, 3.0, 2.0]), 5.0)
+
+        assert list(result["projected_on_hand"]) == [5.0, 1.0, 1.0, -2.0, -4.0]
+        assert list(result["net_requirements"]) == [0.0, 0.0, 0.0, 2.0, 2.0]
+        assert result["first_shortage_day"] == 3
+
+    def test_runs_out_on_event_day(self, db_session, two_events):
+        """Test tomato runs short on 06-20 and is ordered 3 days earlier"""
+        result = MRPService.get_requirements(db_session, START, horizon_days=30, today=START)
+        tomato = next(i for i in result["ingredients"] if i["id"] == 1)
+
+        assert result["ingredients"][0]["id"] == 1  # only shortage sorts first
+        assert tomato["demand"][14] == pytest.approx(10.0)
+        assert tomato["demand"][19] == pytest.approx(5.6)
+        assert tomato["projected_on_hand"][14] == pytest.approx(2.0)
+        assert tomato["first_shortage_date"] == date(2025, 6, 20)
+        assert tomato["total_demand"] == pytest.approx(15.6)
+
+        assert len(tomato["planned_orders"]) == 1
+        order = tomato["planned_orders"][0]
+        assert order["quantity"] == pytest.approx(3.6)
+        assert order["order_by"] == date(2025, 6, 17)
+        assert order["is_late"] is False
+        assert tomato["supplier_name"] == "Mercado"
+
+    def test_lead_time_from_offers(self, db_session, two_events):
+        """Test ingredients without a default supplier use the fastest offer"""
+        db_session.add(Supplier(id=2, name="Aceites", lead_time_days=5))
+        db_session.add(SupplierProduct(supplier_id=2, ingredient_id=3, price=600.0))
+        db_session.commit()
+
+        lead_times = MRPService.load_lead_times(db_session, [1, 3, 4])
+
+        assert lead_times[1]["lead_time_days"] == 3
+        assert lead_times[3] == {"supplier_id": None, "supplier_name": None, "lead_time_days": 5}
+        assert 4 not in lead_times
+
+    def test_horizon_excludes_later_events(self, db_session, two_events):
+        """Test a horizon ending before 06-20 sees no shortage"""
+        result = MRPService.get_requirements(db_session, START, horizon_days=16, include_series=False)
+        tomato = next(i for i in result["ingredients"] if i["id"] == 1)
+
+        assert result["end_date"] == date(2025, 6, 16)
+        assert tomato["first_shortage_date"] is None
+        assert "demand" not in tomato
+
+    def test_endpoint(self, client, db_session, two_events):
+        """Test GET /production/mrp"""
+        response = client.get("/api/v1/production/mrp?start_date=2025-06-01&horizon_days=30")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["dates"]) == 30
+        assert data["ingredients"][0]["first_shortage_date"] == "2025-06-20"
@@ -0,0 +1,110 @@
+"""
+Tests for keyset (cursor) pagination
+"""
+import pytest
+from datetime import date, datetime
+from fastapi import HTTPException
+from app.core.pagination import decode_cursor, encode_cursor, paginate
+from app.models.event import Event, EventStatus
+from app.models.ingredient import Ingredient
+from app.models.supplier import Supplier
+from tests.conftest import QueryCounter
+
+
+@pytest.fixture
+def many_ingredients(db_session, sample_units):
+    """25 ingredients with repeated names, so ties need the id tiebreak"""
+    db_session.add_all([
+        Ingredient(name=f"Item {i % 5}", sku=f"SKU-{i:03d}", category="Dry", purchase_unit_id=1,
+                   usage_unit_id=2, conversion_ratio=1000.0, current_cost=float(i))
+        for i in range(25)
+    ])
+    db_session.commit()
+
+
+class TestCursor:
+    """Opaque cursor encoding"""
+
+    def test_roundtrip_keeps_types(self):
+        """Test dates and datetimes survive the cursor"""
+        for value in (date(2025, 6, 1), datetime(2025, 6, 1, 12, 30), "Tomato", 0.125):
+            assert decode_cursor(encode_cursor("s", value, 7), "s") == {"k": value, "id": 7}
+
+    def test_rejects_garbage_and_other_sort(self):
+        """Test malformed cursors and cursors of another sort are 400"""
+        for cursor, sort in (("not-a-cursor", "s"), (encode_cursor("name", "a", 1), "margin")):
+            with pytest.raises(HTTPException) as exc:
+                decode_cursor(cursor, sort)
+            assert exc.value.status_code == 400
+
+
+class TestPaginate:
+    """Keyset pages over (sort key, id)"""
+
+    def test_cursor_walk_matches_offset_order(self, db_session, many_ingredients):
+        """Test walking with cursors visits every row once, in offset order"""
+        query = db_session.query(Ingredient)
+        expected = [i.id for i in query.order_by(Ingredient.name, Ingredient.id)]
+
+        seen, cursor = [], None
+        while True:
+            page = paginate(query, Ingredient.name, Ingredient.id, 7, sort="name", cursor=cursor)
+            seen += [i.id for i in page["items"]]
+            if not page["has_more"]:
+                break
+            cursor = page["next_cursor"]
+
+        assert seen == expected
+
+    def test_descending_with_ties(self, db_session, sample_units):
+        """Test descending date order with equal dates"""
+        for i in range(5):
+            db_session.add(Event(name=f"E{i}", client_name="C", event_date=date(2025, 6, 1 + i // 2),
+                                 guest_count=10, status=EventStatus.QUOTED))
+        db_session.commit()
+        query = db_session.query(Event)
+
+        first = paginate(query, Event.event_date, Event.id, 2, sort="date", descending=True)
+        second = paginate(query, Event.event_date, Event.id, 2, sort="date", descending=True, cursor=first["next_cursor"])
+        third = paginate(query, Event.event_date, Event.id, 2, sort="date", descending=True, cursor=second["next_cursor"])
+
+        assert [e.name for e in first["items"] + second["items"] + third["items"]] == ["E4", "E3", "E2", "E1", "E0"]
+        assert third["has_more"] is False and third["next_cursor"] is None
+
+    def test_count_only_on_request(self, db_session, many_ingredients):
+        """Test the count query runs by default with offsets, not with cursors"""
+        query = db_session.query(Ingredient)
+        with QueryCounter() as counter:
+            page = paginate(query, Ingredient.name, Ingredient.id, 10)
+        assert (page["total"], counter.count) == (25, 2)
+
+        with QueryCounter() as counter:
+            page = paginate(query, Ingredient.name, Ingredient.id, 10, cursor=page["next_cursor"])
+        assert (page["total"], counter.count) == (None, 1)
+
+
+class TestListEndpoints:
+    """Cursor parameters on the list endpoints"""
+
+    def test_ingredients_cursor(self, client, many_ingredients):
+        """Test /ingredients/ pages by cursor and keeps page fields for offsets"""
+        first = client.get("/api/v1/ingredients/", params={"limit": 20}).json()
+        assert first["total"] == 25 and first["pages"] == 2
+
+        second = client.get("/api/v1/ingredients/", params={"limit": 20, "cursor": first["next_cursor"]}).json()
+        assert len(second["items"]) == 5
+        assert second["total"] is None and second["has_more"] is False
+        assert client.get("/api/v1/ingredients/", params={"cursor": "bad"}).status_code == 400
+
+    def test_suppliers_cursor_headers(self, client, db_session):
+        """Test /suppliers/ keeps a list body and pages through headers"""
+        db_session.add_all([Supplier(name=f"Supplier {i}") for i in range(3)])
+        db_session.commit()
+
+        response = client.get("/api/v1/suppliers/", params={"limit": 2, "include_total": True})
+        assert len(response.json()) == 2
+        assert response.headers["X-Total-Count"] == "3"
+
+        rest = client.get("/api/v1/suppliers/", params={"limit": 2, "cursor": response.headers["X-Next-Cursor"]})
+        assert [s["name"] for s in rest.json()] == ["Supplier 2"]
+        assert "X-Next-Cursor" not in rest.headers
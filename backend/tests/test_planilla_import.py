@@ -0,0 +1,118 @@
+"""
+Tests for the PlanillaLEO workbook loader
+"""
+import pytest
+from app.models.ingredient import Ingredient
+from app.models.recipe import Recipe, RecipeClosure, RecipeItem
+from app.services.cost_cache_service import RecipeCostCacheService
+from app.services.planilla_import_service import PlanillaImportService
+
+
+def sheet_row(*cells, summary=None):
+    """Row with cells from column A; summary=(key, code) fills columns P/Q"""
+    row = list(cells) + [None] * (17 - len(cells))
+    if summary:
+        row[15], row[16] = summary
+    return row
+
+
+def menu_sheet():
+    """Trimmed copy of the workbook's Menu sheet (cached values)"""
+    header = ("Mat", "Obs", "Unidad", "Peso / Cant", "$%", "$ x p / c ", "$ Stot")
+    return iter([
+        sheet_row(None, "Cant Ori", "70 PAX", 20, "Menu x PAX"),
+        sheet_row(None, "TOT Costo ", None, 42250, 2112.5),
+        sheet_row(summary=("F1", "Emp.Bond")),
+        sheet_row(summary=("F2", "B.Salmon")),
+        sheet_row("Caniceria", *header),
+        sheet_row("Emp.Bond", "Bondiola de CERDO", None, "Kgs", 1.5, 1, 8800, 13200),
+        sheet_row(None, None, None, "Kgs", None, 1, 18390, 0),
+        sheet_row(None, None, "Depostado / Desperdicio", 0.08, 0.12),
+        sheet_row(None, None, None, None, None, None, "tot", 13200),
+        sheet_row("Almacen", *header),
+        sheet_row("B.Salmon", "Pan", None, "Cant", 1.6, 1, 2400, 3840),
+        sheet_row("B.Salmon", "Salmon", None, "Kgs", 0.5, 1, 38000, 19000),
+        sheet_row("Emp.Bond", "Tapas empanadas", None, "paq", 0, 1, 8800, 0),
+        sheet_row("Cond", "Condimentos", None, "Cant", 1, 1, 3500, 3500),
+        sheet_row(None, "Film", "ML", "Rollo", 1, 0, 5390, 0),
+        sheet_row(None, None, None, None, None, None, "tot", 26340),
+        sheet_row("Brigada", "Mat", None, None, "Cantidad "),
+        sheet_row("Brigada CE", "Cocinero ", None, "Personas", 1, 1, 15000, 15000),
+        sheet_row(None, None, None, None, None, None, "tot", 15000),
+    ])
+
+
+class TestParseMenuSheet:
+    """PlanillaImportService.parse_menu_sheet"""
+
+    def test_sections_and_totals(self):
+        """Test base portions, dish codes, waste and section totals"""
+        parsed = PlanillaImportService.parse_menu_sheet(menu_sheet())
+
+        assert parsed["base_portions"] == 20
+        assert parsed["dishes"] == ["Emp.Bond", "B.Salmon"]
+        assert [s["name"] for s in parsed["sections"]] == ["Caniceria", "Almacen"]
+        assert parsed["sections"][0]["waste"] == 0.08
+        assert parsed["sections"][1]["sheet_total"] == 26340
+        assert parsed["skipped_sections"][0]["name"] == "Brigada"
+
+    def test_not_a_planilla(self):
+        """Test sheets without the base portions row are rejected"""
+        with pytest.raises(Exception) as exc:
+            PlanillaImportService.parse_menu_sheet(iter([["a", "b"]]))
+        assert exc.value.status_code == 400
+
+
+class TestImportWorkbook:
+    """PlanillaImportService.import_workbook"""
+
+    def test_builds_menu_tree(self, db_session, sample_units):
+        """Test dishes, menu sub-recipes, closure and costs matching the sheet"""
+        report = PlanillaImportService.import_workbook(db_session, menu_sheet(), "Menu Test", apply_waste=False)
+
+        assert report["errors"] == [{"row": 15, "error": "Unknown unit 'Rollo'"}]
+        assert (report["ingredients_created"], report["recipes_created"]) == (4, 3)
+        assert report["rows_skipped"] == 1
+        assert all(c["difference"] == 0 for c in report["costs"] if c["recipe"] != "Menu Test")
+
+        menu = db_session.query(Recipe).filter_by(name="Menu Test").one()
+        children = {i.child_recipe.name for i in menu.items if i.child_recipe_id}
+        assert children == {"Menu Test – Emp.Bond", "Menu Test – B.Salmon"}
+        assert db_session.query(RecipeClosure).filter_by(ancestor_id=menu.id, depth=1).count() == 2
+        # Condiments hang on the menu, per guest
+        cond = next(i for i in menu.items if i.ingredient_id)
+        assert cond.quantity == pytest.approx(1 / 20)
+        assert menu.cost_per_portion == pytest.approx((13200 + 3840 + 19000 + 3500) / 20)
+        assert RecipeCostCacheService.check_consistency(db_session)["consistent"]
+
+    def test_waste_becomes_yield_factor(self, db_session, sample_units):
+        """Test the section waste raises the dish cost above the sheet"""
+        report = PlanillaImportService.import_workbook(db_session, menu_sheet(), "Menu Test")
+
+        pork = db_session.query(Ingredient).filter_by(name="Bondiola de CERDO").one()
+        assert pork.yield_factor == pytest.approx(0.92)
+        dish = next(c for c in report["costs"] if c["recipe"] == "Menu Test – Emp.Bond")
+        assert dish["computed_cost"] == pytest.approx(13200 / 0.92, rel=1e-4)
+
+    def test_dry_run_and_reimport(self, db_session, sample_units):
+        """Test dry runs write nothing and re-imports reuse existing rows"""
+        PlanillaImportService.import_workbook(db_session, menu_sheet(), "Menu Test", dry_run=True)
+        assert db_session.query(Recipe).count() == 0
+
+        PlanillaImportService.import_workbook(db_session, menu_sheet(), "Menu Test")
+        items = db_session.query(RecipeItem).count()
+        report = PlanillaImportService.import_workbook(db_session, menu_sheet(), "Menu Test")
+
+        assert (report["recipes_existing"], report["ingredients_existing"]) == (3, 4)
+        assert report["items_created"] == 0
+        assert db_session.query(RecipeItem).count() == items
+
+    def test_dishes_are_per_menu(self, db_session, sample_units):
+        """Test a second menu with the same dish codes gets its own dishes"""
+        PlanillaImportService.import_workbook(db_session, menu_sheet(), "Menu Test")
+        report = PlanillaImportService.import_workbook(db_session, menu_sheet(), "Menu Dos")
+
+        assert (report["recipes_existing"], report["recipes_created"]) == (0, 3)
+        menu = db_session.query(Recipe).filter_by(name="Menu Dos").one()
+        children = {i.child_recipe.name for i in menu.items if i.child_recipe_id}
+        assert children == {"Menu Dos – Emp.Bond", "Menu Dos – B.Salmon"}
@@ -0,0 +1,69 @@
+"""
+Tests for the shelf-life aware prep scheduler
+"""
+import pytest
+from datetime import date
+from app.models.event import Event, EventOrder, EventStatus
+from app.models.recipe import Recipe
+from app.services.prep_schedule_service import PrepScheduleService
+
+JUNE = (date(2025, 6, 1), date(2025, 6, 30))
+
+
+@pytest.fixture
+def sauce_events(db_session, sample_events):
+    """Pasta on 06-15 (12.5 L sauce), 06-16 (1 L) and 06-20 (5 L)"""
+    for day, portions in ((16, 8.0), (20, 40.0)):
+        event = Event(name=f"Event {day}", client_name="C", event_date=date(2025, 6, day),
+                      guest_count=int(portions), status=EventStatus.CONFIRMED)
+        db_session.add(event)
+        db_session.flush()
+        db_session.add(EventOrder(event_id=event.id, recipe_id=2, quantity=portions,
+                                  unit_price_frozen=100.0, cost_at_sale=0.0))
+    db_session.commit()
+
+
+class TestPrepSchedule:
+    """Fewest batches within shelf life, and a daily timeline"""
+
+    def test_batches_within_shelf_life(self, db_session, sauce_events):
+        """Test a 3-day sauce is made twice: 06-15 (for 15 and 16) and 06-20"""
+        db_session.get(Recipe, 1).shelf_life_hours = 72
+        db_session.commit()
+
+        schedule = PrepScheduleService.get_prep_schedule(db_session, *JUNE)
+        batches = schedule["batches"]
+
+        assert [b["prep_date"] for b in batches] == [date(2025, 6, 15), date(2025, 6, 20)]
+        assert batches[0]["quantity"] == pytest.approx(13.5)
+        assert [e["name"] for e in batches[0]["events"]] == ["Wedding Reception", "Event 16"]
+        assert batches[0]["runs"] == 14  # 1 L per 30-minute run
+        assert batches[0]["prep_minutes"] == 14 * 30
+        assert batches[0]["use_by"] == date(2025, 6, 18)
+        assert schedule["total_prep_minutes"] == (14 + 5) * 30
+
+        assert [d["date"] for d in schedule["timeline"]] == [date(2025, 6, 15), date(2025, 6, 20)]
+        assert schedule["timeline"][1]["total_prep_minutes"] == 150
+
+    def test_short_shelf_life_same_day_only(self, db_session, sauce_events):
+        """Test a sauce lasting under a day is made for each event day"""
+        db_session.get(Recipe, 1).shelf_life_hours = 12
+        db_session.commit()
+
+        schedule = PrepScheduleService.get_prep_schedule(db_session, *JUNE)
+
+        assert schedule["total_batches"] == 3
+
+    def test_greedy_cover(self):
+        """Test the sweep starts a new batch only past the shelf-life window"""
+        days = [date(2025, 1, d) for d in (1, 2, 4, 5, 9, 3)]
+        batches = PrepScheduleService.batch_demand([{"date": d} for d in days], 2)
+
+        assert [[e["date"].day for e in b] for b in batches] == [[1, 2, 3], [4, 5], [9]]
+
+    def test_endpoint(self, client, db_session, sauce_events):
+        """Test GET /production/prep-schedule"""
+        response = client.get("/api/v1/production/prep-schedule?start_date=2025-06-01&end_date=2025-06-30")
+
+        assert response.status_code == 200
+        assert response.json()["total_batches"] == 2  # default 24 h shelf life
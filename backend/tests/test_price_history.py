@@ -0,0 +1,123 @@
+"""
+Tests for the downsampled ingredient price history
+"""
+import pytest
+from datetime import date, datetime, timezone
+from app.models.ingredient import IngredientPriceDaily, IngredientPriceHistory
+from app.services import price_history_service
+from app.services.ingredient_service import IngredientService
+from app.services.price_history_service import PriceHistoryService
+
+JAN, FEB_END = date(2025, 1, 1), date(2025, 2, 28)
+
+
+def log(db_session, ingredient_id, when, new_cost):
+    db_session.add(IngredientPriceHistory(
+        ingredient_id=ingredient_id, old_cost=0.0, new_cost=new_cost, created_at=when
+    ))
+
+
+@pytest.fixture
+def history(db_session, sample_ingredients):
+    """Tomato changes three days in January and once in February"""
+    log(db_session, 1, datetime(2025, 1, 6, 9), 100.0)
+    log(db_session, 1, datetime(2025, 1, 6, 15), 110.0)
+    log(db_session, 1, datetime(2025, 1, 8, 12), 90.0)
+    log(db_session, 1, datetime(2025, 2, 3, 10), 120.0)
+    log(db_session, 2, datetime(2025, 1, 7, 10), 50.0)
+    log(db_session, 3, datetime(2025, 1, 7, 10), 500.0)
+    PriceHistoryService.refresh_daily(db_session, rebuild=True)
+    db_session.commit()
+
+
+def points(result, index=0):
+    return [(p["period"], p["value"], p["changes"]) for p in result["series"][index]["points"]]
+
+
+class TestPriceSeries:
+    """PriceHistoryService.get_series"""
+
+    def test_daily_last(self, db_session, history):
+        """Test the daily series keeps each day's last price"""
+        result = PriceHistoryService.get_series(db_session, JAN, FEB_END, ingredient_id=1)
+
+        assert result["source"] == "rollup"
+        assert points(result) == [
+            (date(2025, 1, 6), 110.0, 2), (date(2025, 1, 8), 90.0, 1), (date(2025, 2, 3), 120.0, 1),
+        ]
+
+    def test_weekly_and_monthly_aggregates(self, db_session, history):
+        """Test avg per week and min/max per month"""
+        weekly = PriceHistoryService.get_series(db_session, JAN, FEB_END, "week", "avg", ingredient_id=1)
+        low = PriceHistoryService.get_series(db_session, JAN, FEB_END, "month", "min", ingredient_id=1)
+        high = PriceHistoryService.get_series(db_session, JAN, FEB_END, "month", "max", ingredient_id=1)
+
+        assert points(weekly)[0] == (date(2025, 1, 6), 100.0, 3)
+        assert [p[1] for p in points(low)] == [90.0, 120.0]
+        assert [p[1] for p in points(high)] == [110.0, 120.0]
+
+    def test_category_series(self, db_session, history):
+        """Test one series per ingredient of the category"""
+        result = PriceHistoryService.get_series(db_session, JAN, FEB_END, "month", category="Vegetables")
+
+        assert [s["ingredient_name"] for s in result["series"]] == ["Onion", "Tomato"]
+
+    def test_reads_do_not_write(self, db_session, history):
+        """Test history logged without a refresh is not rolled up by a read"""
+        log(db_session, 1, datetime(2025, 2, 3, 18), 125.0)
+        db_session.commit()
+        result = PriceHistoryService.get_series(db_session, JAN, FEB_END, "month", ingredient_id=1)
+
+        assert points(result)[-1] == (date(2025, 2, 1), 120.0, 1)
+        assert not db_session.new and not db_session.dirty
+
+    def test_refresh_upserts_changed_days(self, db_session, history):
+        """Test a scoped refresh updates the day in place, also when repeated"""
+        log(db_session, 1, datetime(2025, 2, 3, 18), 125.0)
+        for _ in range(2):
+            PriceHistoryService.refresh_daily(db_session, [1], since=datetime(2025, 2, 3, 18))
+        db_session.commit()
+        result = PriceHistoryService.get_series(db_session, JAN, FEB_END, "month", ingredient_id=1)
+
+        assert points(result)[-1] == (date(2025, 2, 1), 125.0, 2)
+        assert db_session.query(IngredientPriceDaily).count() == 5
+
+    def test_bulk_update_refreshes_rollup(self, db_session, history):
+        """Test price writes roll up their own day"""
+        IngredientService.bulk_update_prices(db_session, 10, category="Oils")
+        today = datetime.now(timezone.utc).date()
+        result = PriceHistoryService.get_series(db_session, today, today, ingredient_id=3)
+
+        assert points(result) == [(today, 550.0, 1)]
+
+    def test_raw_source_matches_rollup(self, db_session, history):
+        """Test the series is the same without the rollup table"""
+        expected = PriceHistoryService.get_series(db_session, JAN, FEB_END, "week", "avg", category="Vegetables")
+
+        IngredientPriceDaily.__table__.drop(bind=db_session.connection())
+        price_history_service._ready_urls.clear()
+        result = PriceHistoryService.get_series(db_session, JAN, FEB_END, "week", "avg", category="Vegetables")
+
+        assert result["source"] == "raw"
+        assert result["series"] == expected["series"]
+        price_history_service._ready_urls.clear()
+
+
+class TestPriceHistoryEndpoint:
+    """GET /ingredients/price-history"""
+
+    def test_monthly_series(self, client, history):
+        """Test the endpoint returns the downsampled series"""
+        response = client.get(
+            "/api/v1/ingredients/price-history",
+            params={"ingredient_id": 1, "start_date": "2025-01-01", "end_date": "2025-02-28", "granularity": "month"},
+        )
+
+        assert response.status_code == 200
+        assert [p["value"] for p in response.json()["series"][0]["points"]] == [90.0, 120.0]
+
+    def test_validation(self, client):
+        """Test reversed ranges and unknown aggregates are rejected"""
+        base = "/api/v1/ingredients/price-history"
+        assert client.get(base, params={"start_date": "2025-02-01", "end_date": "2025-01-01"}).status_code == 400
+        assert client.get(base, params={"agg": "median"}).status_code == 422
@@ -0,0 +1,164 @@
+"""
+Tests for the vector-based production plan
+"""
+import pytest
+from datetime import date
+from app.models.event import Event, EventOrder, EventStatus
+from app.models.ingredient import Ingredient
+from app.models.recipe import Recipe, RecipeItem, RecipeType
+from app.services.production_service import ProductionService
+from app.services.unit_conversion_service import UnitConversionService
+from tests.conftest import QueryCounter
+
+JUNE = (date(2025, 6, 1), date(2025, 6, 30))
+
+
+@pytest.fixture
+def june_events(db_session, sample_events, sample_recipes):
+    """Second confirmed event ordering both the dish and the sauce directly"""
+    event = Event(
+        name="Corporate Lunch",
+        client_name="ACME",
+        event_date=date(2025, 6, 20),
+        guest_count=40,
+        status=EventStatus.CONFIRMED,
+    )
+    db_session.add(event)
+    db_session.commit()
+    db_session.add_all([
+        EventOrder(event_id=event.id, recipe_id=2, quantity=40.0, unit_price_frozen=150.0, cost_at_sale=0.0),
+        EventOrder(event_id=event.id, recipe_id=1, quantity=2.0, unit_price_frozen=10.0, cost_at_sale=0.0),
+    ])
+    db_session.commit()
+    return sample_events + [event]
+
+
+class TestProductionPlanVectors:
+    """Plan totals through sub-recipes, in purchase units"""
+
+    def test_known_totals(self, db_session, june_events):
+        """Test ingredients, quantities, units, events and order for the two events"""
+        plan = ProductionService.get_production_plan(db_session, *JUNE)
+
+        # 140 pasta portions (0.5 L sauce per 4) + 2 L sauce ordered directly
+        sauce = 140 * 0.5 / 4 + 2
+        assert [s["id"] for s in plan["sub_recipes"]] == [1]
+        assert plan["sub_recipes"][0]["total_quantity"] == pytest.approx(sauce)
+        assert plan["sub_recipes"][0]["events"] == ["Wedding Reception", "Corporate Lunch"]
+
+        expected = {1: (0.8, "Kilogram"), 2: (0.1, "Kilogram"), 3: (0.05, "Liter"), 4: (0.005, "Kilogram")}
+        assert [i["id"] for i in plan["ingredients"]] == list(expected)
+        for item in plan["ingredients"]:
+            per_liter, unit = expected[item["id"]]
+            assert item["total_required"] == pytest.approx(per_liter * sauce)
+            assert item["to_buy"] == 0.0  # fixture stock covers it
+            assert item["unit"] == unit
+            assert item["events"] == ["Wedding Reception", "Corporate Lunch"]
+
+    def test_flatten_folds_sub_recipes(self, db_session, sample_recipes):
+        """Test the dish vector includes the sauce ingredients per portion"""
+        vectors = {}
+        conversions = UnitConversionService.load_table(db_session, db_session.query(Ingredient).all())
+        vector = ProductionService._flatten_recipe(sample_recipes[1], vectors, {}, conversions)
+
+        # Pasta: 0.5 L sauce per 4 portions; sauce: 800 g tomato per 1 L (in kg)
+        assert vector["ingredients"][1] == pytest.approx(0.8 * 0.5 / 4)
+        assert vector["sub_recipes"] == {1: pytest.approx(0.5 / 4)}
+        assert set(vectors) == {1, 2}
+
+
+@pytest.fixture
+def many_events(db_session, june_events):
+    """Ten more events and a deeper chain: Lasagna -> Pasta -> Tomato Sauce"""
+    lasagna = Recipe(name="Lasagna", recipe_type=RecipeType.SUB_RECIPE, yield_quantity=10.0)
+    db_session.add(lasagna)
+    db_session.commit()
+    db_session.add_all([
+        RecipeItem(parent_recipe_id=lasagna.id, child_recipe_id=2, quantity=3.0, unit_id=5),
+        RecipeItem(parent_recipe_id=lasagna.id, ingredient_id=4, quantity=10.0, unit_id=2),
+    ])
+    for i in range(10):
+        event = Event(
+            name=f"Event {i}",
+            client_name="Client",
+            event_date=date(2025, 6, 1 + i),
+            guest_count=20,
+            status=EventStatus.CONFIRMED,
+        )
+        db_session.add(event)
+        db_session.flush()
+        db_session.add(EventOrder(
+            event_id=event.id, recipe_id=lasagna.id if i % 2 else 2,
+            quantity=20.0, unit_price_frozen=100.0, cost_at_sale=0.0,
+        ))
+    db_session.get(Ingredient, 1).stock_quantity = 0.0  # tomato must be bought
+    db_session.commit()
+    db_session.expunge_all()
+
+
+class TestProductionPlanQueries:
+    """The plan is built from a fixed number of bulk queries"""
+
+    def test_plan_query_count(self, db_session, many_events):
+        """Test 13 events and 4 recipe levels still take 4 statements"""
+        with QueryCounter() as queries:
+            plan = ProductionService.get_production_plan(db_session, *JUNE)
+
+        assert len(plan["events"]) == 12
+        assert {s["name"] for s in plan["sub_recipes"]} == {"Tomato Sauce", "Lasagna"}
+        assert queries.count == 4
+
+    def test_shopping_list_query_count(self, client, db_session, many_events):
+        """Test the shopping-list endpoint issues the same 4 statements"""
+        with QueryCounter() as queries:
+            response = client.get("/api/v1/production/shopping-list?start_date=2025-06-01&end_date=2025-06-30")
+
+        assert response.status_code == 200
+        assert response.json()["total_items"] > 0
+        assert queries.count == 4
+
+    def test_empty_range_single_query(self, db_session, many_events):
+        """Test a range with no events stops after the events query"""
+        with QueryCounter() as queries:
+            plan = ProductionService.get_production_plan(db_session, date(2030, 1, 1), date(2030, 1, 31))
+
+        assert plan == {"events": [], "ingredients": [], "sub_recipes": []}
+        assert queries.count == 1
+
+
+class TestProductionPlanUnits:
+    """Quantities are summed and netted in the purchase unit"""
+
+    def test_mixed_units_summed_in_purchase_unit(self, db_session, sample_recipes):
+        """Test grams and kilograms of the same ingredient add up in kg"""
+        dish = Recipe(name="Salad", yield_quantity=1.0)
+        db_session.add(dish)
+        db_session.commit()
+        db_session.add_all([
+            RecipeItem(parent_recipe_id=dish.id, ingredient_id=2, quantity=500.0, unit_id=2),  # g
+            RecipeItem(parent_recipe_id=dish.id, ingredient_id=2, quantity=1.5, unit_id=1),  # kg
+        ])
+        event = Event(name="Picnic", client_name="C", event_date=date(2025, 6, 5),
+                      guest_count=20, status=EventStatus.CONFIRMED)
+        db_session.add(event)
+        db_session.commit()
+        db_session.add(EventOrder(event_id=event.id, recipe_id=dish.id, quantity=20.0,
+                                  unit_price_frozen=10.0, cost_at_sale=0.0))
+        db_session.commit()
+
+        plan = ProductionService.get_production_plan(db_session, *JUNE)
+        onion = next(i for i in plan["ingredients"] if i["id"] == 2)
+
+        assert onion["unit"] == "Kilogram"
+        assert onion["total_required"] == pytest.approx(20 * 2.0)
+        assert onion["to_buy"] == pytest.approx(40.0 - 30.0)  # stock 30 kg
+
+    def test_stock_netted_in_purchase_unit(self, db_session, sample_events):
+        """Test 800 g of tomato per litre of sauce does not exceed 50 kg stock"""
+        plan = ProductionService.get_production_plan(db_session, *JUNE)
+        tomato = next(i for i in plan["ingredients"] if i["id"] == 1)
+
+        # 100 portions of pasta -> 12.5 L sauce -> 10 kg tomato
+        assert tomato["unit"] == "Kilogram"
+        assert tomato["total_required"] == pytest.approx(10.0)
+        assert tomato["to_buy"] == 0.0
@@ -0,0 +1,124 @@
+"""
+Tests for the supplier-aware purchase optimizer
+"""
+import pytest
+from datetime import date
+from app.models.event import Event, EventOrder, EventStatus
+from app.models.ingredient import Ingredient
+from app.models.recipe import Recipe, RecipeItem, RecipeType
+from app.models.supplier import Supplier, SupplierProduct
+from app.services.purchasing_service import PurchasingService
+
+JUNE = (date(2025, 6, 1), date(2025, 6, 30))
+
+
+@pytest.fixture
+def price_lists(db_session, sample_events):
+    """
+    Three suppliers for tomato (10 kg), onion (1.25 kg) and olive oil (0.625 L).
+    Aceites has the cheapest oil but a 5000 minimum order.
+    """
+    for ing_id in (1, 2, 3):
+        db_session.get(Ingredient, ing_id).stock_quantity = 0.0
+
+    db_session.add_all([
+        Supplier(id=1, name="Mercado", lead_time_days=2, minimum_order=0.0),
+        Supplier(id=2, name="Mayorista", lead_time_days=3, minimum_order=0.0),
+        Supplier(id=3, name="Aceites", lead_time_days=1, minimum_order=5000.0),
+    ])
+    db_session.add_all([
+        # 5000 g box = 5 kg
+        SupplierProduct(supplier_id=1, ingredient_id=1, price=700.0, package_size=5000.0, package_unit_id=2),
+        SupplierProduct(supplier_id=1, ingredient_id=2, price=90.0, package_size=1.0),
+        SupplierProduct(supplier_id=1, ingredient_id=3, price=700.0, package_size=1.0),
+        SupplierProduct(supplier_id=2, ingredient_id=1, price=1200.0, package_size=10.0),
+        SupplierProduct(supplier_id=2, ingredient_id=2, price=500.0, package_size=25.0),
+        SupplierProduct(supplier_id=3, ingredient_id=3, price=600.0, package_size=1.0),
+    ])
+    db_session.get(Ingredient, 1).default_supplier_id = 1
+    db_session.get(Ingredient, 2).default_supplier_id = 1
+    db_session.get(Ingredient, 3).default_supplier_id = 3
+    db_session.commit()
+
+
+class TestPurchasingService:
+    """Cheapest packages, minimum orders, lead times and savings"""
+
+    def test_purchase_orders(self, db_session, price_lists):
+        """Test supplier choice, package rounding and minimum-order reassignment"""
+        result = PurchasingService.get_purchase_orders(db_session, *JUNE, today=date(2025, 6, 1))
+        orders = {o["supplier_name"]: o for o in result["purchase_orders"]}
+
+        assert set(orders) == {"Mercado", "Mayorista"}
+        assert [l["ingredient_id"] for l in orders["Mayorista"]["lines"]] == [1]
+        assert orders["Mayorista"]["lines"][0]["packages"] == 1
+        assert orders["Mayorista"]["total"] == pytest.approx(1200.0)
+
+        # Oil moved from Aceites (600, below its 5000 minimum) to Mercado (700)
+        mercado = {l["ingredient_id"]: l for l in orders["Mercado"]["lines"]}
+        assert set(mercado) == {2, 3}
+        assert mercado[2]["packages"] == 2  # 1.25 kg in 1 kg bags
+        assert orders["Mercado"]["total"] == pytest.approx(180.0 + 700.0)
+
+        assert result["total_spend"] == pytest.approx(2080.0)
+        assert result["default_supplier_spend"] == pytest.approx(1400.0 + 180.0 + 600.0)
+        assert result["savings"] == pytest.approx(100.0)
+        assert result["unsourced"] == []
+
+    def test_order_by_dates(self, db_session, price_lists):
+        """Test order-by is the event date minus lead time"""
+        result = PurchasingService.get_purchase_orders(db_session, *JUNE, today=date(2025, 6, 14))
+        orders = {o["supplier_name"]: o for o in result["purchase_orders"]}
+
+        assert orders["Mayorista"]["order_by"] == date(2025, 6, 12)
+        assert orders["Mercado"]["order_by"] == date(2025, 6, 13)
+        assert orders["Mayorista"]["is_late"] is True
+        assert [o["supplier_name"] for o in result["purchase_orders"]] == ["Mayorista", "Mercado"]
+
+    def test_need_by_per_event_not_per_name(self, db_session, price_lists):
+        """Test an earlier event with the same name does not pull other ingredients' dates forward"""
+        db_session.add(Recipe(id=3, name="Onion Soup", recipe_type=RecipeType.FINAL_DISH, yield_quantity=1.0, yield_unit_id=5))
+        db_session.add(RecipeItem(parent_recipe_id=3, ingredient_id=2, quantity=500.0, unit_id=2))
+        db_session.add(Event(
+            id=2, name="Wedding Reception", client_name="Other Client", event_date=date(2025, 6, 5),
+            guest_count=10, status=EventStatus.CONFIRMED
+        ))
+        db_session.add(EventOrder(event_id=2, recipe_id=3, quantity=2.0, unit_price_frozen=10.0, cost_at_sale=0.0))
+        db_session.commit()
+
+        result = PurchasingService.get_purchase_orders(db_session, *JUNE, today=date(2025, 6, 1))
+        orders = {o["supplier_name"]: o for o in result["purchase_orders"]}
+
+        # Tomato is only needed by the June 15 event, onion already on June 5
+        assert orders["Mayorista"]["need_by"] == date(2025, 6, 15)
+        assert orders["Mercado"]["need_by"] == date(2025, 6, 5)
+        mercado = {l["ingredient_id"]: l["need_by"] for l in orders["Mercado"]["lines"]}
+        assert mercado == {2: date(2025, 6, 5), 3: date(2025, 6, 15)}
+
+    def test_unsourced_ingredients(self, db_session, price_lists):
+        """Test ingredients without offers are listed with an estimated cost"""
+        db_session.get(Ingredient, 4).stock_quantity = 0.0
+        db_session.commit()
+
+        result = PurchasingService.get_purchase_orders(db_session, *JUNE)
+
+        assert [u["ingredient_id"] for u in result["unsourced"]] == [4]
+        assert result["unsourced"][0]["estimated_cost"] == pytest.approx(0.0625 * 50.0)
+
+    def test_keeps_order_below_minimum_without_alternative(self):
+        """Test a supplier stays (and is reported) when no one else sells the item"""
+        offers = {1: [{"supplier_id": 9, "minimum_order": 100.0, "price": 10.0,
+                       "package_size": 1.0, "lead_time_days": 1}]}
+        solution = PurchasingService.optimize([{"id": 1, "to_buy": 2.5}], offers)
+
+        offer, quote = solution["assignments"][1]
+        assert offer["supplier_id"] == 9
+        assert quote["packages"] == 3
+        assert solution["below_minimum"] == {9: pytest.approx(70.0)}
+
+    def test_endpoint(self, client, db_session, price_lists):
+        """Test GET /production/purchase-orders"""
+        response = client.get("/api/v1/production/purchase-orders?start_date=2025-06-01&end_date=2025-06-30")
+
+        assert response.status_code == 200
+        assert response.json()["total_spend"] == pytest.approx(2080.0)
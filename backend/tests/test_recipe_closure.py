@@ -0,0 +1,112 @@
+"""
+Tests for the recipe closure table and cycle prevention
+"""
+import pytest
+from fastapi import status
+from app.models.recipe import RecipeClosure
+from app.services.recipe_graph_service import RecipeGraphService
+
+
+def _closure(db_session):
+    return {(r.ancestor_id, r.descendant_id): r.depth for r in db_session.query(RecipeClosure)}
+
+
+def _create_recipe(client, name):
+    response = client.post("/api/v1/recipes/", json={"name": name, "recipe_type": "sub_recipe"})
+    assert response.status_code == status.HTTP_201_CREATED
+    return response.json()["id"]
+
+
+def _add_child(client, parent_id, child_id):
+    return client.post(
+        f"/api/v1/recipes/{parent_id}/items",
+        json={"child_recipe_id": child_id, "quantity": 1.0, "unit_id": 5}
+    )
+
+
+class TestRecipeClosure:
+    """Tests for RecipeGraphService and the recipes API"""
+
+    def test_rebuild_from_items(self, db_session, sample_recipes):
+        """Test rebuild creates reflexive rows and sub-recipe paths"""
+        RecipeGraphService.rebuild(db_session)
+
+        assert _closure(db_session) == {(1, 1): 0, (2, 2): 0, (2, 1): 1}
+
+    def test_indirect_cycle_rejected(self, client, db_session, sample_units):
+        """Test A -> B -> C then C -> A is rejected"""
+        a, b, c = (_create_recipe(client, name) for name in ("Recipe A", "Recipe B", "Recipe C"))
+        assert _add_child(client, a, b).status_code == status.HTTP_201_CREATED
+        assert _add_child(client, b, c).status_code == status.HTTP_201_CREATED
+
+        response = _add_child(client, c, a)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert _closure(db_session)[(a, c)] == 2
+
+    def test_remove_item_keeps_alternative_path(self, client, db_session, sample_units):
+        """Test deleting one path keeps the pair if another path remains"""
+        a, b, c = (_create_recipe(client, name) for name in ("Recipe A", "Recipe B", "Recipe C"))
+        _add_child(client, a, b)
+        _add_child(client, b, c)
+        _add_child(client, a, c)
+        assert _closure(db_session)[(a, c)] == 1
+
+        direct = [i for i in client.get(f"/api/v1/recipes/{a}").json()["items"] if i["child_recipe_id"] == c][0]
+        response = client.delete(f"/api/v1/recipes/{a}/items/{direct['id']}")
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+        db_session.expire_all()
+        assert _closure(db_session)[(a, c)] == 2
+
+    def test_delete_recipe_cleans_closure(self, client, db_session, sample_units):
+        """Test deleting a middle recipe removes paths through it"""
+        a, b, c = (_create_recipe(client, name) for name in ("Recipe A", "Recipe B", "Recipe C"))
+        _add_child(client, a, b)
+        _add_child(client, b, c)
+
+        response = client.delete(f"/api/v1/recipes/{b}")
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+        db_session.expire_all()
+        closure = _closure(db_session)
+        assert (a, c) not in closure
+        assert all(b not in pair for pair in closure)
+
+    def test_recompute_loads_only_reachable_edges(self, client, db_session, sample_units):
+        """Test edges are loaded from the affected recipes down, not catalog-wide"""
+        a, b, c, x, y = (_create_recipe(client, name) for name in ("A", "B", "C", "X", "Y"))
+        _add_child(client, a, b)
+        _add_child(client, b, c)
+        _add_child(client, x, y)
+
+        assert RecipeGraphService._load_edges(db_session, roots={b}) == {b: {c}}
+        assert RecipeGraphService._load_edges(db_session, roots={a}, exclude={b}) == {}
+        assert RecipeGraphService._load_edges(db_session, roots={a, x}) == {a: {b}, b: {c}, x: {y}}
+
+    def test_sub_recipes_and_used_in(self, client, sample_units):
+        """Test descendant / ancestor listing endpoints"""
+        a, b, c = (_create_recipe(client, name) for name in ("Recipe A", "Recipe B", "Recipe C"))
+        _add_child(client, a, b)
+        _add_child(client, b, c)
+
+        subs = client.get(f"/api/v1/recipes/{a}/sub-recipes").json()
+        used_in = client.get(f"/api/v1/recipes/{c}/used-in").json()
+
+        assert [(r["id"], r["depth"]) for r in subs] == [(b, 1), (c, 2)]
+        assert {r["id"] for r in used_in} == {a, b}
+
+    def test_find_cycles(self, db_session, sample_units):
+        """Test legacy cycles in recipe_items are reported"""
+        from app.models.recipe import Recipe, RecipeItem
+        a = Recipe(name="A", yield_quantity=1.0)
+        b = Recipe(name="B", yield_quantity=1.0)
+        db_session.add_all([a, b])
+        db_session.commit()
+        db_session.add_all([
+            RecipeItem(parent_recipe_id=a.id, child_recipe_id=b.id, quantity=1.0, unit_id=5),
+            RecipeItem(parent_recipe_id=b.id, child_recipe_id=a.id, quantity=1.0, unit_id=5),
+        ])
+        db_session.commit()
+
+        assert RecipeGraphService.find_cycles(db_session) == [a.id, b.id]
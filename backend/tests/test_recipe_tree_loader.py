@@ -0,0 +1,58 @@
+"""
+Tests for the recursive CTE recipe tree loader
+"""
+import pytest
+from app.models.recipe import Recipe, RecipeItem, RecipeType
+from app.services.recipe_service import RecipeService
+from tests.conftest import QueryCounter
+
+
+@pytest.fixture
+def deep_recipe(db_session, sample_recipes):
+    """Three levels: Lasagna -> Pasta with Tomato Sauce -> Tomato Sauce"""
+    lasagna = Recipe(name="Lasagna", recipe_type=RecipeType.FINAL_DISH, yield_quantity=10.0)
+    db_session.add(lasagna)
+    db_session.commit()
+    db_session.add_all([
+        RecipeItem(parent_recipe_id=lasagna.id, child_recipe_id=2, quantity=3.0, unit_id=5),
+        RecipeItem(parent_recipe_id=lasagna.id, child_recipe_id=1, quantity=0.25, unit_id=3),
+        RecipeItem(parent_recipe_id=lasagna.id, ingredient_id=4, quantity=10.0, unit_id=2),
+    ])
+    db_session.commit()
+    expected = db_session.get(Recipe, lasagna.id).total_cost
+    lasagna_id = lasagna.id
+    db_session.expunge_all()
+    return lasagna_id, expected
+
+
+class TestRecipeTreeLoader:
+    """Tests for RecipeService.load_recipe_tree"""
+
+    def test_single_query_then_no_sql(self, db_session, deep_recipe):
+        """Test the whole tree loads in one statement and costing needs no more SQL"""
+        lasagna_id, expected = deep_recipe
+
+        with QueryCounter() as load_queries:
+            recipe = RecipeService.load_recipe_tree(db_session, lasagna_id)
+        with QueryCounter() as cost_queries:
+            total = recipe.total_cost
+            names = [item.child_recipe.name for item in recipe.items if item.child_recipe_id]
+
+        assert load_queries.count == 1
+        assert cost_queries.count == 0
+        assert total == pytest.approx(expected)
+        assert names == ["Pasta with Tomato Sauce", "Tomato Sauce"]
+
+    def test_missing_recipe(self, db_session):
+        """Test unknown id returns None"""
+        assert RecipeService.load_recipe_tree(db_session, 999) is None
+
+    def test_scale_recipe_uses_tree(self, client, deep_recipe):
+        """Test GET /recipes/{id}/scale still resolves sub-recipe names"""
+        lasagna_id, _ = deep_recipe
+        response = client.get(f"/api/v1/recipes/{lasagna_id}/scale?target_quantity=20")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["scaling_factor"] == 2.0
+        assert [i["name"] for i in data["items"]][:2] == ["Pasta with Tomato Sauce", "Tomato Sauce"]
@@ -0,0 +1,96 @@
+"""
+Tests for batch event re-costing
+"""
+import pytest
+from datetime import date
+from app.models.event import Event, EventOrder, EventOrderCostAudit, EventStatus
+from app.services.cost_cache_service import RecipeCostCacheService
+from app.services.event_service import EventService
+from app.services.recost_service import RecostService
+
+JUNE = {"start_date": "2025-06-01", "end_date": "2025-06-30"}
+
+
+def pasta_cost(db_session, recipe):
+    return RecipeCostCacheService.get_costs(db_session, [recipe.id])[recipe.id]["total_cost"]
+
+
+class TestRecostEvents:
+    """RecostService.recost_events"""
+
+    def test_updates_costs_and_writes_audit(self, db_session, sample_events, sample_recipes):
+        """Test stale order costs are refreshed, audited and totals kept"""
+        pasta = sample_recipes[1]
+        old_cost = db_session.query(EventOrder).one().cost_at_sale
+        new_cost = pasta_cost(db_session, pasta)
+
+        result = RecostService.recost_events(db_session, date(2025, 6, 1), date(2025, 6, 30))
+
+        assert result["orders_checked"] == 1
+        assert result["orders_changed"] == 1
+        assert result["cost_delta"] == pytest.approx(round((new_cost - old_cost) * 100, 2))
+        db_session.expire_all()
+        assert db_session.query(EventOrder).one().cost_at_sale == pytest.approx(new_cost)
+        assert db_session.query(EventOrder).one().unit_price_frozen == 150.0
+        audit = db_session.query(EventOrderCostAudit).one()
+        assert (audit.old_cost, audit.new_cost) == pytest.approx((old_cost, new_cost))
+        assert db_session.get(Event, 1).orders_total_cost == pytest.approx(new_cost * 100)
+        assert EventService.check_order_totals(db_session)["consistent"]
+
+    def test_second_run_changes_nothing(self, db_session, sample_events):
+        """Test an up-to-date range is a no-op"""
+        RecostService.recost_events(db_session, date(2025, 6, 1), date(2025, 6, 30))
+        result = RecostService.recost_events(db_session, date(2025, 6, 1), date(2025, 6, 30))
+
+        assert result["orders_changed"] == 0
+        assert db_session.query(EventOrderCostAudit).count() == 1
+
+    def test_dry_run_writes_nothing(self, db_session, sample_events):
+        """Test dry runs report changes without applying them"""
+        old_cost = db_session.query(EventOrder).one().cost_at_sale
+
+        result = RecostService.recost_events(db_session, date(2025, 6, 1), date(2025, 6, 30), dry_run=True)
+
+        assert result["orders_changed"] == 1
+        db_session.rollback()
+        assert db_session.query(EventOrder).one().cost_at_sale == old_cost
+        assert db_session.query(EventOrderCostAudit).count() == 0
+
+    def test_status_and_date_filters(self, db_session, sample_events):
+        """Test completed events and events out of range are left alone"""
+        assert RecostService.recost_events(
+            db_session, date(2025, 6, 1), date(2025, 6, 30), statuses=[EventStatus.COMPLETED]
+        )["orders_checked"] == 0
+        assert RecostService.recost_events(
+            db_session, date(2025, 7, 1), date(2025, 7, 31)
+        )["orders_checked"] == 0
+
+
+class TestRecostEndpoints:
+    """POST /events/recost and job status"""
+
+    def test_sync_request(self, client, sample_events):
+        """Test the synchronous variant returns the summary"""
+        response = client.post("/api/v1/events/recost", json=JUNE)
+
+        assert response.status_code == 200
+        assert response.json()["orders_changed"] == 1
+
+    def test_background_job(self, client, db_session, sample_events):
+        """Test a background job runs and reports its result"""
+        response = client.post("/api/v1/events/recost", json={**JUNE, "background": True})
+        assert response.status_code == 200
+        job_id = response.json()["job_id"]
+
+        job = client.get(f"/api/v1/events/recost/jobs/{job_id}").json()
+        assert job["status"] == "completed"
+        assert job["orders_done"] == job["orders_total"] == 1
+        assert job["result"]["orders_changed"] == 1
+        assert db_session.query(EventOrderCostAudit).one().job_id == job_id
+
+    def test_unknown_job_and_validation(self, client):
+        """Test 404 for unknown jobs and 422 for reversed ranges"""
+        assert client.get("/api/v1/events/recost/jobs/nope").status_code == 404
+        assert client.post("/api/v1/events/recost", json={
+            "start_date": "2025-07-01", "end_date": "2025-06-01"
+        }).status_code == 422
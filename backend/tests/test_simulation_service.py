@@ -0,0 +1,130 @@
+"""
+Tests for the coefficient-matrix inflation simulation
+"""
+import pytest
+from app.models.ingredient import Ingredient
+from app.models.recipe import Recipe, RecipeItem, RecipeType
+from app.services.cost_cache_service import RecipeCostCacheService
+from app.services.costing_service import CostingService
+from app.services.simulation_service import SimulationService
+from tests.conftest import QueryCounter
+
+
+@pytest.fixture
+def nested_dish(db_session, sample_recipes):
+    """Lasagna (10 portions) -> 3 x Pasta (4 portions) -> Tomato Sauce"""
+    lasagna = Recipe(name="Lasagna", recipe_type=RecipeType.FINAL_DISH, yield_quantity=10.0)
+    db_session.add(lasagna)
+    db_session.commit()
+    db_session.add_all([
+        RecipeItem(parent_recipe_id=lasagna.id, child_recipe_id=2, quantity=3.0, unit_id=5),
+        RecipeItem(parent_recipe_id=lasagna.id, ingredient_id=4, quantity=10.0, unit_id=2),
+    ])
+    db_session.commit()
+    return lasagna
+
+
+class TestCoefficientMatrix:
+    """Matrix x unit costs must equal the batch costing totals"""
+
+    def test_matrix_reproduces_total_costs(self, db_session, nested_dish):
+        """Test every recipe total equals the matrix row times unit costs"""
+        data = CostingService.load_costing_data(db_session)
+        costs = CostingService.compute_costs_from_data(data)
+        matrix = CostingService.build_coefficient_matrix(data)
+
+        for recipe_id, row in matrix.items():
+            total = sum(
+                coef * CostingService.real_cost_per_usage_unit(
+                    data["ingredients"][i].current_cost,
+                    data["ingredients"][i].conversion_ratio,
+                    data["ingredients"][i].yield_factor,
+                )
+                for i, coef in row.items()
+            )
+            assert total == pytest.approx(costs[recipe_id]["total_cost"])
+
+        # Lasagna: 3 pasta runs of 1/4 x 0.5 L sauce x 800 g tomato
+        assert matrix[nested_dish.id][1] == pytest.approx(3 / 4 * 0.5 * 800.0)
+
+
+class TestInflationSimulation:
+    """The shock reaches dishes through any depth of sub-recipes"""
+
+    def test_shock_reaches_nested_dishes(self, db_session, nested_dish):
+        """Test +20% on Vegetables matches a full recompute for all levels"""
+        result = SimulationService.simulate_inflation(db_session, "Vegetables", 20.0)
+        impacted = {r["recipe_id"]: r for r in result["top_impacted_recipes"]}
+
+        expected = CostingService.compute_costs(db_session, ingredient_costs={1: 150.0 * 1.2, 2: 80.0 * 1.2})
+        assert set(impacted) == {1, 2, nested_dish.id}
+        for recipe_id, row in impacted.items():
+            assert row["new_cost"] == pytest.approx(round(expected[recipe_id]["total_cost"], 2))
+        assert result["ingredients_affected_count"] == 2
+        assert result["recipes_affected_count"] == 3
+
+    def test_unknown_category(self, db_session, sample_recipes):
+        """Test a category with no ingredients returns an empty impact list"""
+        result = SimulationService.simulate_inflation(db_session, "Nothing", 10.0)
+
+        assert result["impacted_recipes"] == []
+
+    def test_catalog_reused_until_costs_change(self, db_session, nested_dish):
+        """Test repeated runs reuse the flattened catalog and a price change rebuilds it"""
+        SimulationService.simulate_inflation(db_session, "Vegetables", 20.0)
+        with QueryCounter() as reused:
+            SimulationService.simulate_inflation(db_session, "Vegetables", 20.0)
+        assert reused.count <= 3
+
+        db_session.get(Ingredient, 1).current_cost = 300.0
+        RecipeCostCacheService.invalidate_ingredients(db_session, [1])
+        db_session.commit()
+
+        result = SimulationService.simulate_inflation(db_session, "Vegetables", 20.0)
+        sauce = next(r for r in result["top_impacted_recipes"] if r["recipe_id"] == 1)
+        expected = CostingService.compute_costs(db_session, [1])[1]["total_cost"]
+        assert sauce["original_cost"] == pytest.approx(round(expected, 2))
+
+
+class TestScenarioGrid:
+    """Several scenarios against one loaded cost structure"""
+
+    SCENARIOS = [
+        {"name": "Veg +20", "category_shocks": {"Vegetables": 20.0}},
+        {"name": "Oil +50", "ingredient_shocks": {3: 50.0}},
+        {"name": "Veg +20, tomato +100", "category_shocks": {"Vegetables": 20.0}, "ingredient_shocks": {1: 100.0}},
+    ]
+
+    def test_matrix_matches_single_runs(self, db_session, nested_dish):
+        """Test each matrix column equals simulate_inflation / a full recompute"""
+        result = SimulationService.simulate_scenarios(db_session, self.SCENARIOS)
+        rows = {row["recipe_id"]: row for row in result["matrix"]}
+
+        single = SimulationService.simulate_inflation(db_session, "Vegetables", 20.0)
+        for impacted in single["top_impacted_recipes"]:
+            assert rows[impacted["recipe_id"]]["increase_amounts"][0] == pytest.approx(impacted["increase_amount"])
+
+        expected = CostingService.compute_costs(db_session, ingredient_costs={1: 300.0, 2: 96.0})
+        for recipe_id, row in rows.items():
+            assert row["original_cost"] + row["increase_amounts"][2] == pytest.approx(
+                expected[recipe_id]["total_cost"], abs=0.02
+            )
+
+        assert [s["recipes_affected_count"] for s in result["scenarios"]] == [3, 3, 3]
+        assert result["scenarios"][0]["max_increase"]["recipe_id"] == 1  # 1 L of sauce
+
+    def test_csv_export(self, client, db_session, nested_dish):
+        """Test POST /simulation/scenarios?format=csv returns one column pair per scenario"""
+        response = client.post("/api/v1/simulation/scenarios?format=csv", json={"scenarios": self.SCENARIOS})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        lines = response.text.strip().splitlines()
+        assert lines[0].split(",")[:5] == ["recipe_id", "recipe_name", "original_cost", "Veg +20 new_cost", "Veg +20 increase_%"]
+        assert len(lines) == 4
+
+    def test_duplicate_names_rejected(self, client, db_session, nested_dish):
+        """Test scenario names must be unique"""
+        response = client.post("/api/v1/simulation/scenarios", json={"scenarios": self.SCENARIOS[:1] * 2})
+
+        assert response.status_code == 422
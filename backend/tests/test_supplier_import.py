@@ -0,0 +1,194 @@
+"""
+Tests for the streaming supplier price list import
+"""
+import io
+import pytest
+from app.models.ingredient import Ingredient, IngredientPriceHistory
+from app.models.supplier import Supplier, SupplierProduct
+from app.services.supplier_import_service import SupplierImportService, parse_number
+from tests.conftest import QueryCounter
+
+
+@pytest.fixture
+def supplier(db_session):
+    supplier = Supplier(id=7, name="Mercado Central")
+    db_session.add(supplier)
+    db_session.commit()
+    return supplier
+
+
+@pytest.fixture
+def supplied_ingredients(db_session, supplier, sample_ingredients):
+    """Sample ingredients with the supplier as their default supplier"""
+    db_session.query(Ingredient).update({"default_supplier_id": supplier.id})
+    db_session.commit()
+    return sample_ingredients
+
+
+def csv_rows(text):
+    return SupplierImportService.iter_rows(io.BytesIO(text.encode()), "list.csv")
+
+
+class TestImportPriceList:
+    """SupplierImportService.import_price_list"""
+
+    def test_upserts_products_and_changed_costs(self, db_session, supplier, supplied_ingredients):
+        """Test matching on sku, product upsert and history only for changes"""
+        report = SupplierImportService.import_price_list(db_session, supplier.id, csv_rows(
+            "sku;supplier_sku;precio\n"
+            "TOM-001;MC-TOM;\"165,50\"\n"
+            "ONI-001;;80\n"
+        ))
+
+        assert report["rows_imported"] == 2
+        assert report["products_created"] == 2
+        assert report["ingredients_updated"] == 1
+        assert db_session.get(Ingredient, 1).current_cost == pytest.approx(165.5)
+        assert db_session.query(IngredientPriceHistory).one().ingredient_id == 1
+        products = {p.supplier_sku: p for p in db_session.query(SupplierProduct)}
+        assert products.keys() == {"MC-TOM", "ONI-001"}
+
+        # Second list matches on supplier_sku alone and updates in place
+        report = SupplierImportService.import_price_list(db_session, supplier.id, csv_rows(
+            "supplier_sku,price\nMC-TOM,170\n"
+        ))
+        assert (report["products_created"], report["products_updated"]) == (0, 1)
+        assert db_session.query(SupplierProduct).count() == 2
+        assert db_session.get(Ingredient, 1).current_cost == 170.0
+        assert db_session.query(IngredientPriceHistory).count() == 2
+
+    def test_cost_is_per_purchase_unit(self, db_session, supplier, supplied_ingredients):
+        """Test package prices are divided by the package size (in purchase units)"""
+        report = SupplierImportService.import_price_list(db_session, supplier.id, csv_rows(
+            "sku,price,package_size\nTOM-001,1650,10\nONI-001,80,0\n"
+        ))
+
+        assert db_session.get(Ingredient, 1).current_cost == pytest.approx(165.0)
+        assert db_session.query(SupplierProduct).one().price == 1650.0
+        assert report["errors"] == [{"row": 3, "error": "Package size must be positive"}]
+
+        # A 500 g package priced 90 is 180 per kg
+        db_session.query(SupplierProduct).update({"package_unit_id": 2})
+        db_session.commit()
+        SupplierImportService.import_price_list(db_session, supplier.id, csv_rows(
+            "sku,price,package_size\nTOM-001,90,500\n"
+        ))
+        assert db_session.get(Ingredient, 1).current_cost == pytest.approx(180.0)
+
+    def test_other_suppliers_do_not_set_costs(self, db_session, supplier, supplied_ingredients):
+        """Test only the default supplier's prices become ingredient costs"""
+        db_session.add(Supplier(id=8, name="Otro"))
+        db_session.commit()
+
+        report = SupplierImportService.import_price_list(db_session, 8, csv_rows("sku,price\nTOM-001,99\n"))
+
+        assert report["costs_skipped_not_default"] == 1
+        assert report["products_created"] == 1
+        assert db_session.get(Ingredient, 1).current_cost == 150.0
+        assert db_session.query(IngredientPriceHistory).count() == 0
+
+    def test_rows_resolving_to_one_product(self, db_session, supplier, supplied_ingredients):
+        """Test a sku row and a supplier_sku row of the same product upsert once"""
+        report = SupplierImportService.import_price_list(db_session, supplier.id, csv_rows(
+            "sku,supplier_sku,price\nTOM-001,,160\nTOM-001,TOM-001,175\n"
+        ))
+
+        assert report["products_created"] == 1
+        assert db_session.query(SupplierProduct).one().price == 175.0
+        assert db_session.get(Ingredient, 1).current_cost == 175.0
+
+    def test_unchanged_rows_write_nothing(self, db_session, supplier, supplied_ingredients):
+        """Test re-importing the same list is a no-op"""
+        text = "sku,price\nTOM-001,150\n"
+        SupplierImportService.import_price_list(db_session, supplier.id, csv_rows(text))
+        report = SupplierImportService.import_price_list(db_session, supplier.id, csv_rows(text))
+
+        assert report["unchanged"] == 1
+        assert db_session.query(IngredientPriceHistory).count() == 0
+
+    def test_error_report(self, db_session, supplier, supplied_ingredients):
+        """Test bad rows are reported by row number and the rest imported"""
+        report = SupplierImportService.import_price_list(db_session, supplier.id, csv_rows(
+            "sku,price\nTOM-001,abc\nNOPE-1,10\n,5\nONI-001,-1\nONI-001,90\n"
+        ))
+
+        assert [e["row"] for e in report["errors"]] == [2, 3, 4, 5]
+        assert report["rows_imported"] == 1
+        assert db_session.get(Ingredient, 2).current_cost == 90.0
+
+    def test_dry_run(self, db_session, supplier, supplied_ingredients):
+        """Test dry runs report without writing"""
+        report = SupplierImportService.import_price_list(
+            db_session, supplier.id, csv_rows("sku,price\nTOM-001,200\n"), dry_run=True
+        )
+
+        assert report["ingredients_updated"] == 1
+        assert db_session.get(Ingredient, 1).current_cost == 150.0
+        assert db_session.query(SupplierProduct).count() == 0
+
+    def test_statements_per_batch_not_per_row(self, db_session, supplier, sample_units):
+        """Test statement count depends on batches, not rows"""
+        db_session.add_all([
+            Ingredient(name=f"Item {i}", sku=f"IT-{i}", purchase_unit_id=sample_units[0].id,
+                       usage_unit_id=sample_units[0].id, current_cost=1.0)
+            for i in range(60)
+        ])
+        db_session.commit()
+
+        counts = []
+        for rows in (5, 60):
+            text = "sku,price\n" + "".join(f"IT-{i},{rows + 2}\n" for i in range(rows))
+            with QueryCounter() as counter:
+                SupplierImportService.import_price_list(db_session, supplier.id, csv_rows(text), update_costs=False)
+            counts.append(counter.count)
+
+        assert counts[0] == counts[1]
+
+    def test_parse_number(self):
+        """Test both decimal separators and currency signs"""
+        assert parse_number("$ 1.234,50") == 1234.5
+        assert parse_number("1,234.50") == 1234.5
+        assert parse_number(12) == 12.0
+        assert parse_number("") is None
+
+
+class TestPriceListEndpoint:
+    """POST /suppliers/{id}/price-list"""
+
+    def test_csv_upload(self, client, supplier, supplied_ingredients):
+        """Test a CSV upload returns the report"""
+        response = client.post(
+            f"/api/v1/suppliers/{supplier.id}/price-list",
+            files={"file": ("list.csv", b"sku,price\nTOM-001,160\nBAD,1\n", "text/csv")},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["ingredients_updated"] == 1
+        assert data["errors"] == [{"row": 3, "error": "Unknown SKU BAD"}]
+
+    def test_rejects_bad_files(self, client, supplier):
+        """Test unknown types, missing columns and unknown suppliers"""
+        post = lambda sid, name, body: client.post(
+            f"/api/v1/suppliers/{sid}/price-list", files={"file": (name, body, "text/plain")}
+        )
+        assert post(supplier.id, "list.txt", b"sku,price\n").status_code == 400
+        assert post(supplier.id, "list.csv", b"name,price\nx,1\n").status_code == 400
+        assert post(999, "list.csv", b"sku,price\n").status_code == 404
+
+    def test_xlsx_upload(self, client, supplier, supplied_ingredients):
+        """Test XLSX files are read with openpyxl"""
+        openpyxl = pytest.importorskip("openpyxl")
+        workbook = openpyxl.Workbook()
+        workbook.active.append(["SKU", "Precio"])
+        workbook.active.append(["TOM-001", 175.0])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+
+        response = client.post(
+            f"/api/v1/suppliers/{supplier.id}/price-list",
+            files={"file": ("list.xlsx", buffer.getvalue(), "application/octet-stream")},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["ingredients_updated"] == 1
@@ -0,0 +1,38 @@
+"""
+Tests for the purchase-unit conversion table
+"""
+import pytest
+from app.models.ingredient import Ingredient
+from app.services.unit_conversion_service import UnitConversionService
+
+
+class TestUnitConversionTable:
+    """Factors from recipe units to purchase units"""
+
+    def test_weight_factors(self, db_session, sample_ingredients):
+        """Test grams and kilograms convert to the kg purchase unit"""
+        table = UnitConversionService.load_table(db_session, sample_ingredients)
+
+        assert UnitConversionService.to_purchase_factor(table, 1, 1) == pytest.approx(1.0)
+        assert UnitConversionService.to_purchase_factor(table, 1, 2) == pytest.approx(0.001)
+        assert table["unit_names"][1] == "Kilogram"
+
+    def test_usage_unit_uses_conversion_ratio(self, db_session, sample_units):
+        """Test a count purchase unit with a weight usage unit (1 box = 500 g)"""
+        box = Ingredient(
+            name="Eggs Box", sku="EGG-BOX", purchase_unit_id=5, usage_unit_id=2,
+            conversion_ratio=500.0, current_cost=100.0,
+        )
+        db_session.add(box)
+        db_session.commit()
+        table = UnitConversionService.load_table(db_session, [box])
+
+        assert UnitConversionService.to_purchase_factor(table, box.id, 2) == pytest.approx(1 / 500)
+        assert UnitConversionService.to_purchase_factor(table, box.id, 1) == pytest.approx(1000 / 500)
+        assert UnitConversionService.to_purchase_factor(table, box.id, 5) == pytest.approx(1.0)
+
+    def test_incompatible_unit_falls_back_to_usage_unit(self, db_session, sample_ingredients):
+        """Test a volume unit on a weight ingredient is read as the usage unit"""
+        table = UnitConversionService.load_table(db_session, sample_ingredients)
+
+        assert UnitConversionService.to_purchase_factor(table, 1, 4) == pytest.approx(1 / 1000)